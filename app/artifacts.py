@@ -0,0 +1,54 @@
+"""Render artifacts shared read-only between all sessions.
+
+QR codes and rendered labels only depend on their input values, so every
+operator can reuse what another one already produced. With ``SHARED_STORE``
+set, rendered labels are shared with the other worker processes as well.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Tuple
+
+from .cache import LRUCache
+from .shared_store import get_store
+
+QR_CACHE = LRUCache(maxsize=int(os.getenv("QR_CACHE_SIZE", "4096")))
+
+# Rendered SVG label previews keyed by ``(template, name, expiry, qr data)``
+PREVIEW_CACHE = LRUCache(maxsize=int(os.getenv("PREVIEW_CACHE_SIZE", "512")))
+
+# Rendered PNG/PDF bytes keyed by ``render_key(format, svg)`` and raster
+# labels keyed by ``bitmap_key(name, expiry, qr data)``
+RENDER_CACHE = LRUCache(
+    maxsize=int(os.getenv("RENDER_CACHE_SIZE", "1024")),
+    shared=get_store(),
+    namespace="render",
+    ttl=float(os.getenv("SHARED_RENDER_TTL", "86400")),
+)
+
+
+def render_key(fmt: str, svg_string: str) -> Tuple[str, str]:
+    """Return the :data:`RENDER_CACHE` key of ``svg_string`` rendered as ``fmt``."""
+
+    return fmt, hashlib.sha256(svg_string.encode("utf-8")).hexdigest()
+
+
+def bitmap_key(name: str, expiry: str, qr_data: str) -> Tuple[str, str]:
+    """Return the :data:`RENDER_CACHE` key of the raster label of a device.
+
+    The label font is part of the key, since it changes the bitmap.
+    """
+
+    from .fonts import FONTS
+
+    return render_key("bitmap", "\n".join((name, expiry, qr_data, FONTS.path or "", str(FONTS.size))))
+
+
+def qr_data_url(data: str, size: int = 200) -> str:
+    """Return a cached PNG data URL of ``data`` encoded as QR code."""
+
+    from .qrcode_utils import generate_qr_code_data_url
+
+    return QR_CACHE.get_or_create((data, size), lambda: generate_qr_code_data_url(data, size=size))
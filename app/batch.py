@@ -0,0 +1,255 @@
+"""Headless label production for scheduled bulk runs.
+
+Streams calibration entries from calServer, renders one label per entry in
+a pool of worker processes and prints them or writes them to a directory::
+
+    python -m app.batch --filter '[{"property": "C2339", "value": 1, "operator": "="}]' \\
+        --template Standard \\
+        --output-dir labels/ --workers 4
+
+Labels are rendered with the same templates as the UI preview and the
+print API (see :func:`~app.preview_templates.render_label_svg`).
+
+Credentials default to the ``CALSERVER_URL``, ``CALSERVER_USERNAME``,
+``CALSERVER_PASSWORD`` and ``CALSERVER_API_KEY`` environment variables. The
+module does not import NiceGUI, so it runs on machines without a display
+and starts quickly from cron or the Windows task scheduler.
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, List, Tuple
+
+from .calserver_api import iter_calibration_data
+from .preview_templates import render_label_svg
+from .render_service import render_bytes, worker_pool
+from .row_store import row_from_entry
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("pdf", "png")
+
+
+def label_fields(row: Dict[str, Any], base_url: str) -> Tuple[str, str, str]:
+    """Return ``(name, expiry, qr data)`` of a table row as used by the UI."""
+
+    return row["I4201"], row["C2303"], f"{base_url.rstrip('/')}/qrcode/{row['MTAG']}"
+
+
+def _render_label(template: str, name: str, expiry: str, qr_data: str, fmt: str) -> bytes:
+    """Render one label as PDF or PNG bytes; runs in a worker process."""
+
+    return render_bytes(render_label_svg(template, name, expiry, qr_data), fmt)
+
+
+def _safe_filename(value: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", value).strip("._") or "label"
+
+
+class DirectorySink:
+    """Write rendered labels to ``directory`` named after their MTAG."""
+
+    def __init__(self, directory: str, fmt: str) -> None:
+        self.directory = directory
+        self.fmt = fmt
+        os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, index: int, row: Dict[str, Any], data: bytes) -> str:
+        name = f"{index:06d}_{_safe_filename(str(row.get('MTAG') or ''))}.{self.fmt}"
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as fh:
+            fh.write(data)
+        return path
+
+
+class PrinterSink:
+    """Send rendered labels to a printer or printer group."""
+
+    def __init__(self, printer: str, fmt: str) -> None:
+        self.printer = printer
+        self.fmt = fmt
+
+    def __call__(self, index: int, row: Dict[str, Any], data: bytes) -> str:
+        from .print_utils import print_file
+
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{self.fmt}") as tmp:
+            tmp.write(data)
+            tmp_path = tmp.name
+        try:
+            return print_file(tmp_path, self.printer)
+        finally:
+            os.unlink(tmp_path)
+
+
+def create_executor(workers: int) -> Executor:
+    """Return a pool of ``workers`` render processes (``0`` = threads)."""
+
+    if workers > 0:
+        return worker_pool(workers)
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="batch-render")
+
+
+def run_batch(
+    rows: Iterable[Dict[str, Any]],
+    sink: Callable[[int, Dict[str, Any], bytes], Any],
+    base_url: str,
+    template: str = "Standard",
+    fmt: str = "pdf",
+    workers: int = 2,
+    executor: Executor | None = None,
+) -> Dict[str, Any]:
+    """Render and emit a label for every row; return a throughput report.
+
+    Parameters
+    ----------
+    rows:
+        Table rows (see :func:`~app.row_store.row_from_entry`), consumed
+        while they are produced.
+    sink:
+        Called with ``(index, row, data)`` for every rendered label, in the
+        order of ``rows``.
+    base_url:
+        calServer URL used for the QR code link.
+    template:
+        Name of the label template.
+    fmt:
+        ``"pdf"`` or ``"png"``.
+    workers:
+        Number of render processes; ``0`` renders on threads.
+    executor:
+        Existing pool to use instead of creating one.
+    """
+
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    own_executor = executor is None
+    executor = executor or create_executor(workers)
+    # A few jobs per worker keep every process busy without rendering the
+    # whole stream ahead of a slow printer.
+    window = max(2, workers * 4)
+    in_flight: Deque[Tuple[int, Dict[str, Any], Future]] = collections.deque()
+    report: Dict[str, Any] = {"labels": 0, "failed": 0, "bytes": 0}
+    started = time.perf_counter()
+
+    def emit() -> None:
+        index, row, future = in_flight.popleft()
+        try:
+            data = future.result()
+            sink(index, row, data)
+        except Exception as e:
+            report["failed"] += 1
+            logger.error("Label %d (%s) failed: %s", index, row.get("MTAG"), e)
+            return
+        report["labels"] += 1
+        report["bytes"] += len(data)
+        if report["labels"] % 100 == 0:
+            logger.info("%d labels done (%.1f/s)", report["labels"], report["labels"] / (time.perf_counter() - started))
+
+    try:
+        for index, row in enumerate(rows):
+            future = executor.submit(_render_label, template, *label_fields(row, base_url), fmt)
+            in_flight.append((index, row, future))
+            if len(in_flight) >= window:
+                emit()
+        while in_flight:
+            emit()
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+    report["seconds"] = time.perf_counter() - started
+    report["per_second"] = report["labels"] / report["seconds"] if report["seconds"] else 0.0
+    return report
+
+
+def stream_rows(
+    base_url: str,
+    username: str,
+    password: str,
+    api_key: str,
+    filter_json: Dict[str, Any] | list,
+    only_current: bool = False,
+) -> Iterable[Dict[str, Any]]:
+    """Yield table rows while the calServer response is downloaded."""
+
+    for chunk in iter_calibration_data(base_url, username, password, api_key, filter_json):
+        for entry in chunk:
+            row = row_from_entry(entry)
+            if not only_current or row["C2339"] == 1:
+                yield row
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.batch", description="Render calServer labels without the UI.")
+    parser.add_argument("--base-url", default=os.getenv("CALSERVER_URL"), help="calServer URL (CALSERVER_URL)")
+    parser.add_argument("--username", default=os.getenv("CALSERVER_USERNAME"), help="API user (CALSERVER_USERNAME)")
+    parser.add_argument("--password", default=os.getenv("CALSERVER_PASSWORD"), help="API password (CALSERVER_PASSWORD)")
+    parser.add_argument("--api-key", default=os.getenv("CALSERVER_API_KEY"), help="API key (CALSERVER_API_KEY)")
+    parser.add_argument("--filter", default="[]", help="calServer filter as JSON")
+    parser.add_argument("--only-current", action="store_true", help="Only devices marked as current (C2339)")
+    parser.add_argument("--template", default="Standard", help="Label template name")
+    parser.add_argument("--format", choices=FORMATS, default="pdf", help="Label format")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--printer", help="Printer or printer group to print on")
+    target.add_argument("--output-dir", help="Directory to write the labels to")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) - 1),
+        help="Render processes (0 = threads in this process)",
+    )
+    parser.add_argument("--debug", action="store_true", help="Verbose logging")
+    args = parser.parse_args(argv)
+    missing = [opt for opt in ("base_url", "username", "password", "api_key") if not getattr(args, opt)]
+    if missing:
+        parser.error("missing calServer credentials: " + ", ".join("--" + m.replace("_", "-") for m in missing))
+    try:
+        args.filter = json.loads(args.filter)
+    except ValueError as e:
+        parser.error(f"--filter is not valid JSON: {e}")
+    return args
+
+
+def main(argv: List[str] | None = None) -> int:
+    """Run a batch from the command line; return the exit code."""
+
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.debug else logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    if args.printer:
+        sink: Callable[[int, Dict[str, Any], bytes], Any] = PrinterSink(args.printer, args.format)
+    else:
+        sink = DirectorySink(args.output_dir, args.format)
+    rows = stream_rows(args.base_url, args.username, args.password, args.api_key, args.filter, args.only_current)
+    try:
+        report = run_batch(rows, sink, args.base_url, args.template, args.format, args.workers)
+    except Exception as e:
+        logger.error("Batch aborted: %s", e)
+        return 2
+    logger.info(
+        "%d labels in %.1f s (%.1f labels/s, %.1f MiB), %d failed",
+        report["labels"],
+        report["seconds"],
+        report["per_second"],
+        report["bytes"] / 2**20,
+        report["failed"],
+    )
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":  # pragma: no cover - manual start
+    multiprocessing.freeze_support()
+    sys.exit(main())
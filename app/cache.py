@@ -0,0 +1,146 @@
+"""Small thread-safe LRU cache used for parsed drawings and render artifacts."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from .metrics import CACHE_HITS, CACHE_MISSES
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Mapping with least-recently-used eviction and hit statistics.
+
+    Parameters
+    ----------
+    maxsize:
+        Maximum number of entries kept. ``0`` disables caching.
+    shared:
+        Optional :class:`~app.shared_store.SharedStore` backing the cache.
+        Values (``bytes`` only) are written through to it, and local misses
+        are looked up there, so other worker processes reuse them.
+    namespace:
+        Prefix of the keys in ``shared``.
+    ttl:
+        Seconds entries are kept in ``shared``.
+    name:
+        Label of the ``cache_hits_total``/``cache_misses_total`` metrics;
+        lookups of unnamed caches are not exported (see
+        :func:`~app.metrics.watch_caches`).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        shared: Any = None,
+        namespace: str = "cache",
+        ttl: float | None = None,
+        name: str | None = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.shared = shared
+        self.namespace = namespace
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data or self._shared_get(key) is not None
+
+    def _shared_key(self, key: Hashable) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return ":".join([self.namespace, *map(str, parts)])
+
+    def _shared_get(self, key: Hashable) -> bytes | None:
+        if self.shared is None:
+            return None
+        try:
+            return self.shared.get(self._shared_key(key))
+        except Exception as e:  # the local cache keeps working without the store
+            logger.warning("Shared cache %s unavailable: %s", self.namespace, e)
+            return None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for ``key`` and mark it as recently used."""
+
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                pass
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                self._record(True)
+                return value
+        value = self._shared_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                self._record(False)
+                return default
+            self.hits += 1
+            self._record(True)
+        self._put_local(key, value)
+        return value
+
+    def _record(self, hit: bool) -> None:
+        if self.name is not None:
+            (CACHE_HITS if hit else CACHE_MISSES).inc(cache=self.name)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store ``value`` under ``key``, evicting the oldest entries."""
+
+        if self.maxsize <= 0:
+            return
+        self._put_local(key, value)
+        if self.shared is not None:
+            try:
+                self.shared.set(self._shared_key(key), value, self.ttl)
+            except Exception as e:
+                logger.warning("Shared cache %s unavailable: %s", self.namespace, e)
+
+    def _put_local(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key`` or store ``factory()``."""
+
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drop all local entries and reset :attr:`hits`/:attr:`misses`.
+
+        The exported counters keep counting.
+        """
+
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of lookups answered from the cache."""
+
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -1,8 +1,69 @@
 """Small wrapper around the calServer REST API."""
 
+import codecs
 import json
+import os
+import re
+import time
 import requests
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from .metrics import (
+    CALSERVER_BYTES,
+    CALSERVER_ERRORS,
+    CALSERVER_QUEUE_SECONDS,
+    CALSERVER_ROWS,
+    CALSERVER_SECONDS,
+    CALSERVER_THROTTLED,
+)
+from .rate_limit import RateLimiter, get_limiter
+from .tracing import span, start_span
+
+# Repeats of requests answered with 429/503; the limiter waits for Retry-After
+RETRIES = int(os.getenv("CALSERVER_RETRIES", "2"))
+RETRY_STATUSES = (429, 503)
+# Seconds a request may wait for the rate limiter
+QUEUE_TIMEOUT = float(os.getenv("CALSERVER_QUEUE_TIMEOUT", "60"))
+
+
+def _limited_get(
+    url: str,
+    params: Dict[str, Any],
+    priority: str,
+    traced: Any,
+    stream: bool = False,
+) -> Tuple[RateLimiter, Any]:
+    """``GET`` ``url`` through the rate limiter of its calServer.
+
+    Returns the limiter and the response; the caller must call
+    ``limiter.release()`` once it is done with the response.
+    """
+    limiter = get_limiter(url)
+    extra = {"stream": True} if stream else {}
+    for attempt in range(RETRIES + 1):
+        waited = limiter.acquire(priority, QUEUE_TIMEOUT)
+        CALSERVER_QUEUE_SECONDS.observe(waited, priority=priority)
+        traced.set(queued_ms=round(waited * 1000, 1), attempts=attempt + 1)
+        started = time.perf_counter()
+        try:
+            response = requests.get(url, params=params, timeout=10, **extra)
+        except Exception:
+            limiter.observe(None)
+            limiter.release()
+            raise
+        status = getattr(response, "status_code", 200)
+        elapsed = getattr(response, "elapsed", None)
+        latency = elapsed.total_seconds() if elapsed is not None else time.perf_counter() - started
+        headers = getattr(response, "headers", None) or {}
+        limiter.observe(latency, status, headers.get("Retry-After"))
+        if status in RETRY_STATUSES:
+            CALSERVER_THROTTLED.inc(status=status)
+            if attempt < RETRIES:
+                getattr(response, "close", lambda: None)()
+                limiter.release()
+                continue
+        return limiter, response
+    raise AssertionError("unreachable")  # pragma: no cover
 
 
 def fetch_calibration_data(
@@ -11,6 +72,7 @@ def fetch_calibration_data(
     password: str,
     api_key: str,
     filter_json: Dict[str, Any] | list,
+    priority: str = "interactive",
 ) -> Dict[str, Any]:
     """Fetch calibration information from the API.
 
@@ -29,6 +91,8 @@ def fetch_calibration_data(
         Additional API key to use.
     filter_json:
         JSON payload used as a query filter.
+    priority:
+        ``"interactive"`` or ``"background"``; see :mod:`app.rate_limit`.
 
     Returns
     -------
@@ -42,6 +106,161 @@ def fetch_calibration_data(
         "filter": json.dumps(filter_json),
     }
     url = f"{base_url.rstrip('/')}/api/calibration"
-    response = requests.get(url, params=params, timeout=10)
-    response.raise_for_status()
-    return response.json()
+    start = time.perf_counter()
+    with span("fetch_calibration_data", url=url, mode="full") as traced:
+        try:
+            limiter, response = _limited_get(url, params, priority, traced)
+            try:
+                response.raise_for_status()
+                with span("json_parse"):
+                    data = response.json()
+            finally:
+                limiter.release()
+        except Exception:
+            CALSERVER_ERRORS.inc(mode="full")
+            raise
+        CALSERVER_SECONDS.observe(time.perf_counter() - start, mode="full")
+        content = getattr(response, "content", None)
+        if isinstance(content, (bytes, str)):
+            CALSERVER_BYTES.observe(len(content), mode="full")
+            traced.set(bytes=len(content))
+        entries = data.get("data", {}).get("calibration") if isinstance(data, dict) else data
+        if isinstance(entries, list):
+            CALSERVER_ROWS.observe(len(entries), mode="full")
+            traced.set(rows=len(entries))
+    return data
+
+
+# Matches the start of the entry array in ``{"data": {"calibration": [...]}}``
+_CALIBRATION_ARRAY = re.compile(r'"calibration"\s*:\s*\[')
+
+
+class _EntryStreamParser:
+    """Incrementally extract the calibration entries from a JSON response."""
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._raw: List[str] = []
+        self._in_array = False
+        self._done = False
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """Consume ``data`` and return the entries completed by it."""
+
+        text = self._text.decode(data)
+        if self._done:
+            return []
+        self._buffer += text
+        if not self._in_array:
+            self._raw.append(text)
+            stripped = self._buffer.lstrip()
+            if stripped.startswith("["):
+                self._buffer = stripped[1:]
+            else:
+                match = _CALIBRATION_ARRAY.search(self._buffer)
+                if not match:
+                    return []
+                self._buffer = self._buffer[match.end():]
+            self._in_array = True
+            self._raw = []
+        entries = []
+        pos = 0
+        buffer = self._buffer
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self._done = True
+                break
+            try:
+                entry, pos = self._decoder.raw_decode(buffer, pos)
+            except ValueError:  # incomplete entry, wait for more data
+                break
+            entries.append(entry)
+        self._buffer = buffer[pos:]
+        return entries
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Return entries of responses the streaming path could not handle."""
+
+        if self._in_array:
+            return []
+        data = json.loads("".join(self._raw) + self._text.decode(b"", final=True))
+        return (data.get("data", {}).get("calibration") if isinstance(data, dict) else data) or []
+
+
+def iter_calibration_data(
+    base_url: str,
+    username: str,
+    password: str,
+    api_key: str,
+    filter_json: Dict[str, Any] | list,
+    chunk_size: int = 500,
+    cancelled: Callable[[], bool] | None = None,
+    priority: str = "interactive",
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield calibration entries in chunks while the response is downloaded.
+
+    Takes the same parameters as :func:`fetch_calibration_data`. The entries
+    of ``data.calibration`` (or of a top level list) are parsed as soon as
+    their bytes arrive, so callers can show the first rows long before a
+    large response is complete. ``cancelled`` is polled between chunks and
+    stops the download when it returns ``True``. The rate limiter slot is
+    held until the download is complete.
+    """
+    params = {
+        "HTTP_X_REST_USERNAME": username,
+        "HTTP_X_REST_PASSWORD": password,
+        "HTTP_X_REST_API_KEY": api_key,
+        "filter": json.dumps(filter_json),
+    }
+    url = f"{base_url.rstrip('/')}/api/calibration"
+    started = time.perf_counter()
+    received = rows = 0
+    parse_seconds = 0.0
+    # not made current: the generator is suspended while the caller runs
+    traced = start_span("fetch_calibration_data", url=url, mode="stream")
+    try:
+        limiter, response = _limited_get(url, params, priority, traced, stream=True)
+    except Exception as e:
+        CALSERVER_ERRORS.inc(mode="stream")
+        traced.fail(e)
+        traced.finish()
+        raise
+    try:
+        response.raise_for_status()
+        parser = _EntryStreamParser()
+        pending: List[Dict[str, Any]] = []
+        for data in response.iter_content(chunk_size=65536):
+            if cancelled and cancelled():
+                traced.set(cancelled=True)
+                return
+            received += len(data)
+            parse_started = time.perf_counter()
+            pending.extend(parser.feed(data))
+            parse_seconds += time.perf_counter() - parse_started
+            while len(pending) >= chunk_size:
+                rows += chunk_size
+                yield pending[:chunk_size]
+                pending = pending[chunk_size:]
+        pending.extend(parser.close())
+        rows += len(pending)
+        for start in range(0, len(pending), chunk_size):
+            yield pending[start:start + chunk_size]
+        CALSERVER_SECONDS.observe(time.perf_counter() - started, mode="stream")
+        CALSERVER_BYTES.observe(received, mode="stream")
+        CALSERVER_ROWS.observe(rows, mode="stream")
+    except Exception as e:
+        CALSERVER_ERRORS.inc(mode="stream")
+        traced.fail(e)
+        raise
+    finally:
+        response.close()
+        limiter.release()
+        # JSON parsing is interleaved with the download, so only its sum is known
+        traced.set(rows=rows, bytes=received, parse_ms=round(parse_seconds * 1000, 1))
+        traced.finish()
@@ -0,0 +1,199 @@
+"""TrueType fonts and cached text layout for raster labels.
+
+With ``LABEL_FONT`` pointing to a TrueType/OpenType file, raster labels are
+drawn with that face instead of Pillow's tiny bitmap font::
+
+    LABEL_FONT=/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf
+    LABEL_FONT_SIZE=22
+
+Loading a face and rasterizing glyphs is the expensive part of drawing text,
+so :class:`FontManager` keeps
+
+* one font object per size,
+* the rendered mask of every text segment (``"Gerät: "``, a device name)
+  per size in an LRU cache, pasted onto the label on later use,
+* the result of fitting a line into a width (shrinking long device names
+  down to ``LABEL_FONT_MIN_SIZE``, then shortening them with "…").
+
+A line is drawn as segments, so a prefix shared by all labels is rasterized
+once. Without ``LABEL_FONT`` text is drawn with the bitmap font as before.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, NamedTuple, Sequence, Tuple
+
+from .cache import LRUCache
+
+ELLIPSIS = "…"
+
+
+class TextLayout(NamedTuple):
+    """Rendered segment: coverage ``mask`` drawn at ``(x + left, y + top)``."""
+
+    mask: Any
+    left: int
+    top: int
+    advance: float
+
+
+class FontManager:
+    """Fonts per size plus caches of rendered segments and fitted lines.
+
+    Parameters
+    ----------
+    path:
+        TrueType/OpenType file; ``None`` uses Pillow's bitmap font.
+    size:
+        Default font size in pixels.
+    min_size:
+        Smallest size auto-fit shrinks text to.
+    cache_size:
+        Rendered segments kept.
+    """
+
+    def __init__(self, path: str | None = None, size: int = 22, min_size: int = 12, cache_size: int = 2048) -> None:
+        self.path = path or None
+        self.size = size
+        self.min_size = min(min_size, size)
+        self.layouts = LRUCache(maxsize=cache_size)
+        self.fits = LRUCache(maxsize=cache_size)
+        self._fonts: Dict[int, Any] = {}
+        self._default: Any = None
+        # FreeType faces are not safe to rasterize from several threads
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_env(cls) -> "FontManager":
+        return cls(
+            path=os.getenv("LABEL_FONT"),
+            size=int(os.getenv("LABEL_FONT_SIZE", "22")),
+            min_size=int(os.getenv("LABEL_FONT_MIN_SIZE", "12")),
+            cache_size=int(os.getenv("LABEL_TEXT_CACHE", "2048")),
+        )
+
+    @property
+    def default(self) -> Any:
+        """Pillow's bitmap font, used without ``path``."""
+
+        if self._default is None:
+            from PIL import ImageFont
+
+            self._default = ImageFont.load_default()
+        return self._default
+
+    def font(self, size: int | None = None) -> Any:
+        """Return the face at ``size`` pixels, loaded once per size."""
+
+        if self.path is None:
+            return self.default
+        size = size or self.size
+        font = self._fonts.get(size)
+        if font is None:
+            from PIL import ImageFont
+
+            with self._lock:
+                font = self._fonts.get(size)
+                if font is None:
+                    font = self._fonts[size] = ImageFont.truetype(self.path, size)
+        return font
+
+    def advance(self, text: str, size: int) -> float:
+        """Return the width of ``text`` in pixels."""
+
+        return self.layout(text, size).advance
+
+    def layout(self, text: str, size: int) -> TextLayout:
+        """Return the cached rendering of ``text`` at ``size``."""
+
+        key = (size, text)
+        cached = self.layouts.get(key)
+        if cached is not None:
+            return cached
+        from PIL import Image, ImageDraw
+
+        font = self.font(size)
+        with self._lock:
+            left, top, right, bottom = font.getbbox(text)
+            mask = Image.new("L", (max(1, right - left), max(1, bottom - top)), 0)
+            ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+            layout = TextLayout(mask, left, top, font.getlength(text))
+        self.layouts.put(key, layout)
+        return layout
+
+    def fit(self, parts: Sequence[str], max_width: float, size: int | None = None) -> Tuple[int, Tuple[str, ...]]:
+        """Return ``(size, parts)`` of the line fitting into ``max_width``.
+
+        The largest size between :attr:`min_size` and ``size`` is used; if
+        even the smallest is too wide the last part is shortened with "…".
+        Results are cached per line and width.
+        """
+
+        size = size or self.size
+        parts = tuple(parts)
+        key = (parts, max_width, size)
+        cached = self.fits.get(key)
+        if cached is not None:
+            return cached
+
+        def width(candidate: Tuple[str, ...], sz: int) -> float:
+            font = self.font(sz)
+            with self._lock:
+                return sum(font.getlength(p) for p in candidate)
+
+        result = None
+        low, high = self.min_size, size
+        if width(parts, high) <= max_width:
+            result = (high, parts)
+        elif width(parts, low) <= max_width:
+            # largest fitting size; ``low`` always fits, ``high`` never does
+            while high - low > 1:
+                middle = (low + high) // 2
+                if width(parts, middle) <= max_width:
+                    low = middle
+                else:
+                    high = middle
+            result = (low, parts)
+        else:
+            head, last = parts[:-1], parts[-1] if parts else ""
+            keep = len(last)
+            while keep > 0 and width(head + (last[:keep].rstrip() + ELLIPSIS,), low) > max_width:
+                keep -= 1
+            result = (low, head + (last[:keep].rstrip() + ELLIPSIS,))
+        self.fits.put(key, result)
+        return result
+
+    def draw_line(
+        self,
+        image: Any,
+        draw: Any,
+        xy: Tuple[float, float],
+        parts: Sequence[str],
+        fill: Any = "black",
+        size: int | None = None,
+        max_width: float | None = None,
+    ) -> int:
+        """Draw the segments ``parts`` as one line at ``xy``; return the size used.
+
+        ``max_width`` shrinks the line to fit (see :meth:`fit`). With the
+        bitmap font the line is drawn unchanged and ``0`` is returned.
+        """
+
+        parts = tuple(p for p in parts if p)
+        if self.path is None:
+            draw.text(xy, "".join(parts), font=self.default, fill=fill)
+            return 0
+        size = size or self.size
+        if max_width is not None:
+            size, parts = self.fit(parts, max_width, size)
+        x, y = xy
+        for part in parts:
+            layout = self.layout(part, size)
+            image.paste(fill, (round(x + layout.left), round(y + layout.top)), layout.mask)
+            x += layout.advance
+        return size
+
+
+FONTS = FontManager.from_env()
@@ -1,6 +1,9 @@
 """Functions for rendering device and calibration label images."""
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+from .fonts import FONTS
+from .metrics import TEMPLATE_SECONDS
+from .tracing import span
 from .qrcode_utils import (
     generate_qr_code,
     generate_qr_code_data_url,
@@ -15,7 +18,11 @@ def svg_header() -> str:
     # XML header is sufficient and avoids that network request.
     return "<?xml version='1.0' encoding='UTF-8' standalone='no'?>\n"
 
-FONT = ImageFont.load_default()
+# Bitmap font of labels without ``LABEL_FONT``; see :mod:`app.fonts`
+FONT = FONTS.default
+
+# Room for text left of the QR code pasted at x=280
+TEXT_WIDTH = 260
 
 
 def device_label(name: str, expiry: str, mtag: str) -> Image.Image:
@@ -34,13 +41,15 @@ def device_label(name: str, expiry: str, mtag: str) -> Image.Image:
     encoding the provided ``mtag`` value.
     """
 
-    img = Image.new("RGB", (400, 200), color="white")
-    draw = ImageDraw.Draw(img)
-    draw.text((10, 10), f"Gerät: {name}", font=FONT, fill="black")
-    draw.text((10, 50), f"Ablauf: {expiry}", font=FONT, fill="black")
-    qr = generate_qr_code(mtag, size=100)
-    img.paste(qr, (280, 10))
-    return img
+    with TEMPLATE_SECONDS.time(template="device_label"):
+        img = Image.new("RGB", (400, 200), color="white")
+        draw = ImageDraw.Draw(img)
+        # long device names are shrunk to fit next to the QR code
+        FONTS.draw_line(img, draw, (10, 10), ("Gerät: ", name), max_width=TEXT_WIDTH)
+        FONTS.draw_line(img, draw, (10, 50), ("Ablauf: ", expiry), max_width=TEXT_WIDTH)
+        qr = generate_qr_code(mtag, size=100)
+        img.paste(qr, (280, 10))
+        return img
 
 
 def device_label_svg(name: str, expiry: str, mtag: str) -> str:
@@ -89,9 +98,9 @@ def calibration_label(date: str, status: str, cert: str, qr_data: str) -> Image.
 
     img = Image.new("RGB", (400, 200), color="white")
     draw = ImageDraw.Draw(img)
-    draw.text((10, 10), f"Date: {date}", font=FONT, fill="black")
-    draw.text((10, 50), f"Status: {status}", font=FONT, fill="black")
-    draw.text((10, 90), f"Cert: {cert}", font=FONT, fill="black")
+    FONTS.draw_line(img, draw, (10, 10), ("Date: ", date), max_width=TEXT_WIDTH)
+    FONTS.draw_line(img, draw, (10, 50), ("Status: ", status), max_width=TEXT_WIDTH)
+    FONTS.draw_line(img, draw, (10, 90), ("Cert: ", cert), max_width=TEXT_WIDTH)
     qr = generate_qr_code(qr_data, size=100)
     img.paste(qr, (280, 10))
     return img
@@ -125,4 +134,6 @@ def render_label_template(template: str, name: str, expiry: str, mtag: str) -> s
     """Render the given template name using the provided parameters."""
     mapping = _discover_template_functions()
     func = mapping.get(template, mapping.get("Standard"))
-    return func(name, expiry, mtag)
+    used = template if template in mapping else "Standard"
+    with TEMPLATE_SECONDS.time(template=used), span("template_render", template=used):
+        return func(name, expiry, mtag)
@@ -1,49 +1,74 @@
 """NiceGUI based label printing application with login and device table."""
 
 from __future__ import annotations
+import asyncio
 import base64
+import contextvars
+import datetime
 import io
 import os
 import inspect
-from typing import Any, Dict, List
-
-import jinja2
-
-from PIL import Image
-from nicegui import ui
-
-# Eigene Module importieren
-try:
-    from .calserver_api import fetch_calibration_data
-    from .label_templates import (
-        device_label,
-        device_label_svg,
-        available_label_templates,
-        render_label_template,
-        svg_header,
-    )
-    from .qrcode_utils import (
-        generate_qr_code,
-        generate_qr_code_data_url,
-    )
-    from .print_utils import print_label, list_printers, print_file
-except ImportError:
-    from calserver_api import fetch_calibration_data
-    from label_templates import (
-        device_label,
-        device_label_svg,
-        available_label_templates,
-        render_label_template,
-        svg_header,
-    )
-    from qrcode_utils import (
-        generate_qr_code,
-        generate_qr_code_data_url,
-    )
-    from print_utils import print_label, list_printers, print_file
-
-
-def _pil_to_data_url(image: Image.Image) -> str:
+import logging
+import secrets
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:  # PIL is loaded lazily, see ``startup``
+    from PIL import Image
+
+# Eigene Module importieren (als Paket, z.B. ``python -m app.main``)
+from .startup import (
+    announce_ready,
+    free_port,
+    lazy_import,
+    mark,
+    marks as startup_marks,
+    register_startup_endpoint,
+    wait_until_listening,
+    warm_up_in_background,
+)
+from .calserver_api import fetch_calibration_data, iter_calibration_data
+# Rendering und Drucken erst bei Bedarf bzw. im Warm-up laden
+label_templates = lazy_import(".label_templates", __package__)
+print_utils = lazy_import(".print_utils", __package__)
+# Bleiben direkt importiert: main() braucht sie vor ui.run, und sie laden
+# nur die Standardbibliothek (PIL, svglib usw. erst beim Rendern)
+from .render_service import RenderQueueFull, get_render_service
+from .session import SESSIONS, Session
+from .artifacts import PREVIEW_CACHE, QR_CACHE, RENDER_CACHE, qr_data_url
+from .preview_templates import PREVIEW_TEMPLATES, render_label_svg
+from .table_data import filter_positions, page_rows, sort_positions
+from .row_store import row_from_entry
+from .table_diff import TableSync
+from .print_jobs import PrintJobManager
+from .print_api import register_print_api
+from .prerender import PrerenderScheduler
+from .mirror import get_mirror, mirror_source
+from .rate_limit import LIMITERS
+from . import metrics
+from .profiling import profiled, register_profile_endpoint
+from .tracing import current_span, format_trace, record, traced
+
+from nicegui import app as nicegui_app, ui
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two sweeps for idle sessions
+SESSION_SWEEP_INTERVAL = 60
+
+# Seconds the search box must be idle before the table is filtered
+SEARCH_DEBOUNCE = 0.2
+
+# Seconds a row selection must stay before its (uncached) preview renders
+PREVIEW_DEBOUNCE = 0.15
+
+# Number of calibration entries added to the table at once while loading
+LOAD_CHUNK_SIZE = 500
+# Sekunden bis zum ersten Datenblock, danach wird der lokale Spiegel angezeigt
+LOAD_BUDGET = float(os.getenv("LOAD_BUDGET", "5"))
+
+def _pil_to_data_url(image: "Image.Image") -> str:
     """Return a data URL for the given PIL image."""
     buffer = io.BytesIO()
     image.save(buffer, format="PNG")
@@ -55,29 +80,35 @@ def _build_table_kwargs(
     table_func: Any,
     rows: List[Dict[str, Any]],
     on_select: Any,
+    pagination: Dict[str, Any] | None = None,
 ) -> Dict[str, Any]:
-    """Return kwargs for `ui.table` with optional parameters."""
+    """Return kwargs for `ui.table` with optional parameters.
+
+    Passing a ``pagination`` dict containing ``rowsNumber`` switches the table
+    to Quasar's server-side mode; the dict is handed over as is so later
+    in-place changes reach the table.
+    """
     kwargs: Dict[str, Any] = dict(
         columns=[
-            {"name": "I4201", "label": "Gerätename", "field": "I4201"},
-            {"name": "I4202", "label": "Hersteller", "field": "I4202"},
-            {"name": "I4203", "label": "Typ", "field": "I4203"},
-            {"name": "I4204", "label": "Beschreibung", "field": "I4204"},
-            {"name": "I4206", "label": "Seriennummer", "field": "I4206"},
-            {"name": "C2301", "label": "Kalibrierdatum", "field": "C2301"},
-            {"name": "C2303", "label": "Ablaufdatum", "field": "C2303"},
-            {"name": "MTAG",  "label": "MTAG",       "field": "MTAG"},
+            {"name": "I4201", "label": "Gerätename", "field": "I4201", "sortable": True},
+            {"name": "I4202", "label": "Hersteller", "field": "I4202", "sortable": True},
+            {"name": "I4203", "label": "Typ", "field": "I4203", "sortable": True},
+            {"name": "I4204", "label": "Beschreibung", "field": "I4204", "sortable": True},
+            {"name": "I4206", "label": "Seriennummer", "field": "I4206", "sortable": True},
+            {"name": "C2301", "label": "Kalibrierdatum", "field": "C2301", "sortable": True},
+            {"name": "C2303", "label": "Ablaufdatum", "field": "C2303", "sortable": True},
+            {"name": "MTAG",  "label": "MTAG",       "field": "MTAG", "sortable": True},
             {"name": "qrcode",  "label": "QR-Code",   "field": "qrcode"},
             {"name": "preview", "label": "Vorschau",  "field": "preview"},
         ],
         rows=rows,
-        row_key="I4201",
+        row_key="id",
         on_select=on_select,
     )
     params = inspect.signature(table_func).parameters
     # Pagination oder rows_per_page
     if "pagination" in params:
-        kwargs["pagination"] = {"rowsPerPage": 10}
+        kwargs["pagination"] = pagination if pagination is not None else {"rowsPerPage": 10}
     elif "rows_per_page" in params or any(p.kind == inspect.Parameter.VAR_KEYWORD for p in params.values()):
         kwargs["rows_per_page"] = 10
     # Suche aktivieren
@@ -103,385 +134,98 @@ def _navigate(path: str) -> None:
         raise AttributeError("No navigation method found in nicegui.ui")
 
 
-def main() -> None:
-    """Run the NiceGUI label tool."""
-    # States
-    stored_login: Dict[str, str] = {}
-    table_rows: List[Dict[str, Any]] = []
-    all_rows: List[Dict[str, Any]] = []
-    selected_row: Dict[str, Any] | None = None
-    current_image: Image.Image | None = None
-    current_svg: str | None = None
-
-    # Printer selection
-    available_printers: List[str] = []
-    selected_printer: str | None = None
-    printer_select: ui.select | None = None
-    pdf_option: ui.checkbox | None = None
-    png_option: ui.checkbox | None = None
-
-    # UI-Elemente
-    status_log: ui.log | None = None
-    label_svg: ui.html | None = None
-    template_select: ui.select | None = None
-    selected_template: str = "Standard"
-    print_button: ui.button | None = None
-    placeholder_label: ui.label | None = None
-    row_info_label: ui.label | None = None
-    device_table: ui.table | None = None
-    empty_table_label: ui.label | None = None
-    filter_switch: ui.switch | None = None
-    search_input: ui.input | None = None
-    label_dialog: ui.dialog | None = None
-    dialog_label_svg: ui.html | None = None
-
-    # Login-Felder
-    base_url: ui.input | None = None
-    username: ui.input | None = None
-    password: ui.input | None = None
-    api_key: ui.input | None = None
-
-    # Simple Jinja2 templates for the preview
-    jinja_templates = {
-        "Standard": """
-<svg width='400' height='200' xmlns='http://www.w3.org/2000/svg'>
-  <rect width='100%' height='100%' fill='white'/>
-  <text x='10' y='40' font-size='16'>I4201: {{ I4201 }}</text>
-  <text x='10' y='80' font-size='16'>C2303: {{ C2303 }}</text>
-  <g transform='translate(200,40) scale(0.5)'>
-    {{ QRCODE }}
-  </g>
-</svg>
-""",
-        "Modern": """
-<svg width='350' height='200' xmlns='http://www.w3.org/2000/svg'>
-  <rect width='100%' height='100%' fill='white'/>
-  <text x='175' y='40' font-size='20' text-anchor='middle'>{{ I4201 }}</text>
-  <text x='175' y='70' font-size='14' text-anchor='middle'>Ablauf: {{ C2303 }}</text>
-  <g transform='translate(125,90) scale(0.5)'>
-    {{ QRCODE }}
-  </g>
-</svg>
-""",
-    }
+def _current_session() -> Session:
+    """Return the session of the browser that triggered the current event."""
+    return SESSIONS.get(nicegui_app.storage.browser["id"])
+
+
+async def _check_login(session: Session, login: Dict[str, str]) -> None:
+    """Test ``login`` against calServer and store it in ``session``.
 
+    Both run in threads: the calServer rate limiter may wait for minutes and
+    the shared store for its lock, which must not stall the other sessions.
+    """
+    await asyncio.to_thread(
+        fetch_calibration_data, login["base_url"], login["username"], login["password"], login["api_key"], {}
+    )
+    await asyncio.to_thread(session.set_login, login)
+
+
+async def _evict_idle_sessions() -> None:
+    """Periodically drop sessions of operators who left."""
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+        SESSIONS.evict_idle()
+        usage = SESSIONS.memory_usage()
+        logger.debug(
+            "%d active session(s) using ~%d KiB", len(usage), sum(usage.values()) // 1024
+        )
+
+
+def main(host: str | None = None, port: int | None = None, ready_file: str | None = None) -> None:
+    """Run the NiceGUI label tool.
+
+    Parameters
+    ----------
+    host:
+        Interface to bind, default ``HOST`` or all interfaces.
+    port:
+        Port to serve on, default ``PORT`` or 8080; ``0`` picks a free one.
+    ready_file:
+        File receiving the URL once the server accepts connections.
+    """
     def render_preview(template: str, name: str, expiry: str, qr_data: str) -> str:
-        qr_png = generate_qr_code_data_url(qr_data, size=200)
-        qr_elem = f"<image href='{qr_png}' width='200' height='200' />"
-        if template in jinja_templates:
-            tpl = jinja2.Template(jinja_templates[template])
-            body = tpl.render(I4201=name, C2303=expiry, MTAG=qr_data, QRCODE=qr_elem)
-            return svg_header() + body
-        return render_label_template(template, name, expiry, qr_data)
+        # ``qr_data`` contains the base URL, so the key covers server and row
+        key = (template, name, expiry, qr_data)
+        return PREVIEW_CACHE.get_or_create(key, lambda: render_label_svg(*key))
+
+    # JSON-API für Fremdsysteme; rendert wie die Vorschau und druckt gebündelt
+    print_jobs = PrintJobManager(render_preview, get_render_service())
+    register_print_api(nicegui_app, print_jobs)
+    # Etiketten fälliger Kalibrierungen nachts vorab rendern (PRERENDER=1)
+    prerender = PrerenderScheduler.from_env(render_preview, get_render_service())
+
+    # Prometheus-Metriken unter /metrics
+    # Nur Caches dieses Prozesses; Zeichnungen und Schriften liegen in den Render-Workern
+    metrics.watch_caches({"qr": QR_CACHE, "preview": PREVIEW_CACHE, "render": RENDER_CACHE})
+    metrics.ACTIVE_SESSIONS.set_function(lambda: len(SESSIONS))
+    metrics.CALSERVER_CONCURRENCY.set_function(
+        lambda: {(("calserver", url),): limiter.limit for url, limiter in LIMITERS.items()}
+    )
+    metrics.register_metrics_endpoint(nicegui_app)
+    # Profile ein-/ausschalten unter /admin/profile (nur mit PROFILE_ADMIN_TOKEN)
+    register_profile_endpoint(nicegui_app)
+    register_startup_endpoint(nicegui_app)
+    metrics.STARTUP_SECONDS.set_function(lambda: {(("event", k),): v for k, v in startup_marks().items()})
 
     # enable Tailwind CSS for the login dialog styling
     ui.add_head_html('<script src="https://cdn.tailwindcss.com"></script>')
 
-    # Helper: Status-Log
-    def push_status(msg: str) -> None:
-        nonlocal status_log
-        if status_log:
-            try:
-                status_log.push(msg)
-            except Exception:
-                status_log = None
-        ui.notify(msg)
-
-    # Login-Handler
-    def handle_login() -> None:
-        nonlocal stored_login
-        try:
-            push_status("Checking login...")
-            fetch_calibration_data(
-                base_url.value, username.value, password.value, api_key.value, {}
-            )
-            stored_login = {
-                "base_url": base_url.value,
-                "username": username.value,
-                "password": password.value,
-                "api_key": api_key.value,
-            }
-            _navigate("/app")
-            push_status("Login successful")
-        except Exception as e:
-            push_status(f"Login failed: {e}")
-
-    # Logout-Handler
-    def logout() -> None:
-        nonlocal selected_row, current_image, current_svg, status_log, label_svg, print_button
-        nonlocal device_table, placeholder_label, empty_table_label, row_info_label, pdf_option, png_option
-        push_status("Logged out")
-        stored_login.clear()
-        selected_row = None
-        current_image = None
-        current_svg = None
-        status_log = None
-        label_svg = None
-        print_button = None
-        device_table = None
-        placeholder_label = None
-        empty_table_label = None
-        row_info_label = None
-        pdf_option = None
-        png_option = None
-        _navigate("/")
-
-    # Filter-Logik
-    def apply_table_filter() -> None:
-        nonlocal table_rows
-        table_rows.clear()
-        filtered = all_rows
-        if filter_switch.value is False:
-            # Nur aktuelle
-            filtered = [r for r in filtered if r.get("C2339") == 1]
-        if search_value := search_input.value:
-            sv = search_value.lower()
-            filtered = [
-                r for r in filtered
-                if any(sv in str(r.get(f, "")).lower() for f in ["I4201","I4202","I4203","I4204","I4206","MTAG"])
-            ]
-        table_rows.extend(filtered)
-        if device_table:
-            device_table.update()
-        if empty_table_label:
-            empty_table_label.visible = len(table_rows) == 0
-
-    # API-Daten laden
-    def fetch_data() -> None:
-        nonlocal all_rows, selected_row
-        try:
-            push_status("Fetching data...")
-            payload = [] if filter_switch.value else [{"property":"C2339","value":1,"operator":"="}]
-            data = fetch_calibration_data(
-                stored_login["base_url"], stored_login["username"],
-                stored_login["password"], stored_login["api_key"], payload
-            )
-            cal_list = (
-                data.get("data", {}).get("calibration") if isinstance(data, dict) else data
-            ) or []
-            all_rows.clear()
-            base = stored_login["base_url"].rstrip("/")
-            for entry in cal_list:
-                inv = entry.get("inventory") or {}
-                mtag = entry.get("MTAG") or inv.get("MTAG") or "-"
-                qr_url = f"{base}/qrcode/{mtag}"
-                qr_img = generate_qr_code(qr_url, size=80)
-                qr_svg = _pil_to_data_url(qr_img)
-                all_rows.append({
-                    "I4201": inv.get("I4201") or "-",
-                    "I4202": inv.get("I4202") or "-",
-                    "I4203": inv.get("I4203") or "-",
-                    "I4204": inv.get("I4204") or "-",
-                    "I4206": inv.get("I4206") or "-",
-                    "C2301": entry.get("C2301") or "-",
-                    "C2303": entry.get("C2303") or "-",
-                    "MTAG":  mtag,
-                    "qrcode": qr_svg,
-                    "preview":"<span style='cursor:pointer;color:blue'>Vorschau</span>",
-                })
-            apply_table_filter()
-            selected_row = None
-            push_status("Data loaded")
-        except Exception as e:
-            push_status(f"Error fetching data: {e}")
-            table_rows.clear()
-            if device_table:
-                device_table.update()
-            if empty_table_label:
-                empty_table_label.visible = True
-
-    # Label aktualisieren
-    def update_label(row: Dict[str, Any] | None) -> None:
-        nonlocal current_image, current_svg, selected_printer
-        if not row:
-            label_svg.content = render_preview(selected_template, "", "", "")
-            placeholder_label.visible = True
-            print_button.disable()
-            row_info_label.set_text("Keine Zeile ausgewählt")
-            current_image = None
-            current_svg = None
-            return
-        name = row["I4201"]
-        expiry = row["C2303"]
-        mtag = row["MTAG"]
-        qr_url = f"{stored_login['base_url'].rstrip('/')}/qrcode/{mtag}"
-        row_info_label.set_text(f"I4201: {name}, C2303: {expiry}")
-        current_image = device_label(name, expiry, qr_url)
-        current_svg = render_preview(selected_template, name, expiry, qr_url)
-        label_svg.content = current_svg
-        placeholder_label.visible = False
-        if selected_printer:
-            print_button.enable()
-        else:
-            print_button.disable()
-
-
-    # Auswahl-Handler
-    def on_select(e: Any) -> None:
-        nonlocal selected_row
-        sel = getattr(e, "selection", None)
-        if sel and isinstance(sel, list) and len(sel) > 0:
-            selected_row = sel[0]
-            update_label(selected_row)
-        else:
-            selected_row = None
-            update_label(None)
-
-    # Klick auf Zeile
-    def handle_row_click(e: Any) -> None:
-        data = getattr(e, "args", None)
-        row = None
-        if isinstance(data, dict):
-            row = data.get("row")
-        elif isinstance(data, list) and data:
-            row = data[-1]
-        update_label(row)
-
-    # Klick auf Vorschau-Zelle
-    def handle_cell_click(e: Any) -> None:
-        data = getattr(e, "args", None)
-        col = data.get("column", {}).get("name") if isinstance(data, dict) else None
-        if col == "preview":
-            row = data.get("row") if isinstance(data, dict) else None
-            if row:
-                mtag = row.get("MTAG", "")
-                qr_url = f"{stored_login['base_url'].rstrip('/')}/qrcode/{mtag}"
-                dialog_label_svg.content = render_preview(
-                    selected_template,
-                    row["I4201"],
-                    row["C2303"],
-                    qr_url,
-                )
-                label_dialog.open()
-
-    def change_template(e: Any) -> None:
-        nonlocal selected_template
-        if template_select:
-            selected_template = template_select.value
-        if device_table and device_table.selection:
-            update_label(device_table.selection[0])
-        else:
-            update_label(None)
-
-    def on_printer_change(e: Any) -> None:
-        nonlocal selected_printer, selected_row, print_button
-        if printer_select:
-            selected_printer = printer_select.value
-        if selected_row and selected_printer:
-            print_button.enable()
-        elif print_button:
-            print_button.disable()
-
-    # Drucken
-    def do_print() -> None:
-        nonlocal selected_printer, current_svg, pdf_option, png_option
-        if (not current_image and not current_svg) or not selected_printer:
-            push_status("Bitte zuerst Datensatz und Drucker wählen")
-            return
-        try:
-            if pdf_option and pdf_option.value:
-                import tempfile
-                from .svg_utils import svg_to_pdf_bytes
-                from .print_utils import print_file
-                pdf_data = svg_to_pdf_bytes(current_svg)
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                    tmp.write(pdf_data)
-                    tmp_path = tmp.name
-                try:
-                    print_file(tmp_path, selected_printer)
-                finally:
-                    os.unlink(tmp_path)
-            elif png_option and png_option.value:
-                from .svg_utils import svg_to_png_image
-                img = svg_to_png_image(current_svg)
-                print_label(img, selected_printer)
-            else:
-                print_label(current_image, selected_printer)
-            push_status(f"Printed on: {selected_printer}")
-        except Exception as e:
-            push_status(f"Print error: {e}")
-
-    # Main UI aufbauen
-    def show_main_ui() -> None:
-        nonlocal status_log, label_svg, print_button, placeholder_label, row_info_label
-        nonlocal device_table, empty_table_label, filter_switch, search_input, label_dialog, dialog_label_svg
-        nonlocal template_select, printer_select, available_printers, selected_printer
-        nonlocal pdf_option, png_option
-
-        try:
-            available_printers = list_printers()
-        except Exception as e:
-            push_status(f"Error listing printers: {e}")
-            available_printers = []
-        selected_printer = available_printers[0] if available_printers else None
-        with ui.column():
-            ui.button("Logout", on_click=logout).classes("absolute-top-right q-mt-sm q-mr-sm").props("icon=logout flat color=negative")
-            search_input = ui.input("Gerätename suchen").props("outlined clearable").on("input", lambda e: apply_table_filter())
-            ui.button("Daten laden", on_click=fetch_data).props("color=primary").classes("q-mt-md")
-            # Dialog
-            with ui.dialog() as label_dialog:
-                with ui.card():
-                    dialog_label_svg = ui.html(
-                        render_preview(selected_template, "", "", "")
-                    ).style("max-width:420px;border:1px solid #ccc;padding:4px;")
-                    ui.button("Schließen", on_click=label_dialog.close)
-            # Tabelle & Vorschau
-            # Tabelle & Vorschau im Grid-Layout nebeneinander
-            with ui.row().classes('grid grid-cols-3 w-full gap-4'):
-                # Tabelle links (nimmt 2/3 ein)
-                with ui.column().classes('col-span-2 border p-1'):
-                    filter_switch = ui.switch("Nur aktuelle", value=True, on_change=lambda e: apply_table_filter()).classes("q-mt-md")
-                    ui.label("Nur Aktuelle!").bind_visibility_from(filter_switch, 'value')
-                    empty_table_label = ui.label("Noch keine Daten geladen").classes("text-grey text-center q-mt-md")
-                    device_table = ui.table(**_build_table_kwargs(ui.table, table_rows, on_select)).classes("q-mt-md")
-                    device_table.on("row-click", handle_row_click)
-                    device_table.on("cell-click", handle_cell_click)
-                    device_table.add_slot("body-cell-qrcode", """
-                        <q-td :props="props"><img :src="props.value" class="w-20 h-20 object-contain" /></q-td>
-                    """)
-                    device_table.add_slot("body-cell-preview", """
-                        <q-td :props="props"><div v-html="props.value" /></q-td>
-                    """)
-                    empty_table_label.visible = len(table_rows) == 0
-                # Vorschau rechts
-                with ui.column().classes('col-span-1 border p-1'):
-                    with ui.card().classes("pa-4"):
-                        ui.label("Label-Vorschau").classes("text-h6")
-                        row_info_label = ui.label("Bitte Gerät auswählen").classes("q-mb-md")
-                        all_templates = list(dict.fromkeys(
-                            list(jinja_templates.keys()) + available_label_templates()
-                        ))
-                        template_select = ui.select(
-                            options=all_templates,
-                            value=selected_template,
-                            on_change=change_template,
-                        ).classes("q-mb-md")
-                        placeholder_label = ui.label("Keine Vorschau verfügbar").classes("text-grey q-mb-md")
-                        placeholder_label.visible = False
-                        label_svg = ui.html(
-                            render_preview(selected_template, "", "", "")
-                        ).style("max-width:420px;border:1px solid #ccc;padding:4px;")
-                        printer_select = ui.select(
-                            options=available_printers,
-                            value=selected_printer,
-                            on_change=on_printer_change,
-                        ).classes("q-mb-md")
-                        pdf_option = ui.checkbox("SVG → PDF").classes("q-mb-sm")
-                        png_option = ui.checkbox("SVG → PNG").classes("q-mb-sm")
-                        print_button = ui.button("Drucken", on_click=do_print).props("color=primary")
-                        print_button.disable()
-        # Footer
-        with ui.footer().classes("bg-grey-2 shadow-2"):
-            with ui.expansion("Status anzeigen", value=False):
-                status_log = ui.log(max_lines=100).style("background-color:white;color:black;width:100%;")
-
     @ui.page("/")
     
     def login_page() -> None:
-        nonlocal base_url, username, password, api_key
+        mark("login_page")
+        session = _current_session()
         is_dev = os.getenv("APP_ENV") == "development"
         domain = os.getenv("DOMAIN", "demo.net-cal.com" if is_dev else "calserver.example.com")
         default_url = f"https://{domain}" if not domain.startswith("http") else domain
+
+        # Login-Handler
+        @traced("login", on_finish=lambda t: setattr(session, "last_trace", t))
+        async def handle_login() -> None:
+            try:
+                ui.notify("Checking login...")
+                await _check_login(session, {
+                    "base_url": base_url.value,
+                    "username": username.value,
+                    "password": password.value,
+                    "api_key": api_key.value,
+                })
+                _navigate("/app")
+                ui.notify("Login successful")
+            except Exception as e:
+                current_span().fail(e)
+                ui.notify(f"Login failed: {e}")
     
         with ui.row().classes('min-h-screen w-screen flex items-center justify-center bg-[#f8f4f3]'):
             with ui.column().classes('w-full max-w-lg bg-white rounded-2xl shadow-lg px-8 py-6 mx-2 items-center'):
@@ -495,7 +239,7 @@ def main() -> None:
                 ui.label('Log In').classes('block text-2xl font-semibold text-center mb-8 text-gray-800')
                 
                 # API URL
-                base_url = ui.input('API URL', value=default_url).classes(
+                base_url = ui.input('API URL', value=session.login.get("base_url", default_url)).classes(
                     'w-full rounded-md py-2.5 px-4 border border-gray-200 bg-gray-50 focus:border-[#f84525] text-sm outline-[#f84525] mb-4 transition')
                 
                 # Benutzername
@@ -517,10 +261,584 @@ def main() -> None:
 
     @ui.page("/app")
     def main_page() -> None:
+        session = _current_session()
+        if not session.login:
+            _navigate("/")
+            return
+        stored_login = session.login
+        all_rows = session.all_rows
+
+        # States (per browser tab; login and rows live in the session)
+        # ``table_rows`` only holds the visible page; ``filtered_positions``
+        # are the positions in ``all_rows`` matching the current filter.
+        table_rows: List[Dict[str, Any]] = []
+        filtered_positions: List[int] = []
+        sorted_positions: List[int] | None = None
+        table_pagination: Dict[str, Any] = {
+            "page": 1, "rowsPerPage": 10, "sortBy": None, "descending": False, "rowsNumber": 0,
+        }
+        selected_row: Dict[str, Any] | None = None
+        # arguments for ``device_label``; the raster label is only built when printed
+        current_label: tuple[str, str, str] | None = None
+        current_svg: str | None = None
+        preview_task: asyncio.Task | None = None
+
+        # Printer selection
+        available_printers: List[str] = []
+        selected_printer: str | None = None
+        printer_select: ui.select | None = None
+        pdf_option: ui.checkbox | None = None
+        png_option: ui.checkbox | None = None
+
+        # UI-Elemente
+        status_log: ui.log | None = None
+        label_svg: ui.html | None = None
+        template_select: ui.select | None = None
+        selected_template: str = "Standard"
+        print_button: ui.button | None = None
+        placeholder_label: ui.label | None = None
+        row_info_label: ui.label | None = None
+        device_table: ui.table | None = None
+        table_sync: TableSync | None = None
+        empty_table_label: ui.label | None = None
+        filter_switch: ui.switch | None = None
+        search_input: ui.input | None = None
+        label_dialog: ui.dialog | None = None
+        dialog_label_svg: ui.html | None = None
+        search_task: asyncio.Task | None = None
+        page_root: ui.column | None = None
+        load_progress: ui.label | None = None
+
+        # Helper: Status-Log
+        def push_status(msg: str) -> None:
+            nonlocal status_log
+            session.touch()
+            if status_log:
+                try:
+                    status_log.push(msg)
+                except Exception:
+                    status_log = None
+            ui.notify(msg)
+
+        # Trace der letzten Aktion (Login, Laden, Auswahl, Druck) merken und anzeigen
+        def keep_trace(trace: Any) -> None:
+            session.last_trace = trace
+
+        def show_last_trace() -> None:
+            if status_log:
+                for line in format_trace(session.last_trace):
+                    status_log.push(line)
+
+        # Logout-Handler
+        def logout() -> None:
+            nonlocal selected_row, current_label, current_svg, status_log, label_svg, print_button
+            nonlocal device_table, placeholder_label, empty_table_label, row_info_label, pdf_option, png_option
+            nonlocal table_sync
+            push_status("Logged out")
+            if session.load_task:
+                session.load_task.cancel()
+            session.clear()
+            selected_row = None
+            current_label = None
+            current_svg = None
+            status_log = None
+            label_svg = None
+            print_button = None
+            device_table = None
+            table_sync = None
+            placeholder_label = None
+            empty_table_label = None
+            row_info_label = None
+            pdf_option = None
+            png_option = None
+            _navigate("/")
+
+        def table_row(pos: int, row: Dict[str, Any]) -> Dict[str, Any]:
+            """Return ``row`` as sent to the client, with its QR thumbnail."""
+            qr_url = f"{stored_login['base_url'].rstrip('/')}/qrcode/{row['MTAG']}"
+            return {
+                "id": pos,
+                **row,
+                "qrcode": qr_data_url(qr_url, size=80),
+                "preview": "<span style='cursor:pointer;color:blue'>Vorschau</span>",
+            }
+
+        # Nur die sichtbare Seite an den Client schicken
+        def refresh_table() -> None:
+            nonlocal sorted_positions
+            if sorted_positions is None:
+                sorted_positions = sort_positions(
+                    all_rows, filtered_positions,
+                    table_pagination["sortBy"], table_pagination["descending"],
+                )
+            table_pagination["rowsNumber"] = len(sorted_positions)
+            page = page_rows(sorted_positions, table_pagination["page"], table_pagination["rowsPerPage"])
+            table_rows[:] = [table_row(pos, r) for pos, r in zip(page, all_rows.rows(page))]
+            if table_sync:
+                table_sync.push(table_rows, table_pagination)
+            if empty_table_label:
+                empty_table_label.visible = len(table_rows) == 0
+
+        # Filter-Logik
+        def apply_table_filter(reset_page: bool = True) -> None:
+            nonlocal sorted_positions
+            filtered_positions[:] = filter_positions(
+                all_rows,
+                only_current=filter_switch.value is False,
+                search=search_input.value,
+                index=session.search_index,
+            )
+            sorted_positions = None
+            if reset_page:
+                table_pagination["page"] = 1
+            refresh_table()
+
+        # Suche erst nach einer kurzen Tipp-Pause ausführen
+        def on_search_input() -> None:
+            nonlocal search_task
+            if search_task:
+                search_task.cancel()
+
+            async def debounced() -> None:
+                await asyncio.sleep(SEARCH_DEBOUNCE)
+                apply_table_filter()
+
+            search_task = asyncio.create_task(debounced())
+
+        # Seitenwechsel / Sortierung (Quasar server-side mode)
+        def handle_table_request(e: Any) -> None:
+            nonlocal sorted_positions
+            args = getattr(e, "args", None) or {}
+            requested = args.get("pagination", {}) if isinstance(args, dict) else {}
+            if (requested.get("sortBy"), requested.get("descending")) != (
+                table_pagination["sortBy"], table_pagination["descending"]
+            ):
+                sorted_positions = None
+            for key in ("page", "rowsPerPage", "sortBy", "descending"):
+                if key in requested:
+                    table_pagination[key] = requested[key]
+            refresh_table()
+
+        # API-Daten laden
+        def fetch_data() -> None:
+            # Ein neuer Ladevorgang ersetzt einen noch laufenden
+            if session.load_task and not session.load_task.done():
+                session.load_task.cancel()
+            session.load_task = asyncio.create_task(load_data())
+
+        @traced("load", on_finish=keep_trace)
+        @profiled("fetch_data")
+        async def load_data() -> None:
+            nonlocal selected_row
+            stop = threading.Event()
+            chunks: asyncio.Queue = asyncio.Queue()
+            loop = asyncio.get_running_loop()
+            only_current = not filter_switch.value
+            payload = [{"property":"C2339","value":1,"operator":"="}] if only_current else []
+            base_url = stored_login["base_url"]
+            mirror = get_mirror()
+            source = mirror_source(base_url, stored_login["username"], stored_login["api_key"])
+            stale = False
+            build_seconds = 0.0
+
+            def download() -> None:
+                # runs in a worker thread and hands the chunks to the event loop
+                try:
+                    for chunk in iter_calibration_data(
+                        base_url, stored_login["username"],
+                        stored_login["password"], stored_login["api_key"], payload,
+                        chunk_size=LOAD_CHUNK_SIZE, cancelled=stop.is_set,
+                    ):
+                        loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+                    loop.call_soon_threadsafe(chunks.put_nowait, None)
+                except Exception as exc:
+                    loop.call_soon_threadsafe(chunks.put_nowait, exc)
+
+            def show_rows(rows: List[Dict[str, Any]]) -> None:
+                all_rows.extend(rows)
+                session.search_index.extend(rows)
+                apply_table_filter(reset_page=False)
+
+            def clear_rows() -> None:
+                nonlocal selected_row
+                all_rows.clear()
+                session.search_index.clear()
+                selected_row = None
+                apply_table_filter()
+
+            # Letzten bekannten Stand aus dem lokalen Spiegel anzeigen
+            async def show_mirror(reason: str) -> bool:
+                nonlocal stale
+                if mirror is None:
+                    return False
+                try:
+                    rows = await asyncio.to_thread(mirror.load, source, only_current)
+                    snapshot = await asyncio.to_thread(mirror.snapshot, source)
+                except Exception as exc:
+                    logger.warning("Reading the calibration mirror failed: %s", exc)
+                    return False
+                if not rows or not snapshot:
+                    return False
+                clear_rows()
+                show_rows(rows)
+                stale = True
+                current_span().set(mirror_rows=len(rows))
+                fetched = datetime.datetime.fromtimestamp(snapshot["fetched"]).strftime("%d.%m.%Y %H:%M")
+                load_progress.set_text(f"Offline-Daten vom {fetched} ({len(rows)} Zeilen) – calServer {reason}")
+                load_progress.classes(replace="text-orange")
+                load_progress.visible = True
+                push_status(f"Showing cached data from {fetched}: calServer {reason}")
+                return True
+
+            try:
+                await page_root.client.connected()
+            except Exception:
+                pass
+            with page_root:
+                try:
+                    push_status("Fetching data...")
+                    clear_rows()
+                    load_progress.set_text("0 Zeilen geladen")
+                    load_progress.classes(replace="text-grey")
+                    load_progress.visible = True
+                    # Kontext kopieren, damit die Download-Spans zu diesem Trace gehoeren
+                    downloader = loop.run_in_executor(None, contextvars.copy_context().run, download)
+                    within_budget = True
+                    while True:
+                        if within_budget:
+                            try:
+                                chunk = await asyncio.wait_for(chunks.get(), LOAD_BUDGET)
+                            except asyncio.TimeoutError:
+                                within_budget = False
+                                await show_mirror("antwortet langsam")
+                                continue
+                        else:
+                            chunk = await chunks.get()
+                        within_budget = False
+                        if chunk is None:
+                            if stale:
+                                clear_rows()
+                                load_progress.classes(replace="text-grey")
+                            break
+                        if isinstance(chunk, Exception):
+                            raise chunk
+                        if stale:
+                            # Live-Daten ersetzen den Offline-Stand
+                            stale = False
+                            clear_rows()
+                            load_progress.classes(replace="text-grey")
+                        built = time.perf_counter()
+                        rows = [row_from_entry(entry) for entry in chunk]
+                        build_seconds += time.perf_counter() - built
+                        show_rows(rows)
+                        load_progress.set_text(f"{len(all_rows)} Zeilen geladen …")
+                    await downloader
+                    record("row_build", build_seconds, rows=len(all_rows))
+                    current_span().set(rows=len(all_rows), only_current=only_current)
+                    load_progress.set_text(f"{len(all_rows)} Zeilen geladen")
+                    push_status("Data loaded")
+                    if mirror is not None:
+                        try:
+                            await asyncio.to_thread(lambda: mirror.store(source, all_rows[:], only_current))
+                        except Exception as exc:
+                            logger.warning("Updating the calibration mirror failed: %s", exc)
+                except asyncio.CancelledError:
+                    stop.set()
+                    raise
+                except Exception as e:
+                    stop.set()
+                    current_span().fail(e)
+                    push_status(f"Error fetching data: {e}")
+                    if stale or await show_mirror("nicht erreichbar"):
+                        return
+                    load_progress.visible = False
+                    table_rows.clear()
+                    table_pagination["rowsNumber"] = 0
+                    if table_sync:
+                        table_sync.push(table_rows, table_pagination)
+                    if empty_table_label:
+                        empty_table_label.visible = True
+
+        # Label aktualisieren
+        def show_preview(svg: str) -> None:
+            nonlocal current_svg
+            current_svg = svg
+            label_svg.content = svg
+            placeholder_label.visible = False
+            if selected_printer:
+                print_button.enable()
+            else:
+                print_button.disable()
+
+        def preview_key(row: Dict[str, Any]) -> tuple[str, str, str, str]:
+            qr_url = f"{stored_login['base_url'].rstrip('/')}/qrcode/{row['MTAG']}"
+            return selected_template, row["I4201"], row["C2303"], qr_url
+
+        def show_row(row: Dict[str, Any] | None) -> tuple[str, str, str, str] | None:
+            """Zeileninfo setzen; liefert den Vorschau-Schlüssel oder ``None``."""
+            nonlocal current_label, current_svg
+            if not row:
+                label_svg.content = render_preview(selected_template, "", "", "")
+                placeholder_label.visible = True
+                print_button.disable()
+                row_info_label.set_text("Keine Zeile ausgewählt")
+                current_label = None
+                current_svg = None
+                return None
+            key = preview_key(row)
+            _, name, expiry, qr_url = key
+            row_info_label.set_text(f"I4201: {name}, C2303: {expiry}")
+            current_label = (name, expiry, qr_url)
+            current_span().set(mtag=row["MTAG"], template=selected_template)
+            return key
+
+        # Jede Auswahl ergibt genau einen "select"-Trace: sofort bei leerer
+        # Auswahl oder gecachter Vorschau, sonst nach dem Debounce-Rendern
+        @traced("select", on_finish=keep_trace)
+        @profiled("update_label")
+        def select_now(row: Dict[str, Any] | None) -> None:
+            key = show_row(row)
+            if key is not None:
+                show_preview(render_preview(*key))
+
+        @traced("select", on_finish=keep_trace)
+        @profiled("update_label")
+        async def select_later(row: Dict[str, Any]) -> None:
+            nonlocal current_svg
+            key = show_row(row)
+            current_svg = None
+            print_button.disable()
+            await asyncio.sleep(PREVIEW_DEBOUNCE)
+            try:
+                show_preview(await asyncio.to_thread(render_preview, *key))
+            except Exception as e:
+                current_span().fail(e)
+                push_status(f"Preview error: {e}")
+
+        def update_label(row: Dict[str, Any] | None) -> None:
+            nonlocal preview_task
+            if preview_task:
+                preview_task.cancel()
+                preview_task = None
+            if row and preview_key(row) not in PREVIEW_CACHE:
+                # Bei schnellem Durchklicken nur die letzte Auswahl rendern
+                preview_task = asyncio.create_task(select_later(row))
+            else:
+                select_now(row)
+
+        # Auswahl-Handler
+        def on_select(e: Any) -> None:
+            nonlocal selected_row
+            sel = getattr(e, "selection", None)
+            if sel and isinstance(sel, list) and len(sel) > 0:
+                selected_row = sel[0]
+                update_label(selected_row)
+            else:
+                selected_row = None
+                update_label(None)
+
+        # Klick auf Zeile
+        def handle_row_click(e: Any) -> None:
+            data = getattr(e, "args", None)
+            row = None
+            if isinstance(data, dict):
+                row = data.get("row")
+            elif isinstance(data, list) and data:
+                row = data[-1]
+            update_label(row)
+
+        # Klick auf Vorschau-Zelle
+        def handle_cell_click(e: Any) -> None:
+            data = getattr(e, "args", None)
+            col = data.get("column", {}).get("name") if isinstance(data, dict) else None
+            if col == "preview":
+                row = data.get("row") if isinstance(data, dict) else None
+                if row:
+                    mtag = row.get("MTAG", "")
+                    qr_url = f"{stored_login['base_url'].rstrip('/')}/qrcode/{mtag}"
+                    dialog_label_svg.content = render_preview(
+                        selected_template,
+                        row["I4201"],
+                        row["C2303"],
+                        qr_url,
+                    )
+                    label_dialog.open()
+
+        def change_template(e: Any) -> None:
+            nonlocal selected_template
+            if template_select:
+                selected_template = template_select.value
+            if device_table and device_table.selection:
+                update_label(device_table.selection[0])
+            else:
+                update_label(None)
+
+        def on_printer_change(e: Any) -> None:
+            nonlocal selected_printer, selected_row, print_button
+            if printer_select:
+                selected_printer = printer_select.value
+            if selected_row and selected_printer and current_svg:
+                print_button.enable()
+            elif print_button:
+                print_button.disable()
+
+        # Drucken
+        @traced("print", on_finish=keep_trace)
+        @profiled("do_print")
+        async def do_print() -> None:
+            nonlocal selected_printer, current_svg, pdf_option, png_option
+            if not current_label or not current_svg or not selected_printer:
+                push_status("Bitte zuerst Datensatz und Drucker wählen")
+                return
+            # Rendering runs in the worker pool and spooling in a thread, so other
+            # clients keep being served while this label is produced.
+            renderer = get_render_service()
+            started = time.perf_counter()
+            fmt = "pdf" if pdf_option and pdf_option.value else "png" if png_option and png_option.value else "bitmap"
+            current_span().set(printer=selected_printer, format=fmt, mtag=current_label[2].rsplit("/", 1)[-1])
+            try:
+                if pdf_option and pdf_option.value:
+                    import tempfile
+                    pdf_data = await renderer.pdf(current_svg)
+                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
+                        tmp.write(pdf_data)
+                        tmp_path = tmp.name
+                    try:
+                        used_printer = await asyncio.to_thread(print_utils.print_file, tmp_path, selected_printer)
+                    finally:
+                        os.unlink(tmp_path)
+                elif png_option and png_option.value:
+                    img = await renderer.png(current_svg)
+                    used_printer = await asyncio.to_thread(print_utils.print_label, img, selected_printer)
+                else:
+                    img = await renderer.bitmap(*current_label)
+                    used_printer = await asyncio.to_thread(print_utils.print_label, img, selected_printer)
+                push_status(f"Printed on: {used_printer}")
+                mark("first_print_latency", time.perf_counter() - started)
+            except RenderQueueFull as e:
+                current_span().fail(e)
+                push_status("Renderer ausgelastet, bitte gleich erneut drucken")
+            except Exception as e:
+                current_span().fail(e)
+                push_status(f"Print error: {e}")
+
+        # Main UI aufbauen
+        def show_main_ui() -> None:
+            nonlocal status_log, label_svg, print_button, placeholder_label, row_info_label
+            nonlocal device_table, empty_table_label, filter_switch, search_input, label_dialog, dialog_label_svg
+            nonlocal template_select, printer_select, available_printers, selected_printer
+            nonlocal pdf_option, png_option, page_root, load_progress, table_sync
+
+            try:
+                available_printers = print_utils.list_printers()
+            except Exception as e:
+                push_status(f"Error listing printers: {e}")
+                available_printers = []
+            selected_printer = available_printers[0] if available_printers else None
+            with ui.column() as page_root:
+                ui.button("Logout", on_click=logout).classes("absolute-top-right q-mt-sm q-mr-sm").props("icon=logout flat color=negative")
+                search_input = ui.input("Gerätename suchen").props("outlined clearable").on("input", lambda e: on_search_input())
+                ui.button("Daten laden", on_click=fetch_data).props("color=primary").classes("q-mt-md")
+                load_progress = ui.label("").classes("text-grey")
+                load_progress.visible = False
+                # Dialog
+                with ui.dialog() as label_dialog:
+                    with ui.card():
+                        dialog_label_svg = ui.html(
+                            render_preview(selected_template, "", "", "")
+                        ).style("max-width:420px;border:1px solid #ccc;padding:4px;")
+                        ui.button("Schließen", on_click=label_dialog.close)
+                # Tabelle & Vorschau
+                # Tabelle & Vorschau im Grid-Layout nebeneinander
+                with ui.row().classes('grid grid-cols-3 w-full gap-4'):
+                    # Tabelle links (nimmt 2/3 ein)
+                    with ui.column().classes('col-span-2 border p-1'):
+                        filter_switch = ui.switch("Nur aktuelle", value=True, on_change=lambda e: apply_table_filter()).classes("q-mt-md")
+                        ui.label("Nur Aktuelle!").bind_visibility_from(filter_switch, 'value')
+                        empty_table_label = ui.label("Noch keine Daten geladen").classes("text-grey text-center q-mt-md")
+                        device_table = ui.table(
+                            **_build_table_kwargs(ui.table, table_rows, on_select, table_pagination)
+                        ).classes("q-mt-md")
+                        table_sync = TableSync(device_table, "id")
+                        device_table.on("request", handle_table_request)
+                        device_table.on("row-click", handle_row_click)
+                        device_table.on("cell-click", handle_cell_click)
+                        device_table.add_slot("body-cell-qrcode", """
+                            <q-td :props="props"><img :src="props.value" class="w-20 h-20 object-contain" /></q-td>
+                        """)
+                        device_table.add_slot("body-cell-preview", """
+                            <q-td :props="props"><div v-html="props.value" /></q-td>
+                        """)
+                        empty_table_label.visible = len(table_rows) == 0
+                    # Vorschau rechts
+                    with ui.column().classes('col-span-1 border p-1'):
+                        with ui.card().classes("pa-4"):
+                            ui.label("Label-Vorschau").classes("text-h6")
+                            row_info_label = ui.label("Bitte Gerät auswählen").classes("q-mb-md")
+                            all_templates = list(dict.fromkeys(
+                                list(PREVIEW_TEMPLATES) + label_templates.available_label_templates()
+                            ))
+                            template_select = ui.select(
+                                options=all_templates,
+                                value=selected_template,
+                                on_change=change_template,
+                            ).classes("q-mb-md")
+                            placeholder_label = ui.label("Keine Vorschau verfügbar").classes("text-grey q-mb-md")
+                            placeholder_label.visible = False
+                            label_svg = ui.html(
+                                render_preview(selected_template, "", "", "")
+                            ).style("max-width:420px;border:1px solid #ccc;padding:4px;")
+                            printer_select = ui.select(
+                                options=available_printers,
+                                value=selected_printer,
+                                on_change=on_printer_change,
+                            ).classes("q-mb-md")
+                            pdf_option = ui.checkbox("SVG → PDF").classes("q-mb-sm")
+                            png_option = ui.checkbox("SVG → PNG").classes("q-mb-sm")
+                            print_button = ui.button("Drucken", on_click=do_print).props("color=primary")
+                            print_button.disable()
+            # Footer
+            with ui.footer().classes("bg-grey-2 shadow-2"):
+                with ui.expansion("Status anzeigen", value=False):
+                    status_log = ui.log(max_lines=100).style("background-color:white;color:black;width:100%;")
+                    ui.button("Letzten Ablauf anzeigen", on_click=show_last_trace).props("flat dense")
+
         show_main_ui()
         fetch_data()
 
-    ui.run(port=8080, show=False)
+    host = host or os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", "8080")) if port is None else port
+    if port == 0:
+        # Freien Port waehlen; der Aufrufer erfaehrt ihn ueber announce_ready.
+        # Der Reload-Worker ruft main() erneut auf und erbt den Port ueber die Umgebung.
+        port = int(os.environ.setdefault("LABELTOOL_PORT", str(free_port())))
+
+    async def on_listening() -> None:
+        probe = "127.0.0.1" if host in ("0.0.0.0", "::") else host
+        if not await wait_until_listening(probe, port):
+            logger.warning("Server not reachable on %s:%d", probe, port)
+            return
+        mark("listening")
+        announce_ready(f"http://{probe}:{port}", ready_file)
+        # Sobald der Server lauscht, schwere Bibliotheken im Hintergrund laden
+        warm_up_in_background()
+
+    nicegui_app.on_startup(lambda: asyncio.create_task(on_listening()))
+    nicegui_app.on_startup(get_render_service().start)
+    nicegui_app.on_startup(lambda: asyncio.create_task(_evict_idle_sessions()))
+    nicegui_app.on_startup(print_jobs.start)
+    if prerender:
+        nicegui_app.on_startup(lambda: asyncio.create_task(prerender.run_forever()))
+    nicegui_app.on_shutdown(print_jobs.stop)
+    nicegui_app.on_shutdown(get_render_service().shutdown)
+    # ``app.storage.browser`` identifies the operator's browser; the secret
+    # signs that cookie and must be shared when running several workers.
+    storage_secret = os.getenv("STORAGE_SECRET")
+    if not storage_secret:
+        if int(os.getenv("APP_WORKERS", "1")) > 1:
+            raise RuntimeError("STORAGE_SECRET must be set when running several workers (APP_WORKERS > 1)")
+        storage_secret = secrets.token_hex(32)
+    ui.run(host=host, port=port, show=False, storage_secret=storage_secret)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,237 @@
+"""Counters and histograms for the hot paths, exposed in Prometheus format.
+
+Recording a value only takes a lock and a few additions; the text format is
+built when ``/metrics`` is scraped. No client library is needed::
+
+    with CALSERVER_SECONDS.time(endpoint="calibration"):
+        response = requests.get(...)
+"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Seconds, from a cached QR code to a slow calServer response
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1024, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+COUNT_BUCKETS = (0, 1, 10, 100, 1000, 5000, 10000, 50000, 100000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    @abc.abstractmethod
+    def samples(self) -> List[str]:
+        """Return the exposition lines for this metric."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str) -> None:
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = TIME_BUCKETS) -> None:
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: bucket counts (+Inf last), sum, count
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+            entry[0][index] += 1
+            entry[1][0] += value
+            entry[1][1] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the ``with`` block in seconds."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        entry = self._values.get(_label_key(labels))
+        return int(entry[1][1]) if entry else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(counts), list(totals)) for k, (counts, totals) in self._values.items()]
+        lines = []
+        for key, counts, (total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {int(count)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value read from a callback when scraped.
+
+    ``func`` returns a number, or a mapping of label dicts (as tuples of
+    ``(name, value)`` pairs) to numbers for several series.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, func: Callable[[], Any] | None = None) -> None:
+        super().__init__(name, help)
+        self.func = func
+
+    def set_function(self, func: Callable[[], Any]) -> None:
+        self.func = func
+
+    def samples(self) -> List[str]:
+        if self.func is None:
+            return []
+        try:
+            value = self.func()
+        except Exception:
+            return []
+        if isinstance(value, dict):
+            return [
+                f"{self.name}{_format_labels(tuple((k, str(v)) for k, v in key))} {_format_value(v2)}"
+                for key, v2 in value.items()
+            ]
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Registry:
+    """All metrics of the process in registration order."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+CALSERVER_SECONDS = Histogram("calserver_request_seconds", "Duration of calServer API requests")
+CALSERVER_BYTES = Histogram("calserver_response_bytes", "Size of calServer API responses", SIZE_BUCKETS)
+CALSERVER_ROWS = Histogram("calserver_rows_per_fetch", "Calibration entries per calServer request", COUNT_BUCKETS)
+CALSERVER_ERRORS = Counter("calserver_errors_total", "Failed calServer API requests")
+CALSERVER_QUEUE_SECONDS = Histogram("calserver_queue_seconds", "Time calServer requests waited for the rate limiter")
+CALSERVER_THROTTLED = Counter("calserver_throttled_total", "calServer responses asking to slow down (429/503)")
+CALSERVER_CONCURRENCY = Gauge("calserver_concurrency_limit", "Adaptive concurrency limit per calServer")
+QR_SECONDS = Histogram("qr_generate_seconds", "Duration of QR code generation")
+TEMPLATE_SECONDS = Histogram("label_template_render_seconds", "Duration of label template rendering")
+CONVERT_SECONDS = Histogram("svg_convert_seconds", "Duration of SVG to PNG/PDF conversion")
+SPOOL_SECONDS = Histogram("print_spool_seconds", "Duration of spooling a job on a printer")
+PRINT_JOBS = Counter("print_jobs_total", "Spool jobs per printer and result")
+CACHE_HITS = Counter("cache_hits_total", "Lookups answered by a cache")
+CACHE_MISSES = Counter("cache_misses_total", "Lookups missing a cache")
+CACHE_HIT_RATIO = Gauge("cache_hit_ratio", "Fraction of lookups answered by a cache")
+ACTIVE_SESSIONS = Gauge("active_sessions", "Operator sessions currently kept in memory")
+STARTUP_SECONDS = Gauge("startup_seconds", "Seconds from start to startup events, or their duration")
+
+
+def watch_caches(caches: Dict[str, Any]) -> None:
+    """Count lookups of the :class:`~app.cache.LRUCache` objects in ``caches``.
+
+    Each cache is labelled with its key in ``caches``; lookups from then on
+    are counted in ``cache_hits_total`` and ``cache_misses_total``.
+    """
+
+    for name, cache in caches.items():
+        cache.name = name
+
+    def ratios() -> Dict[Tuple[Tuple[str, str], ...], float]:
+        result = {}
+        for name in caches:
+            hits, misses = CACHE_HITS.value(cache=name), CACHE_MISSES.value(cache=name)
+            result[(("cache", name),)] = hits / (hits + misses) if hits + misses else 0.0
+        return result
+
+    CACHE_HIT_RATIO.set_function(ratios)
+
+
+def register_metrics_endpoint(app: Any, path: str = "/metrics") -> None:
+    """Serve :meth:`Registry.render` at ``path`` of the FastAPI/NiceGUI ``app``."""
+
+    from fastapi.responses import PlainTextResponse
+
+    @app.get(path, response_class=PlainTextResponse)
+    def metrics() -> Any:
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,201 @@
+"""Local SQLite mirror of the calibration rows shown in the device table.
+
+Every successful load replaces the mirrored rows of that calServer login,
+so the app can keep working from the last known data when calServer is slow
+or unreachable. Rows are kept per :func:`mirror_source`, i.e. per calServer
+URL and account, so one user never sees rows loaded with another user's
+permissions. The mirror holds only the fields of
+:data:`~app.row_store.ROW_FIELDS` and is indexed on MTAG, device name and
+serial number for direct lookups.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .row_store import ROW_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the tables change; older mirrors are dropped and rebuilt.
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calibration (
+    source TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    {columns}
+);
+CREATE UNIQUE INDEX IF NOT EXISTS calibration_pos ON calibration (source, pos);
+CREATE INDEX IF NOT EXISTS calibration_mtag ON calibration (source, MTAG);
+CREATE INDEX IF NOT EXISTS calibration_name ON calibration (source, I4201 COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS calibration_serial ON calibration (source, I4206 COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS snapshot (
+    source TEXT PRIMARY KEY,
+    fetched REAL NOT NULL,
+    complete INTEGER NOT NULL
+);
+""".format(columns=",\n    ".join(ROW_FIELDS))
+
+_COLUMNS = ", ".join(ROW_FIELDS)
+
+
+def mirror_source(base_url: str, username: str, api_key: str) -> str:
+    """Return the key of the rows loaded by one calServer account."""
+
+    account = hashlib.sha256(f"{username}\0{api_key}".encode()).hexdigest()[:16]
+    return f"{base_url.rstrip('/')}#{account}"
+
+
+def default_path() -> str | None:
+    """Return the mirror file from ``MIRROR_PATH``; ``"off"`` disables the mirror."""
+
+    path = os.getenv("MIRROR_PATH")
+    if path is None:
+        return os.path.join(os.path.expanduser("~"), ".calserver-print", "mirror.sqlite3")
+    return None if path.lower() in ("", "off", "none") else path
+
+
+class CalibrationMirror:
+    """SQLite copy of the calibration rows per :func:`mirror_source`.
+
+    Parameters
+    ----------
+    path:
+        Database file; ``":memory:"`` keeps the mirror in memory.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # several worker processes may share the file (timeout waits for their writes)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._conn.executescript("DROP TABLE IF EXISTS calibration; DROP TABLE IF EXISTS snapshot;")
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def store(self, source: str, rows: Iterable[Dict[str, Any]], only_current: bool = False) -> int:
+        """Replace the mirrored rows of ``source`` with ``rows``.
+
+        After a load restricted to current devices only those rows are
+        replaced; older rows of other devices are kept and the new rows are
+        appended after them.
+        """
+
+        rows = list(rows)
+        placeholders = ", ".join("?" * (len(ROW_FIELDS) + 2))
+        with self._lock, self._conn:
+            if only_current:
+                self._conn.execute("DELETE FROM calibration WHERE source = ? AND C2339 = 1", (source,))
+                start = self._conn.execute(
+                    "SELECT COALESCE(MAX(pos) + 1, 0) FROM calibration WHERE source = ?", (source,)
+                ).fetchone()[0]
+            else:
+                self._conn.execute("DELETE FROM calibration WHERE source = ?", (source,))
+                start = 0
+            values = [
+                (source, pos, *(row.get(field) for field in ROW_FIELDS))
+                for pos, row in enumerate(rows, start)
+            ]
+            self._conn.executemany(f"INSERT INTO calibration (source, pos, {_COLUMNS}) VALUES ({placeholders})", values)
+            previous = self._conn.execute(
+                "SELECT complete FROM snapshot WHERE source = ?", (source,)
+            ).fetchone()
+            complete = not only_current or bool(previous and previous[0])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshot (source, fetched, complete) VALUES (?, ?, ?)",
+                (source, time.time(), int(complete)),
+            )
+        logger.debug("Mirrored %d row(s) of %s", len(values), source.split("#")[0])
+        return len(values)
+
+    def snapshot(self, source: str) -> Dict[str, Any] | None:
+        """Return ``{"fetched": timestamp, "complete": bool, "rows": n}`` or ``None``."""
+
+        with self._lock:
+            meta = self._conn.execute(
+                "SELECT fetched, complete FROM snapshot WHERE source = ?", (source,)
+            ).fetchone()
+            if meta is None:
+                return None
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM calibration WHERE source = ?", (source,)
+            ).fetchone()[0]
+        return {"fetched": meta[0], "complete": bool(meta[1]), "rows": count}
+
+    def _select(self, where: str, params: Tuple[Any, ...]) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(f"SELECT {_COLUMNS} FROM calibration WHERE {where} ORDER BY pos", params)
+            return [dict(zip(ROW_FIELDS, values)) for values in cursor]
+
+    def load(self, source: str, only_current: bool = False) -> List[Dict[str, Any]]:
+        """Return the mirrored rows of ``source`` in their original order."""
+
+        if only_current:
+            return self._select("source = ? AND C2339 = 1", (source,))
+        return self._select("source = ?", (source,))
+
+    def find(
+        self,
+        source: str,
+        mtags: Iterable[str] = (),
+        name: str | None = None,
+        serial: str | None = None,
+    ) -> List[Dict[str, Any]]:
+        """Return rows by MTAG, or by device name / serial number prefix."""
+
+        mtags = list(mtags)
+        if mtags:
+            rows: List[Dict[str, Any]] = []
+            # stay below SQLite's limit of bound parameters
+            for start in range(0, len(mtags), 500):
+                part = mtags[start:start + 500]
+                marks = ", ".join("?" * len(part))
+                rows.extend(self._select(f"source = ? AND MTAG IN ({marks})", (source, *part)))
+            return rows
+        if name:
+            return self._select("source = ? AND I4201 LIKE ? ESCAPE '\\'", (source, _prefix(name)))
+        if serial:
+            return self._select("source = ? AND I4206 LIKE ? ESCAPE '\\'", (source, _prefix(serial)))
+        return []
+
+
+def _prefix(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+_mirror: CalibrationMirror | None = None
+_mirror_failed = False
+
+
+def get_mirror() -> CalibrationMirror | None:
+    """Return the process wide mirror, or ``None`` if disabled or unavailable."""
+
+    global _mirror, _mirror_failed
+    if _mirror is None and not _mirror_failed:
+        path = default_path()
+        if path is None:
+            _mirror_failed = True
+            return None
+        try:
+            _mirror = CalibrationMirror(path)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Calibration mirror %s unavailable: %s", path, e)
+            _mirror_failed = True
+    return _mirror
@@ -0,0 +1,203 @@
+"""Pre-render labels of calibrations coming due during off-peak hours.
+
+Label demand peaks when many calibrations expire (``C2303``) around the
+same time. :class:`PrerenderScheduler` periodically asks calServer for
+devices expiring within the next days and for recently renewed
+calibrations, and renders their labels as SVG preview, PNG and PDF into the
+shared artifact caches, together with the raster label the UI prints by
+default. At peak time printing such a label is a cache hit followed by
+spooling.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from .artifacts import RENDER_CACHE, bitmap_key, render_key
+from .calserver_api import iter_calibration_data
+from .print_jobs import service_credentials
+from .row_store import row_from_entry
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("png", "pdf")
+
+
+def parse_hours(value: str) -> Tuple[int, int]:
+    """Parse an off-peak window like ``"20-6"`` into ``(start, end)`` hours."""
+
+    start, _, end = value.partition("-")
+    hours = int(start), int(end or start)
+    if not all(0 <= h <= 24 for h in hours):
+        raise ValueError(f"Invalid hour range: {value}")
+    return hours
+
+
+def in_hours(hours: Tuple[int, int], now: datetime.datetime | None = None) -> bool:
+    """Return whether ``now`` lies in the window; ``(20, 6)`` wraps midnight."""
+
+    start, end = hours
+    hour = (now or datetime.datetime.now()).hour
+    if start == end:
+        return True
+    if start < end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def due_filters(window_days: int, today: datetime.date | None = None) -> List[list]:
+    """Return calServer filters for expiring and for recently renewed calibrations."""
+
+    today = today or datetime.date.today()
+    ahead = (today + datetime.timedelta(days=window_days)).isoformat()
+    behind = (today - datetime.timedelta(days=window_days)).isoformat()
+    return [
+        [
+            {"property": "C2303", "value": today.isoformat(), "operator": ">="},
+            {"property": "C2303", "value": ahead, "operator": "<="},
+        ],
+        [{"property": "C2301", "value": behind, "operator": ">="}],
+    ]
+
+
+class PrerenderScheduler:
+    """Periodically warm the artifact caches with labels that will be needed.
+
+    Parameters
+    ----------
+    render_svg:
+        ``render_svg(template, name, expiry, qr_data)`` as used by the UI
+        preview; it stores the SVG in the preview cache.
+    renderer:
+        :class:`~app.render_service.RenderService` whose PNG/PDF results end
+        up in :data:`~app.artifacts.RENDER_CACHE`.
+    templates:
+        Label templates to pre-render.
+    window_days:
+        Days ahead (expiry) and back (calibration date) to consider.
+    interval:
+        Seconds between runs.
+    hours:
+        Off-peak ``(start, end)`` hours; runs stop when the window closes.
+    max_labels:
+        Upper bound of devices rendered per run, so the caches are not
+        flushed by a single run.
+    login:
+        calServer credentials; defaults to the ``CALSERVER_*`` variables.
+    """
+
+    def __init__(
+        self,
+        render_svg: Callable[[str, str, str, str], str],
+        renderer: Any,
+        templates: Iterable[str] = ("Standard",),
+        window_days: int = 14,
+        interval: float = 3600.0,
+        hours: Tuple[int, int] = (20, 6),
+        max_labels: int = 500,
+        login: Dict[str, str] | None = None,
+    ) -> None:
+        self.render_svg = render_svg
+        self.renderer = renderer
+        self.templates = list(templates)
+        self.window_days = window_days
+        self.interval = interval
+        self.hours = hours
+        self.max_labels = max_labels
+        self.login = login
+        self.last_run: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls, render_svg: Callable[[str, str, str, str], str], renderer: Any) -> "PrerenderScheduler | None":
+        """Create a scheduler from ``PRERENDER_*`` variables, or ``None`` if disabled."""
+
+        if os.getenv("PRERENDER", "").lower() not in ("1", "true", "yes", "on"):
+            return None
+        return cls(
+            render_svg,
+            renderer,
+            templates=[t.strip() for t in os.getenv("PRERENDER_TEMPLATES", "Standard").split(",") if t.strip()],
+            window_days=int(os.getenv("PRERENDER_WINDOW_DAYS", "14")),
+            interval=float(os.getenv("PRERENDER_INTERVAL", "3600")),
+            hours=parse_hours(os.getenv("PRERENDER_HOURS", "20-6")),
+            max_labels=int(os.getenv("PRERENDER_MAX_LABELS", "500")),
+        )
+
+    def due_rows(self) -> List[Dict[str, Any]]:
+        """Return the table rows of calibrations due or renewed in the window."""
+
+        login = self.login or service_credentials()
+        rows: Dict[str, Dict[str, Any]] = {}
+        for payload in due_filters(self.window_days):
+            for chunk in iter_calibration_data(
+                login["base_url"], login["username"], login["password"], login["api_key"], payload,
+                priority="background",
+            ):
+                for entry in chunk:
+                    row = row_from_entry(entry)
+                    rows.setdefault(row["MTAG"], row)
+                    if len(rows) >= self.max_labels:
+                        return list(rows.values())
+        return list(rows.values())
+
+    async def _prerender(self, row: Dict[str, Any], qr_data: str, template: str | None) -> bool:
+        """Render one label of ``row`` unless cached; return whether it rendered.
+
+        ``template=None`` stands for the raster label of the default print path.
+        """
+
+        name, expiry = row["I4201"], row["C2303"]
+        if template is None:
+            if bitmap_key(name, expiry, qr_data) in RENDER_CACHE:
+                return False
+            await self.renderer.bitmap_bytes(name, expiry, qr_data)
+            return True
+        svg = await asyncio.to_thread(self.render_svg, template, name, expiry, qr_data)
+        if all(render_key(fmt, svg) in RENDER_CACHE for fmt in FORMATS):
+            return False
+        await self.renderer.png_bytes(svg)
+        await self.renderer.pdf(svg)
+        return True
+
+    async def run_once(self) -> Dict[str, int]:
+        """Render all due labels not cached yet; return counts per outcome."""
+
+        login = self.login or service_credentials()
+        stats = {"devices": 0, "rendered": 0, "cached": 0, "failed": 0}
+        rows = await asyncio.to_thread(self.due_rows)
+        stats["devices"] = len(rows)
+        base_url = login["base_url"].rstrip("/")
+        for row in rows:
+            if not in_hours(self.hours):
+                logger.info("Off-peak window closed, pre-rendering paused")
+                break
+            qr_data = f"{base_url}/qrcode/{row['MTAG']}"
+            for template in (None, *self.templates):
+                try:
+                    stats["rendered" if await self._prerender(row, qr_data, template) else "cached"] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.warning("Pre-rendering %s (%s) failed: %s", row["MTAG"], template or "raster", e)
+        self.last_run = stats
+        logger.info(
+            "Pre-rendered %d label(s) of %d due device(s), %d already cached, %d failed",
+            stats["rendered"], stats["devices"], stats["cached"], stats["failed"],
+        )
+        return stats
+
+    async def run_forever(self) -> None:
+        """Run :meth:`run_once` every :attr:`interval` seconds inside the off-peak window."""
+
+        while True:
+            if in_hours(self.hours):
+                try:
+                    await self.run_once()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("Pre-rendering run failed: %s", e)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,73 @@
+"""Jinja2 label templates of the UI preview.
+
+The templates are compiled on first use, so jinja2 is only imported when a
+preview is rendered.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from .artifacts import qr_data_url
+from .metrics import TEMPLATE_SECONDS
+from .tracing import span
+
+PREVIEW_TEMPLATES = {
+    "Standard": """
+<svg width='400' height='200' xmlns='http://www.w3.org/2000/svg'>
+  <rect width='100%' height='100%' fill='white'/>
+  <text x='10' y='40' font-size='16'>I4201: {{ I4201 }}</text>
+  <text x='10' y='80' font-size='16'>C2303: {{ C2303 }}</text>
+  <g transform='translate(200,40) scale(0.5)'>
+    {{ QRCODE }}
+  </g>
+</svg>
+""",
+    "Modern": """
+<svg width='350' height='200' xmlns='http://www.w3.org/2000/svg'>
+  <rect width='100%' height='100%' fill='white'/>
+  <text x='175' y='40' font-size='20' text-anchor='middle'>{{ I4201 }}</text>
+  <text x='175' y='70' font-size='14' text-anchor='middle'>Ablauf: {{ C2303 }}</text>
+  <g transform='translate(125,90) scale(0.5)'>
+    {{ QRCODE }}
+  </g>
+</svg>
+""",
+}
+
+_compiled: Dict[str, Any] = {}
+
+
+def compiled_template(template: str) -> Any:
+    """Return the compiled :class:`jinja2.Template` of ``template``."""
+
+    if template not in _compiled:
+        import jinja2
+
+        _compiled[template] = jinja2.Template(PREVIEW_TEMPLATES[template])
+    return _compiled[template]
+
+
+def render_preview_template(template: str, name: str, expiry: str, qr_data: str) -> str:
+    """Return the body of preview ``template`` with a 200 px QR code of ``qr_data``.
+
+    The caller prepends the SVG header.
+    """
+
+    qr_png = qr_data_url(qr_data, size=200)
+    qr_elem = f"<image href='{qr_png}' width='200' height='200' />"
+    with TEMPLATE_SECONDS.time(template=template), span("template_render", template=template):
+        return compiled_template(template).render(I4201=name, C2303=expiry, MTAG=qr_data, QRCODE=qr_elem)
+
+
+def render_label_svg(template: str, name: str, expiry: str, qr_data: str) -> str:
+    """Return the complete SVG of a label as the UI shows and prints it.
+
+    Preview templates win over label templates of the same name.
+    """
+
+    from . import label_templates
+
+    if template in PREVIEW_TEMPLATES:
+        return label_templates.svg_header() + render_preview_template(template, name, expiry, qr_data)
+    return label_templates.render_label_template(template, name, expiry, qr_data)
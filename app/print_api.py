@@ -0,0 +1,121 @@
+"""JSON endpoints letting other systems (e.g. an MES) print labels.
+
+``POST /api/print`` queues a job and answers with its id::
+
+    {"mtags": ["4711", "4712"], "template": "Standard", "printer": "Etiketten"}
+
+Instead of ``mtags`` a list of ``labels`` with ``mtag`` and optional
+``name`` and ``expiry`` may be sent; labels without a name are looked up on
+calServer. ``GET /api/jobs/{id}`` returns the job state.
+
+The endpoints only exist when ``PRINT_API_TOKEN`` is set; requests must
+send it as ``Authorization: Bearer <token>`` or ``X-API-Key`` header.
+``CALSERVER_URL`` is required as well, it is the base of the QR code links.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import secrets
+from typing import Any, Dict, List, Tuple
+
+from .print_jobs import PrintJobManager
+
+logger = logging.getLogger(__name__)
+
+# Labels accepted per submission
+MAX_LABELS = int(os.getenv("PRINT_API_MAX_LABELS", "5000"))
+
+
+def parse_submission(payload: Any) -> Tuple[List[Dict[str, Any]], str, str]:
+    """Return ``(items, template, printer)`` of a print request body.
+
+    Raises :class:`ValueError` with a message for the client if the body is
+    malformed.
+    """
+
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    if "labels" in payload:
+        labels = payload["labels"]
+        if not isinstance(labels, list) or not all(isinstance(l, dict) for l in labels):
+            raise ValueError("'labels' must be a list of objects")
+        items = [
+            {"mtag": str(l.get("mtag") or ""), "name": l.get("name"), "expiry": l.get("expiry")}
+            for l in labels
+        ]
+    else:
+        mtags = payload.get("mtags")
+        if isinstance(mtags, str):
+            mtags = [mtags]
+        if not isinstance(mtags, list):
+            raise ValueError("'mtags' or 'labels' is required")
+        items = [{"mtag": str(m)} for m in mtags]
+    if not items:
+        raise ValueError("No labels to print")
+    if len(items) > MAX_LABELS:
+        raise ValueError(f"At most {MAX_LABELS} labels per request")
+    if any(not item["mtag"] for item in items):
+        raise ValueError("Every label needs an MTAG")
+    printer = payload.get("printer")
+    if not printer or not isinstance(printer, str):
+        raise ValueError("'printer' is required")
+    template = payload.get("template") or "Standard"
+    return items, str(template), printer
+
+
+def authorized(headers: Any, token: str | None) -> bool:
+    """Return whether ``headers`` carry ``token`` (always true without token)."""
+
+    if not token:
+        return True
+    sent = headers.get("x-api-key") or ""
+    auth = headers.get("authorization") or ""
+    if auth.lower().startswith("bearer "):
+        sent = auth[7:].strip()
+    return secrets.compare_digest(sent.encode(), token.encode())
+
+
+def register_print_api(app: Any, manager: PrintJobManager, token: str | None = None) -> bool:
+    """Add the print endpoints to the FastAPI/NiceGUI ``app``.
+
+    Returns ``False`` (and adds nothing) without a token or without the
+    calServer URL of ``manager``.
+    """
+
+    token = token if token is not None else os.getenv("PRINT_API_TOKEN")
+    if not token:
+        logger.info("Print API disabled, PRINT_API_TOKEN is not set")
+        return False
+    if not manager.base_url:
+        logger.error("Print API disabled, CALSERVER_URL is not set (needed for the QR code links)")
+        return False
+
+    from fastapi import Request
+    from fastapi.responses import JSONResponse
+
+    @app.post("/api/print")
+    async def submit_print_job(request: Request) -> Any:
+        if not authorized(request.headers, token):
+            return JSONResponse({"error": "unauthorized"}, status_code=401)
+        try:
+            items, template, printer = parse_submission(await request.json())
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        job = manager.submit(items, template, printer)
+        return JSONResponse(
+            {"job_id": job.id, "status": job.status, "total": job.total, "status_url": f"/api/jobs/{job.id}"},
+            status_code=202,
+        )
+
+    @app.get("/api/jobs/{job_id}")
+    async def print_job_status(job_id: str, request: Request) -> Any:
+        if not authorized(request.headers, token):
+            return JSONResponse({"error": "unauthorized"}, status_code=401)
+        job = manager.status(job_id)
+        if job is None:
+            return JSONResponse({"error": "unknown job"}, status_code=404)
+        return job
+
+    return True
@@ -0,0 +1,324 @@
+"""Print jobs submitted by other systems through the HTTP API.
+
+A job is a list of devices (MTAGs) to label with one template on one
+printer. Labels of all jobs go through a single queue; the dispatcher
+collects them for a short moment and sends up to ``batch_size`` labels per
+printer as one multi-page spool job, so a 500 label submission produces a
+handful of print jobs instead of 500. With a shared store the job states are
+published there, so ``/api/jobs/<id>`` answers on every worker process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from .calserver_api import iter_calibration_data
+from .mirror import get_mirror, mirror_source
+from .row_store import row_from_entry
+from .shared_store import get_store
+
+logger = logging.getLogger(__name__)
+
+# Labels per spool job and seconds to wait for more labels before printing
+BATCH_SIZE = int(os.getenv("PRINT_BATCH_SIZE", "50"))
+BATCH_WINDOW = float(os.getenv("PRINT_BATCH_WINDOW", "0.5"))
+
+# Finished jobs kept for status queries
+JOB_HISTORY = int(os.getenv("PRINT_JOB_HISTORY", "1000"))
+# Seconds job states stay queryable in the shared store
+JOB_TTL = float(os.getenv("PRINT_JOB_TTL", "86400"))
+
+# MTAGs per calServer lookup request
+LOOKUP_CHUNK = 100
+
+
+def service_credentials() -> Dict[str, str]:
+    """Return the calServer login used by the API from ``CALSERVER_*``."""
+
+    return {
+        "base_url": os.getenv("CALSERVER_URL", ""),
+        "username": os.getenv("CALSERVER_USERNAME", ""),
+        "password": os.getenv("CALSERVER_PASSWORD", ""),
+        "api_key": os.getenv("CALSERVER_API_KEY", ""),
+    }
+
+
+def lookup_devices(mtags: Iterable[str], login: Dict[str, str] | None = None) -> Dict[str, Dict[str, Any]]:
+    """Return the table rows of ``mtags`` keyed by MTAG.
+
+    If calServer cannot be reached the local mirror (see :mod:`app.mirror`)
+    answers instead.
+    """
+
+    login = login or service_credentials()
+    found: Dict[str, Dict[str, Any]] = {}
+    mtags = list(dict.fromkeys(mtags))
+    try:
+        for start in range(0, len(mtags), LOOKUP_CHUNK):
+            payload = [{"property": "MTAG", "value": mtags[start:start + LOOKUP_CHUNK], "operator": "in"}]
+            for chunk in iter_calibration_data(
+                login["base_url"], login["username"], login["password"], login["api_key"], payload
+            ):
+                for entry in chunk:
+                    row = row_from_entry(entry)
+                    found.setdefault(row["MTAG"], row)
+    except Exception as e:
+        mirror = get_mirror()
+        if mirror is None:
+            raise
+        logger.warning("calServer lookup failed, using the local mirror: %s", e)
+        for row in mirror.find(mirror_source(login["base_url"], login["username"], login["api_key"]), mtags):
+            found.setdefault(row["MTAG"], row)
+    return found
+
+
+class PrintJob:
+    """State of one API submission.
+
+    ``status`` is ``"queued"``, ``"printing"``, ``"done"`` (every label
+    printed) or ``"failed"`` (at least one label failed).
+    """
+
+    def __init__(self, items: List[Dict[str, Any]], template: str, printer: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.items = items
+        self.template = template
+        self.printer = printer
+        self.status = "queued"
+        self.printed = 0
+        self.errors: List[Dict[str, str]] = []
+        # Physical queues that received a spool job for this print job
+        self.queues: List[str] = []
+        self.created = time.time()
+        self.finished: float | None = None
+
+    @property
+    def total(self) -> int:
+        return len(self.items)
+
+    def _label_done(self, queue: str | None = None, error: Exception | None = None, mtag: str = "") -> None:
+        if error is None:
+            self.printed += 1
+            if queue and queue not in self.queues:
+                self.queues.append(queue)
+        else:
+            self.errors.append({"mtag": mtag, "error": str(error)})
+        if self.printed + len(self.errors) >= self.total:
+            self.status = "failed" if self.errors else "done"
+            self.finished = time.time()
+        else:
+            self.status = "printing"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "template": self.template,
+            "printer": self.printer,
+            "total": self.total,
+            "printed": self.printed,
+            "failed": len(self.errors),
+            "errors": self.errors,
+            "queues": self.queues,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+class PrintJobManager:
+    """Queue and batch labels of API print jobs.
+
+    Parameters
+    ----------
+    render_svg:
+        ``render_svg(template, name, expiry, qr_data)`` returning the label
+        SVG, the same function that renders the UI preview.
+    renderer:
+        :class:`~app.render_service.RenderService` converting SVG to PNG.
+    lookup:
+        ``lookup(mtags)`` returning table rows keyed by MTAG for items that
+        were submitted without name and expiry date.
+    base_url:
+        calServer URL used for the QR code link.
+    store:
+        Optional :class:`~app.shared_store.SharedStore` receiving the job
+        states; defaults to the one configured in ``SHARED_STORE``.
+    """
+
+    def __init__(
+        self,
+        render_svg: Callable[[str, str, str, str], str],
+        renderer: Any,
+        lookup: Callable[[List[str]], Dict[str, Dict[str, Any]]] = lookup_devices,
+        base_url: str | None = None,
+        batch_size: int = BATCH_SIZE,
+        batch_window: float = BATCH_WINDOW,
+        history: int = JOB_HISTORY,
+        store: Any = None,
+    ) -> None:
+        self.render_svg = render_svg
+        self.renderer = renderer
+        self.lookup = lookup
+        self.base_url = base_url if base_url is not None else service_credentials()["base_url"]
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self.history = history
+        self.store = store if store is not None else get_store()
+        self.jobs: "collections.OrderedDict[str, PrintJob]" = collections.OrderedDict()
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the dispatcher on the running event loop."""
+
+        if self._task is None or self._task.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the dispatcher; queued labels are not printed."""
+
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def submit(self, items: List[Dict[str, Any]], template: str, printer: str) -> PrintJob:
+        """Queue a job; ``items`` are dicts with ``mtag`` and optional ``name``/``expiry``."""
+
+        if not items:
+            raise ValueError("No labels to print")
+        if not printer:
+            raise ValueError("No printer given")
+        for item in items:
+            if not item.get("mtag"):
+                raise ValueError("Every label needs an MTAG")
+        self.start()
+        job = PrintJob(items, template, printer)
+        self.jobs[job.id] = job
+        self._trim()
+        for item in items:
+            self._queue.put_nowait((job, item))
+        self._publish([job])
+        logger.info("Print job %s queued: %d label(s) on %s", job.id, job.total, printer)
+        return job
+
+    def get(self, job_id: str) -> PrintJob | None:
+        return self.jobs.get(job_id)
+
+    def status(self, job_id: str) -> Dict[str, Any] | None:
+        """Return :meth:`PrintJob.to_dict` of a job of any worker, ``None`` if unknown."""
+
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.store is None:
+            return None
+        try:
+            raw = self.store.get(f"job:{job_id}")
+        except Exception as e:
+            logger.warning("Reading print job %s failed: %s", job_id, e)
+            return None
+        return json.loads(raw) if raw else None
+
+    def _publish(self, jobs: Iterable[PrintJob]) -> None:
+        if self.store is None:
+            return
+        for job in {job.id: job for job in jobs}.values():
+            try:
+                self.store.set(f"job:{job.id}", json.dumps(job.to_dict()).encode("utf-8"), JOB_TTL)
+            except Exception as e:
+                logger.warning("Publishing print job %s failed: %s", job.id, e)
+
+    def _trim(self) -> None:
+        while len(self.jobs) > self.history:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.finished is None:
+                break
+            self.jobs.popitem(last=False)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            batch.sort(key=lambda entry: entry[0].printer)
+            for printer, group in itertools.groupby(batch, key=lambda entry: entry[0].printer):
+                labels = list(group)
+                try:
+                    await self._print_batch(printer, labels)
+                except Exception:  # pragma: no cover - _print_batch reports per label
+                    logger.exception("Print batch for %s failed", printer)
+                self._publish(job for job, _ in labels)
+
+    async def _print_batch(self, printer: str, labels: List[Tuple[PrintJob, Dict[str, Any]]]) -> None:
+        from .print_utils import print_images
+
+        missing = [item["mtag"] for _, item in labels if not item.get("name")]
+        rows: Dict[str, Dict[str, Any]] = {}
+        if missing:
+            try:
+                rows = await asyncio.to_thread(self.lookup, missing)
+            except Exception as e:
+                logger.warning("Looking up %d MTAG(s) failed: %s", len(missing), e)
+
+        # Stay within the render queue bound instead of waiting for slots
+        slots = asyncio.Semaphore(getattr(self.renderer, "max_pending", 4))
+
+        async def render(job: PrintJob, item: Dict[str, Any]):
+            row = rows.get(item["mtag"], {})
+            name = item.get("name") or row.get("I4201")
+            if not name:
+                raise LookupError(f"Unknown MTAG {item['mtag']}")
+            expiry = item.get("expiry") or row.get("C2303") or "-"
+            qr_data = f"{self.base_url.rstrip('/')}/qrcode/{item['mtag']}"
+            svg = await asyncio.to_thread(self.render_svg, job.template, name, expiry, qr_data)
+            async with slots:
+                return await self.renderer.png(svg)
+
+        for job, _ in labels:
+            if job.status == "queued":
+                job.status = "printing"
+        results = await asyncio.gather(*(render(job, item) for job, item in labels), return_exceptions=True)
+        pages = []
+        for (job, item), result in zip(labels, results):
+            if isinstance(result, Exception):
+                job._label_done(error=result, mtag=item["mtag"])
+            else:
+                pages.append(((job, item), result))
+        if not pages:
+            return
+        try:
+            queue = await asyncio.to_thread(print_images, [image for _, image in pages], printer)
+        except Exception as e:
+            logger.error("Spooling %d label(s) on %s failed: %s", len(pages), printer, e)
+            for (job, item), _ in pages:
+                job._label_done(error=e, mtag=item["mtag"])
+            return
+        logger.info("Spooled %d label(s) on %s as one job", len(pages), queue)
+        for (job, _), _ in pages:
+            job._label_done(queue=queue)
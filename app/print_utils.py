@@ -1,11 +1,31 @@
-"""Helpers for listing printers and printing images across platforms."""
+"""Helpers for listing printers and printing images across platforms.
 
+Besides the Windows and CUPS queues, printers can be provided by
+:class:`PrinterBackend` objects registered with
+:func:`register_printer_backend` or configured in ``PRINTER_BACKENDS``.
+The built-in :class:`VirtualPrinter` writes every job to a directory (or
+discards it) and records its size and duration, so label throughput can be
+measured on machines without a real printer.
+"""
+
+import abc
+import importlib
+import io
+import itertools
+import json
+import logging
 import os
 import platform
+import shutil
 import tempfile
-from typing import List
+import threading
+import time
+from typing import Any, Callable, Dict, List, Type
 from PIL import Image
 
+from .metrics import PRINT_JOBS, SPOOL_SECONDS
+from .tracing import span
+
 
 win32print = None
 cups = None
@@ -24,29 +44,413 @@ elif platform.system() in ("Linux", "Darwin"):
         cups = None
 
 
+logger = logging.getLogger(__name__)
+
+# Windows ``PRINTER_INFO_2.Status`` flags that make a queue unusable.
+_WIN_STATUS_PAUSED = 0x00000001
+_WIN_STATUS_ERROR = 0x00000002
+_WIN_STATUS_UNAVAILABLE = (
+    0x00000008  # paper jam
+    | 0x00000010  # paper out
+    | 0x00000040  # paper problem
+    | 0x00000080  # offline
+    | 0x00040000  # out of memory / toner
+    | 0x00400000  # door open
+    | 0x00000800  # not available
+    | 0x00100000  # user intervention
+)
+
+# CUPS ``printer-state`` values
+_CUPS_IDLE = 3
+_CUPS_PROCESSING = 4
+_CUPS_STOPPED = 5
+
+STRATEGIES = ("least_queued", "round_robin")
+
+# Seconds a group member is skipped after a failed job
+FAILURE_COOLDOWN = 60.0
+
+
+class PrinterGroup:
+    """A logical printer name that dispatches to several identical queues.
+
+    Parameters
+    ----------
+    name:
+        Logical name shown in the printer selection.
+    members:
+        Names of the physical CUPS/Windows queues belonging to the group.
+    strategy:
+        ``"least_queued"`` (default) sends each job to the healthy member with
+        the fewest pending jobs, ``"round_robin"`` cycles through the healthy
+        members.
+    """
+
+    def __init__(self, name: str, members: List[str], strategy: str = "least_queued") -> None:
+        if not members:
+            raise ValueError(f"Printer group {name!r} has no members")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown dispatch strategy: {strategy}")
+        self.name = name
+        self.members = list(dict.fromkeys(members))
+        self.strategy = strategy
+        self._counter = itertools.count()
+        self._failed_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark_failed(self, member: str) -> None:
+        """Skip ``member`` for :data:`FAILURE_COOLDOWN` seconds."""
+
+        with self._lock:
+            self._failed_until[member] = time.monotonic() + FAILURE_COOLDOWN
+
+    def candidates(self) -> List[str]:
+        """Return the healthy members in the order they should be tried."""
+
+        now = time.monotonic()
+        with self._lock:
+            cooling = {m for m, until in self._failed_until.items() if until > now}
+        status = {m: printer_status(m) for m in self.members if m not in cooling}
+        healthy = [m for m in status if status[m]["state"] in ("idle", "busy", "unknown")]
+        if not healthy:
+            return []
+        with self._lock:
+            offset = next(self._counter) % len(healthy)
+        healthy = healthy[offset:] + healthy[:offset]
+        if self.strategy == "least_queued":
+            # ``sorted`` is stable, so members with equal queues keep the
+            # rotated order and the load is still spread between them.
+            healthy.sort(key=lambda m: status[m]["jobs"])
+        return healthy
+
+
+PRINTER_GROUPS: Dict[str, PrinterGroup] = {}
+
+
+def register_printer_group(name: str, members: List[str], strategy: str = "least_queued") -> PrinterGroup:
+    """Register ``members`` under the logical printer ``name``."""
+
+    group = PrinterGroup(name, members, strategy)
+    PRINTER_GROUPS[name] = group
+    return group
+
+
+def load_printer_groups(config: Dict[str, Any] | str | None) -> None:
+    """Register printer groups from a mapping or its JSON representation.
+
+    The configuration maps group names either to a list of queue names or to a
+    dict with ``members`` and an optional ``strategy``::
+
+        {"Etiketten": {"members": ["Zebra-1", "Zebra-2"], "strategy": "round_robin"}}
+    """
+
+    if not config:
+        return
+    if isinstance(config, str):
+        config = json.loads(config)
+    for name, spec in config.items():
+        if isinstance(spec, dict):
+            register_printer_group(name, spec.get("members") or [], spec.get("strategy", "least_queued"))
+        else:
+            register_printer_group(name, list(spec))
+
+
+try:
+    load_printer_groups(os.getenv("PRINTER_GROUPS"))
+except (ValueError, AttributeError, TypeError) as exc:  # pragma: no cover - bad configuration
+    logger.warning("Ignoring invalid PRINTER_GROUPS configuration: %s", exc)
+
+
+class PrinterBackend(abc.ABC):
+    """A printer not served by the platform spooler.
+
+    Subclasses implement :meth:`print_image` and :meth:`print_file`; the
+    ``name`` is listed next to the physical printers and may be a member
+    of a :class:`PrinterGroup`.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def status(self) -> Dict[str, Any]:
+        """Return ``{"state", "jobs"}`` like :func:`printer_status`."""
+
+        return {"state": "unknown", "jobs": 0}
+
+    @abc.abstractmethod
+    def print_image(self, image: Image.Image) -> None:
+        """Print ``image``."""
+
+    @abc.abstractmethod
+    def print_file(self, file_path: str) -> None:
+        """Print the PDF or image file at ``file_path``."""
+
+
+class VirtualPrinter(PrinterBackend):
+    """Printer that stores or discards jobs and records what was sent.
+
+    Parameters
+    ----------
+    name:
+        Printer name shown in the selection.
+    directory:
+        Where every job is written, with one line per job appended to
+        ``jobs.jsonl``; ``None`` discards the jobs.
+    latency:
+        Seconds each job takes, to imitate a real device.
+    """
+
+    def __init__(self, name: str, directory: str | None = None, latency: float = 0.0) -> None:
+        super().__init__(name)
+        self.directory = directory
+        self.latency = latency
+        self.jobs = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self._pending = 0
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._pending
+        return {"state": "busy" if pending else "idle", "jobs": pending}
+
+    def stats(self) -> Dict[str, Any]:
+        """Return jobs, bytes and seconds spent since the printer was created."""
+
+        with self._lock:
+            return {"jobs": self.jobs, "bytes": self.bytes, "seconds": self.seconds}
+
+    def _record(self, write: Callable[[str | None], int], ext: str) -> None:
+        start = time.perf_counter()
+        with self._lock:
+            self._pending += 1
+            seq = next(self._sequence)
+        try:
+            path = None
+            if self.directory:
+                stamp = time.strftime("%Y%m%d-%H%M%S")
+                path = os.path.join(self.directory, f"{stamp}-{seq:06d}.{ext}")
+            size = write(path)
+            if self.latency:
+                time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self._pending -= 1
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self.jobs += 1
+            self.bytes += size
+            self.seconds += seconds
+        if path:
+            entry = {"file": os.path.basename(path), "bytes": size, "seconds": round(seconds, 6), "time": time.time()}
+            with self._lock, open(os.path.join(self.directory, "jobs.jsonl"), "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(entry) + "\n")
+        logger.debug("Virtual printer %s received %d bytes in %.3f s", self.name, size, seconds)
+
+    def print_image(self, image: Image.Image) -> None:
+        def write(path: str | None) -> int:
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+            data = buffer.getvalue()
+            if path:
+                with open(path, "wb") as fh:
+                    fh.write(data)
+            return len(data)
+
+        self._record(write, "png")
+
+    def print_file(self, file_path: str) -> None:
+        def write(path: str | None) -> int:
+            if path:
+                shutil.copyfile(file_path, path)
+            return os.path.getsize(file_path)
+
+        self._record(write, os.path.splitext(file_path)[1].lstrip(".") or "bin")
+
+
+PRINTER_BACKENDS: Dict[str, PrinterBackend] = {}
+
+# Backend types available in ``PRINTER_BACKENDS``; other types are given
+# as ``"package.module:Class"``.
+BACKEND_TYPES: Dict[str, Type[PrinterBackend]] = {"virtual": VirtualPrinter}
+
+
+def register_printer_backend(backend: PrinterBackend) -> PrinterBackend:
+    """Make ``backend`` available under its name."""
+
+    PRINTER_BACKENDS[backend.name] = backend
+    return backend
+
+
+def load_printer_backends(config: Dict[str, Any] | str | None) -> None:
+    """Register printer backends from a mapping or its JSON representation.
+
+    The configuration maps printer names to the backend ``type`` and its
+    keyword arguments::
+
+        {"Virtual": {"type": "virtual", "directory": "spool"}, "Null": {"type": "virtual"}}
+    """
+
+    if not config:
+        return
+    if isinstance(config, str):
+        config = json.loads(config)
+    for name, spec in config.items():
+        spec = dict(spec or {})
+        kind = spec.pop("type", "virtual")
+        cls = BACKEND_TYPES.get(kind)
+        if cls is None:
+            module, _, attr = kind.partition(":")
+            cls = getattr(importlib.import_module(module), attr)
+        register_printer_backend(cls(name, **spec))
+
+
+try:
+    load_printer_backends(os.getenv("PRINTER_BACKENDS"))
+except (ValueError, AttributeError, TypeError, ImportError, OSError) as exc:  # pragma: no cover - bad configuration
+    logger.warning("Ignoring invalid PRINTER_BACKENDS configuration: %s", exc)
+
+
+def printer_status(printer_name: str) -> Dict[str, Any]:
+    """Return the state and number of pending jobs of a physical printer.
+
+    ``state`` is one of ``"idle"``, ``"busy"``, ``"paused"``, ``"error"`` or
+    ``"unknown"`` (when the platform offers no status information).
+    """
+
+    backend = PRINTER_BACKENDS.get(printer_name)
+    if backend is not None:
+        return backend.status()
+    try:
+        if platform.system() == "Windows" and win32print:
+            handle = win32print.OpenPrinter(printer_name)
+            try:
+                info = win32print.GetPrinter(handle, 2)
+            finally:
+                win32print.ClosePrinter(handle)
+            flags = info.get("Status", 0)
+            jobs = info.get("cJobs", 0)
+            if flags & _WIN_STATUS_PAUSED:
+                state = "paused"
+            elif flags & (_WIN_STATUS_ERROR | _WIN_STATUS_UNAVAILABLE):
+                state = "error"
+            else:
+                state = "busy" if jobs else "idle"
+            return {"state": state, "jobs": jobs}
+        if platform.system() in ("Linux", "Darwin") and cups:
+            conn = cups.Connection()
+            attrs = conn.getPrinters().get(printer_name)
+            if attrs is None:
+                return {"state": "error", "jobs": 0}
+            jobs = conn.getJobs(which_jobs="not-completed", requested_attributes=["job-printer-uri"])
+            queued = sum(
+                1 for job in jobs.values()
+                if str(job.get("job-printer-uri", "")).rstrip("/").endswith(f"/{printer_name}")
+            )
+            reasons = [r for r in attrs.get("printer-state-reasons", []) if r != "none"]
+            if attrs.get("printer-state") == _CUPS_STOPPED or not attrs.get("printer-is-accepting-jobs", True):
+                state = "paused"
+            elif any(r.endswith("-error") for r in reasons):
+                state = "error"
+            else:
+                state = "busy" if queued or attrs.get("printer-state") == _CUPS_PROCESSING else "idle"
+            return {"state": state, "jobs": queued}
+    except Exception as exc:
+        logger.warning("Could not query printer %s: %s", printer_name, exc)
+        return {"state": "error", "jobs": 0}
+    return {"state": "unknown", "jobs": 0}
+
+
+def _timed_send(send: Callable[[str], None], printer_name: str) -> None:
+    start = time.perf_counter()
+    try:
+        send(printer_name)
+    except Exception:
+        PRINT_JOBS.inc(printer=printer_name, result="error")
+        raise
+    SPOOL_SECONDS.observe(time.perf_counter() - start, printer=printer_name)
+    PRINT_JOBS.inc(printer=printer_name, result="ok")
+
+
+def _dispatch(printer_name: str, send: Callable[[str], None]) -> str:
+    """Call ``send`` with the queue that should receive a job.
+
+    Plain printer names are used as is. For printer groups the healthy
+    members are tried in dispatch order until one accepts the job.
+    """
+
+    group = PRINTER_GROUPS.get(printer_name)
+    if group is None:
+        _timed_send(send, printer_name)
+        return printer_name
+    candidates = group.candidates()
+    if not candidates:
+        raise RuntimeError(f"No printer of group {printer_name!r} is ready")
+    last_error: Exception | None = None
+    for member in candidates:
+        try:
+            _timed_send(send, member)
+            return member
+        except Exception as exc:
+            logger.warning("Printer %s of group %s failed: %s", member, printer_name, exc)
+            group.mark_failed(member)
+            last_error = exc
+    raise RuntimeError(f"All printers of group {printer_name!r} failed: {last_error}")
+
+
 def list_printers() -> List[str]:
-    """Return a list of available printer names."""
-
-    if platform.system() == "Windows":
-        if not win32print:
-            raise RuntimeError("win32print is required on Windows")
-        return [p[2] for p in win32print.EnumPrinters(2)]
-    elif platform.system() in ("Linux", "Darwin"):
-        if not cups:
-            raise RuntimeError("cups is required on this platform")
-        conn = cups.Connection()
-        return list(conn.getPrinters().keys())
-    return []
+    """Return a list of available printer names.
+
+    Registered printer groups are listed first, followed by the printer
+    backends and the physical printers. A missing platform library only
+    raises when no backend is registered.
+    """
+
+    try:
+        if platform.system() == "Windows":
+            if not win32print:
+                raise RuntimeError("win32print is required on Windows")
+            printers = [p[2] for p in win32print.EnumPrinters(2)]
+        elif platform.system() in ("Linux", "Darwin"):
+            if not cups:
+                raise RuntimeError("cups is required on this platform")
+            conn = cups.Connection()
+            printers = list(conn.getPrinters().keys())
+        else:
+            printers = []
+    except RuntimeError as exc:
+        if not PRINTER_BACKENDS:
+            raise
+        logger.debug("Only printer backends are available: %s", exc)
+        printers = []
+    return list(PRINTER_GROUPS) + list(PRINTER_BACKENDS) + [p for p in printers if p not in PRINTER_BACKENDS]
 
 
-def print_label(image: Image.Image, printer_name: str) -> None:
+def print_label(image: Image.Image, printer_name: str) -> str:
     """Send the given image to ``printer_name``.
 
-    The implementation handles Windows and CUPS based systems. For other
-    platforms a ``RuntimeError`` is raised.
+    The implementation handles printer backends, Windows and CUPS based
+    systems. For other platforms a ``RuntimeError`` is raised. ``printer_name`` may also be a
+    printer group; the name of the queue that received the job is returned.
     """
 
-    if platform.system() == 'Windows' and win32print:
+    with span("print_label", printer=printer_name) as traced:
+        queue = _dispatch(printer_name, lambda member: _spool_image(image, member))
+        traced.set(queue=queue)
+    return queue
+
+
+def _spool_image(image: Image.Image, printer_name: str) -> None:
+    """Spool ``image`` on a single physical printer or backend."""
+
+    backend = PRINTER_BACKENDS.get(printer_name)
+    if backend is not None:
+        backend.print_image(image)
+    elif platform.system() == 'Windows' and win32print:
         with tempfile.NamedTemporaryFile(delete=False, suffix='.bmp') as tmp:
             tmp_path = tmp.name
         image.save(tmp_path)
@@ -77,15 +481,53 @@ def print_label(image: Image.Image, printer_name: str) -> None:
         raise RuntimeError("Unsupported OS or printing not configured")
 
 
-def print_file(file_path: str, printer_name: str) -> None:
+def print_images(images: List[Image.Image], printer_name: str) -> str:
+    """Send ``images`` to ``printer_name`` as one multi-page spool job.
+
+    The images become the pages of a single PDF, so a batch of labels costs
+    one job on the print queue instead of one per label. Returns the name of
+    the queue that received the job.
+    """
+
+    if not images:
+        raise ValueError("No images to print")
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
+        tmp_path = tmp.name
+    try:
+        pages = [img.convert('RGB') if getattr(img, 'mode', 'RGB') != 'RGB' else img for img in images]
+        with span("pdf_pages", pages=len(pages)):
+            pages[0].save(tmp_path, 'PDF', save_all=True, append_images=pages[1:])
+        return print_file(tmp_path, printer_name)
+    finally:
+        os.unlink(tmp_path)
+
+
+def print_file(file_path: str, printer_name: str) -> str:
     """Send the given file to ``printer_name``.
 
     This function prints arbitrary files like PDFs using platform specific
     methods. On CUPS based systems :func:`cups.Connection.printFile` is used.
     On Windows the file is sent directly to the printer using ``win32print``.
+    Printer groups are resolved like in :func:`print_label`.
     """
 
-    if platform.system() == 'Windows' and win32print:
+    with span("print_file", printer=printer_name) as traced:
+        try:
+            traced.set(bytes=os.path.getsize(file_path))
+        except OSError:
+            pass
+        queue = _dispatch(printer_name, lambda member: _spool_file(file_path, member))
+        traced.set(queue=queue)
+    return queue
+
+
+def _spool_file(file_path: str, printer_name: str) -> None:
+    """Spool ``file_path`` on a single physical printer or backend."""
+
+    backend = PRINTER_BACKENDS.get(printer_name)
+    if backend is not None:
+        backend.print_file(file_path)
+    elif platform.system() == 'Windows' and win32print:
         with open(file_path, 'rb') as f:
             data = f.read()
         hPrinter = win32print.OpenPrinter(printer_name)
@@ -0,0 +1,341 @@
+"""On-demand profiling of selected UI actions and of time windows.
+
+Actions wrapped with :func:`profiled` are profiled when they are switched
+on with the ``PROFILE`` environment variable (``"fetch_data,do_print"`` or
+``"all"``), ``launcher.py --profile`` or the admin endpoint. Every profiled
+call writes one file to ``PROFILE_DIR``; only the newest ``PROFILE_KEEP``
+files are kept.
+
+Two profilers are available (``PROFILE_MODE``):
+
+``cprofile``
+    Deterministic, written as ``.pstats`` (``python -m pstats`` or
+    snakeviz). As cProfile is process wide, one action is profiled at a
+    time; calls overlapping a running profile are skipped.
+``sample``
+    Samples the stack of the calling thread every ``PROFILE_INTERVAL``
+    seconds and writes speedscope JSON (https://www.speedscope.app). Time
+    windows always use this profiler.
+
+A coroutine is profiled from its start to its end. While it awaits, the
+event loop runs other tasks on the same thread, so the profile of an async
+action also contains whatever other sessions did in the meantime. Work the
+action hands to ``asyncio.to_thread`` is not in the profile at all.
+
+When nothing is switched on a wrapped call costs one set lookup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+ACTIONS = ("fetch_data", "update_label", "do_print")
+MODES = ("cprofile", "sample")
+
+
+class _Sampler:
+    """Collect stacks of one thread from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: List[List[tuple]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self.started = self.stopped = 0.0
+
+    def start(self) -> "_Sampler":
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.stopped = time.perf_counter()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            self.samples.append(stack[::-1])
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """Return the samples as speedscope "sampled" profile."""
+
+        frames: List[Dict[str, Any]] = []
+        index: Dict[tuple, int] = {}
+        samples = []
+        for stack in self.samples:
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                ids.append(index[frame])
+            samples.append(ids)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.stopped - self.started,
+                "samples": samples,
+                "weights": [self.interval] * len(samples),
+            }],
+            "name": name,
+            "exporter": "calserver-print",
+        }
+
+
+class Profiler:
+    """Switchable profiler writing one file per profiled action.
+
+    Parameters
+    ----------
+    directory:
+        Where profiles are written.
+    keep:
+        Number of newest profile files kept; older ones are deleted.
+    mode:
+        ``"cprofile"`` or ``"sample"``.
+    interval:
+        Seconds between stack samples in ``"sample"`` mode.
+    """
+
+    def __init__(self, directory: str = "profiles", keep: int = 50, mode: str = "cprofile", interval: float = 0.005) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.directory = directory
+        self.keep = keep
+        self.mode = mode
+        self.interval = interval
+        self.enabled: Set[str] = set()
+        self._busy = threading.Lock()
+        self.window_until = 0.0
+
+    @staticmethod
+    def _expand(actions: str | List[str]) -> Set[str]:
+        if isinstance(actions, str):
+            actions = [a.strip() for a in actions.split(",") if a.strip()]
+        expanded: Set[str] = set()
+        for action in actions:
+            expanded.update(ACTIONS if action == "all" else (action,))
+        return expanded
+
+    def enable(self, actions: str | List[str]) -> None:
+        """Switch profiling on for ``actions`` (``"all"`` for every action)."""
+
+        self.enabled |= self._expand(actions)
+
+    def disable(self, actions: str | List[str] | None = None) -> None:
+        """Switch profiling off for ``actions`` or completely."""
+
+        if actions is None:
+            self.enabled.clear()
+        else:
+            self.enabled -= self._expand(actions)
+
+    def _path(self, name: str, seconds: float, ext: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{now % 1:.3f}"[1:]
+        return os.path.join(self.directory, f"{stamp}-{name}-{seconds * 1000:.0f}ms.{ext}")
+
+    def _rotate(self) -> None:
+        files = [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith((".pstats", ".json"))]
+        files.sort(key=os.path.getmtime)
+        for path in files[:-self.keep] if self.keep > 0 else []:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _begin(self, name: str) -> Any:
+        if not self._busy.acquire(blocking=False):
+            logger.debug("Profile of %s skipped, another profile is running", name)
+            return None
+        if self.mode == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            return profile, time.perf_counter()
+        return _Sampler(threading.get_ident(), self.interval).start(), time.perf_counter()
+
+    def _end(self, name: str, state: Any) -> str | None:
+        profiler, started = state
+        try:
+            if isinstance(profiler, cProfile.Profile):
+                profiler.disable()
+                path = self._path(name, time.perf_counter() - started, "pstats")
+                profiler.dump_stats(path)
+            else:
+                profiler.stop()
+                path = self._path(name, time.perf_counter() - started, "json")
+                with open(path, "w", encoding="utf-8") as fh:
+                    json.dump(profiler.speedscope(name), fh)
+            self._rotate()
+            logger.info("Profile of %s written to %s", name, path)
+            return path
+        except OSError as e:
+            logger.warning("Writing the profile of %s failed: %s", name, e)
+            return None
+        finally:
+            self._busy.release()
+
+    def wrap(self, action: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Return ``func`` profiled whenever ``action`` is enabled.
+
+        For coroutine functions the profile also covers the other tasks the
+        event loop runs while ``func`` awaits (see the module docstring).
+        """
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if action not in self.enabled:
+                    return await func(*args, **kwargs)
+                state = self._begin(action)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    if state is not None:
+                        self._end(action, state)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if action not in self.enabled:
+                return func(*args, **kwargs)
+            state = self._begin(action)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if state is not None:
+                    self._end(action, state)
+
+        return wrapper
+
+    def profile_window(self, seconds: float, thread_id: int | None = None) -> threading.Thread:
+        """Sample ``thread_id`` (default: calling thread) for ``seconds`` in the background."""
+
+        thread_id = thread_id or threading.get_ident()
+        self.window_until = time.time() + seconds
+
+        def run() -> None:
+            if not self._busy.acquire(timeout=seconds):
+                logger.warning("Profile window skipped, another profile is running")
+                return
+            sampler = _Sampler(thread_id, self.interval).start()
+            time.sleep(seconds)
+            self._end("window", (sampler, sampler.started))
+
+        thread = threading.Thread(target=run, name="profile-window", daemon=True)
+        thread.start()
+        return thread
+
+    def files(self) -> List[str]:
+        """Return the names of the stored profiles, newest first."""
+
+        if not os.path.isdir(self.directory):
+            return []
+        files = [f for f in os.listdir(self.directory) if f.endswith((".pstats", ".json"))]
+        return sorted(files, key=lambda f: os.path.getmtime(os.path.join(self.directory, f)), reverse=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": sorted(self.enabled),
+            "mode": self.mode,
+            "directory": os.path.abspath(self.directory),
+            "window_active": time.time() < self.window_until,
+            "files": self.files(),
+        }
+
+
+def _mode_from_env() -> str:
+    mode = os.getenv("PROFILE_MODE", "cprofile")
+    if mode not in MODES:
+        logger.warning("Unknown PROFILE_MODE %r, using cprofile", mode)
+        return "cprofile"
+    return mode
+
+
+PROFILER = Profiler(
+    directory=os.getenv("PROFILE_DIR", "profiles"),
+    keep=int(os.getenv("PROFILE_KEEP", "50")),
+    mode=_mode_from_env(),
+    interval=float(os.getenv("PROFILE_INTERVAL", "0.005")),
+)
+PROFILER.enable(os.getenv("PROFILE", ""))
+
+
+def profiled(action: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator profiling the function as ``action`` with :data:`PROFILER`."""
+
+    return lambda func: PROFILER.wrap(action, func)
+
+
+def register_profile_endpoint(app: Any, token: str | None = None) -> None:
+    """Add ``/admin/profile`` to the FastAPI/NiceGUI ``app``.
+
+    The endpoint is only added when ``PROFILE_ADMIN_TOKEN`` (or ``token``) is
+    set; requests must send it like the print API token.
+    """
+
+    token = token if token is not None else os.getenv("PROFILE_ADMIN_TOKEN")
+    if not token:
+        return
+
+    from fastapi import Request
+    from fastapi.responses import JSONResponse
+
+    from .print_api import authorized
+
+    @app.get("/admin/profile")
+    async def profile_status(request: Request) -> Any:
+        if not authorized(request.headers, token):
+            return JSONResponse({"error": "unauthorized"}, status_code=401)
+        return PROFILER.status()
+
+    @app.post("/admin/profile")
+    async def profile_control(request: Request) -> Any:
+        """Body: ``{"enable": "do_print"}``, ``{"disable": "all"}`` or ``{"window": 30}``."""
+
+        if not authorized(request.headers, token):
+            return JSONResponse({"error": "unauthorized"}, status_code=401)
+        try:
+            body = await request.json()
+        except ValueError:
+            body = {}
+        if not isinstance(body, dict):
+            return JSONResponse({"error": "Request body must be a JSON object"}, status_code=400)
+        if body.get("enable"):
+            PROFILER.enable(body["enable"])
+        if body.get("disable"):
+            PROFILER.disable(body["disable"])
+        if body.get("window"):
+            try:
+                seconds = min(float(body["window"]), 600.0)
+            except (TypeError, ValueError):
+                return JSONResponse({"error": "'window' must be a number of seconds"}, status_code=400)
+            # the handler runs on the event loop thread, which is what gets sampled
+            PROFILER.profile_window(seconds, threading.get_ident())
+        return PROFILER.status()
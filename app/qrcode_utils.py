@@ -6,6 +6,9 @@ from PIL import Image
 import io
 import base64
 
+from .metrics import QR_SECONDS
+from .tracing import span
+
 
 def generate_qr_code(data: str, size: int = 200) -> Image.Image:
     """Return a QR code image containing ``data``.
@@ -24,11 +27,12 @@ def generate_qr_code(data: str, size: int = 200) -> Image.Image:
         An image object containing the QR code.
     """
 
-    qr = qrcode.QRCode(box_size=10, border=2)
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    return img.resize((size, size))
+    with QR_SECONDS.time(), span("qr_generate", size=size):
+        qr = qrcode.QRCode(box_size=10, border=2)
+        qr.add_data(data)
+        qr.make(fit=True)
+        img = qr.make_image(fill_color="black", back_color="white")
+        return img.resize((size, size))
 
 
 def generate_qr_code_svg(data: str) -> str:
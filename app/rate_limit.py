@@ -0,0 +1,253 @@
+"""Process-wide adaptive limiter for calServer requests.
+
+Every request to a calServer instance passes its :class:`RateLimiter`
+(one per host, see :func:`get_limiter`):
+
+* a token bucket caps the request rate (``CALSERVER_RATE`` per second,
+  bursts of ``CALSERVER_BURST``),
+* at most ``limit`` requests run at once. The limit follows AIMD: it grows
+  by one per ``limit`` fast, successful responses and is halved (at most
+  once per ``cooldown``) on errors, HTTP 429/5xx or responses slower than
+  ``CALSERVER_TARGET_LATENCY``,
+* ``Retry-After`` (or a short pause on 429/503 without it) holds back all
+  requests to that host,
+* waiting requests are served by priority: ``"interactive"`` (an operator
+  waits) before ``"background"`` (refresh, pre-rendering). Background
+  requests only use up to ``background_share`` of the concurrency limit,
+  so a free slot is left for the next operator.
+
+Requests are synchronous (``requests`` in worker threads), so the limiter
+blocks threads, never the event loop.
+"""
+
+from __future__ import annotations
+
+import email.utils
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+from urllib.parse import urlsplit
+
+PRIORITIES = {"interactive": 0, "background": 1}
+
+# Upper bound for honoured ``Retry-After`` values
+MAX_RETRY_AFTER = 300.0
+
+
+class CalServerBusy(RuntimeError):
+    """Raised when a request waited longer than allowed for the limiter."""
+
+
+def parse_retry_after(value: Any, now: float | None = None) -> float | None:
+    """Return the seconds of a ``Retry-After`` header (delay or HTTP date)."""
+
+    if value in (None, ""):
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class RateLimiter:
+    """Token bucket plus adaptive concurrency cap for one calServer.
+
+    Parameters
+    ----------
+    rate:
+        Requests per second refilled into the bucket; ``0`` disables it.
+    burst:
+        Bucket size, i.e. requests allowed at once after a quiet period.
+    max_concurrency:
+        Upper bound (and start value) of the concurrency limit.
+    min_concurrency:
+        Lower bound the limit never shrinks below.
+    target_latency:
+        Seconds to the response headers above which a response counts as
+        slow.
+    background_share:
+        Fraction of the limit background requests may occupy.
+    cooldown:
+        Minimum seconds between two decreases, so one burst of failing
+        parallel requests halves the limit only once.
+    default_retry_after:
+        Pause after 429/503 responses without ``Retry-After``.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 20,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        target_latency: float = 2.0,
+        background_share: float = 0.5,
+        cooldown: float = 1.0,
+        default_retry_after: float = 1.0,
+    ) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.target_latency = target_latency
+        self.background_share = background_share
+        self.cooldown = cooldown
+        self.default_retry_after = default_retry_after
+        self.limit = float(self.max_concurrency)
+        self.tokens = float(self.burst)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._refilled = time.monotonic()
+        self._last_decrease = float("-inf")
+        self._waiting: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _wait_time(self, ticket: Tuple[int, int], now: float) -> float | None:
+        """``0`` if ``ticket`` may start, seconds to wait, or ``None`` to wait for a release."""
+
+        if self._waiting[0] != ticket:
+            return None
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        cap = int(self.limit)
+        if ticket[0] > 0:
+            cap = max(1, int(self.limit * self.background_share))
+        if self.in_flight >= cap:
+            return None
+        if self.rate > 0 and self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0.0
+
+    def acquire(self, priority: str = "interactive", timeout: float | None = None) -> float:
+        """Block until a request may start; return the seconds waited.
+
+        Raises :class:`CalServerBusy` after ``timeout`` seconds.
+        """
+
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            ticket = (PRIORITIES[priority], next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._wait_time(ticket, now)
+                    if wait == 0:
+                        break
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise CalServerBusy(
+                                f"calServer busy: waited {timeout:.0f} s ({self.in_flight} requests running)"
+                            )
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            if self.rate > 0:
+                self.tokens -= 1
+            self.in_flight += 1
+            # the next waiter may be allowed to start as well
+            self._cond.notify_all()
+        return time.monotonic() - started
+
+    def release(self) -> None:
+        """Free the slot taken by :meth:`acquire`."""
+
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: str = "interactive", timeout: float | None = None) -> Iterator[float]:
+        """``with limiter.slot():`` acquires and releases around a request."""
+
+        waited = self.acquire(priority, timeout)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def observe(self, latency: float | None, status: int | None = None, retry_after: Any = None) -> None:
+        """Adapt to one response; ``status=None`` means the request failed.
+
+        ``latency`` is the time to the response headers.
+        """
+
+        now = time.monotonic()
+        with self._cond:
+            delay = parse_retry_after(retry_after)
+            if delay is None and status in (429, 503):
+                delay = self.default_retry_after
+            if delay is not None:
+                self.blocked_until = max(self.blocked_until, now + min(delay, MAX_RETRY_AFTER))
+            if status in (429, 503):
+                self.throttled += 1
+            overloaded = status is None or status == 429 or status >= 500
+            if overloaded or (latency is not None and latency > self.target_latency):
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(float(self.min_concurrency), self.limit / 2)
+                    self._last_decrease = now
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "waiting": len(self._waiting),
+                "tokens": self.tokens,
+                "blocked_for": max(0.0, self.blocked_until - time.monotonic()),
+                "throttled": self.throttled,
+            }
+
+
+LIMITERS: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _from_env() -> RateLimiter:
+    return RateLimiter(
+        rate=float(os.getenv("CALSERVER_RATE", "10")),
+        burst=int(os.getenv("CALSERVER_BURST", "20")),
+        max_concurrency=int(os.getenv("CALSERVER_CONCURRENCY", "8")),
+        target_latency=float(os.getenv("CALSERVER_TARGET_LATENCY", "2")),
+    )
+
+
+def get_limiter(url: str) -> RateLimiter:
+    """Return the limiter shared by all requests to the host of ``url``."""
+
+    parts = urlsplit(url)
+    key = f"{parts.scheme}://{parts.netloc}".lower() if parts.netloc else url
+    with _limiters_lock:
+        limiter = LIMITERS.get(key)
+        if limiter is None:
+            limiter = LIMITERS[key] = _from_env()
+        return limiter
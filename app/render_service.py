@@ -0,0 +1,281 @@
+"""Process pool running SVG conversions outside the NiceGUI event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import io
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+from .artifacts import RENDER_CACHE, bitmap_key, render_key
+from .metrics import CONVERT_SECONDS
+from .svg_utils import get_backend, set_backend, svg_to_pdf_bytes, svg_to_png_image
+from .tracing import span
+
+# Libraries every worker imports once when it starts, so the first job does
+# not pay for loading svglib/ReportLab/cairosvg.
+WARM_UP_MODULES = (
+    "PIL.Image",
+    "svglib.svglib",
+    "reportlab.graphics.renderPM",
+    "reportlab.graphics.renderPDF",
+    "cairosvg",
+)
+
+
+class RenderQueueFull(RuntimeError):
+    """Raised when no render slot becomes free within the queue timeout."""
+
+
+class RenderWorker(multiprocessing.context.SpawnProcess):
+    """Spawned worker process, named ``RenderWorker-<n>``.
+
+    A spawned child imports the main script again (as ``__mp_main__``);
+    :func:`in_worker` lets the script skip starting the app there.
+    """
+
+
+class _WorkerContext(multiprocessing.context.SpawnContext):
+    Process = RenderWorker
+
+
+def in_worker() -> bool:
+    """Return whether the current process is a render worker."""
+
+    return multiprocessing.current_process().name.startswith(f"{RenderWorker.__name__}-")
+
+
+def _warm_up(backend: str | None = None) -> None:
+    """Import the heavy rendering libraries in a worker process.
+
+    ``backend`` is the SVG backend resolved by the parent, so
+    ``SVG_BACKEND=auto`` is benchmarked once instead of in every worker.
+    """
+
+    for name in WARM_UP_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception:  # pragma: no cover - optional dependency may be missing
+            pass
+    if backend:
+        set_backend(backend)
+
+
+def _ping() -> int:
+    """Return the worker PID; used to start all workers up front."""
+
+    return os.getpid()
+
+
+def _render_pdf(svg_string: str) -> bytes:
+    return svg_to_pdf_bytes(svg_string)
+
+
+def _png(image: Any) -> bytes:
+    # PIL images are returned as PNG bytes; they pickle faster and smaller
+    # than the raw pixel data.
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _render_png(svg_string: str) -> bytes:
+    return _png(svg_to_png_image(svg_string))
+
+
+def _render_bitmap(name: str, expiry: str, qr_data: str) -> bytes:
+    from .label_templates import device_label
+
+    return _png(device_label(name, expiry, qr_data))
+
+
+def render_bytes(svg_string: str, fmt: str) -> bytes:
+    """Return ``svg_string`` as ``"pdf"`` or ``"png"`` bytes, rendered here.
+
+    Meant to run inside a worker of :func:`worker_pool`.
+    """
+
+    return _render_pdf(svg_string) if fmt == "pdf" else _render_png(svg_string)
+
+
+def worker_pool(workers: int) -> ProcessPoolExecutor:
+    """Return a pool of ``workers`` render processes, warmed up on start."""
+
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=_WorkerContext(),
+        initializer=_warm_up,
+        initargs=(get_backend(),),
+    )
+
+
+class RenderService:
+    """Bounded pool of render workers with async submission.
+
+    Parameters
+    ----------
+    workers:
+        Number of worker processes. ``0`` runs jobs on a thread pool in the
+        current process instead (useful where process spawning is not
+        possible).
+    max_pending:
+        Maximum number of jobs queued or running at the same time. Further
+        submissions wait for a free slot.
+    timeout:
+        Seconds a single job may take before :class:`TimeoutError` is raised.
+    queue_timeout:
+        Seconds a submission waits for a free slot before
+        :class:`RenderQueueFull` is raised.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_pending: int | None = None,
+        timeout: float = 30.0,
+        queue_timeout: float = 10.0,
+    ) -> None:
+        if workers is None:
+            workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.workers = workers
+        self.max_pending = max_pending or max(2, workers * 2)
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._pending = 0
+
+    def start(self) -> None:
+        """Create the worker pool and pre-warm every worker."""
+
+        if self._executor is not None:
+            return
+        if self.workers > 0:
+            self._executor = worker_pool(self.workers)
+            # Workers are spawned lazily; submitting one job per worker
+            # starts (and warms) all of them right away.
+            for _ in range(self.workers):
+                self._executor.submit(_ping)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="render")
+
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs currently queued or running."""
+
+        return self._pending
+
+    async def submit(self, func: Callable[..., Any], *args: Any, timeout: float | None = None) -> Any:
+        """Run ``func(*args)`` on a worker and return its result."""
+
+        self.start()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise RenderQueueFull(f"{self._pending} render jobs pending") from None
+        self._pending += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._executor, func, *args)
+        except Exception:
+            self._release()
+            raise
+        # The slot is only freed once the worker is done, even if the caller
+        # gave up waiting, so timed out jobs still count against the bound.
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Rendering took longer than {timeout or self.timeout} s") from None
+
+    def _release(self) -> None:
+        self._pending -= 1
+        self._slots.release()
+
+    async def _cached(self, key: Any, fmt: str, produce: Callable[[], Awaitable[bytes]]) -> bytes:
+        # Labels pre-rendered by the scheduler (or printed before) are served
+        # from the shared artifact cache without a worker round trip.
+        with span("render", format=fmt) as traced:
+            data = RENDER_CACHE.get(key)
+            traced.set(cached=data is not None)
+            if data is None:
+                data = await produce()
+                if RENDER_CACHE.shared is None:
+                    RENDER_CACHE.put(key, data)
+                else:  # the store may wait for SQLite locks, keep that off the loop
+                    await asyncio.to_thread(RENDER_CACHE.put, key, data)
+            traced.set(bytes=len(data))
+        return data
+
+    async def _convert(self, fmt: str, func: Callable[[str], bytes], svg_string: str) -> bytes:
+        # Timed here in the parent: metrics recorded inside a worker process
+        # would never show up in ``/metrics``.
+        backend = get_backend()
+        with CONVERT_SECONDS.time(backend=backend, format=fmt), span("svg_convert", backend=backend, format=fmt):
+            return await self.submit(func, svg_string)
+
+    async def pdf(self, svg_string: str) -> bytes:
+        """Return PDF bytes for ``svg_string``."""
+
+        key = render_key("pdf", svg_string)
+        return await self._cached(key, "pdf", lambda: self._convert("pdf", _render_pdf, svg_string))
+
+    async def png_bytes(self, svg_string: str) -> bytes:
+        """Return PNG bytes for ``svg_string``."""
+
+        key = render_key("png", svg_string)
+        return await self._cached(key, "png", lambda: self._convert("png", _render_png, svg_string))
+
+    async def png(self, svg_string: str):
+        """Return a PIL image rendered from ``svg_string``."""
+
+        from PIL import Image
+
+        return Image.open(io.BytesIO(await self.png_bytes(svg_string)))
+
+    async def bitmap_bytes(self, name: str, expiry: str, qr_data: str) -> bytes:
+        """Return PNG bytes of the raster label (``label_templates.device_label``)."""
+
+        key = bitmap_key(name, expiry, qr_data)
+        return await self._cached(key, "bitmap", lambda: self.submit(_render_bitmap, name, expiry, qr_data))
+
+    async def bitmap(self, name: str, expiry: str, qr_data: str):
+        """Return the raster label printed by default as PIL image."""
+
+        from PIL import Image
+
+        return Image.open(io.BytesIO(await self.bitmap_bytes(name, expiry, qr_data)))
+
+
+_service: RenderService | None = None
+
+
+def get_render_service() -> RenderService:
+    """Return the process wide render service configured from the environment.
+
+    ``RENDER_WORKERS``, ``RENDER_QUEUE`` and ``RENDER_TIMEOUT`` override the
+    number of workers, the queue bound and the per-job timeout.
+    """
+
+    global _service
+    if _service is None:
+        workers = os.getenv("RENDER_WORKERS")
+        queue = os.getenv("RENDER_QUEUE")
+        _service = RenderService(
+            workers=int(workers) if workers else None,
+            max_pending=int(queue) if queue else None,
+            timeout=float(os.getenv("RENDER_TIMEOUT", "30")),
+        )
+    return _service
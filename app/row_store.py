@@ -0,0 +1,141 @@
+"""Compact columnar storage for calibration rows.
+
+Rows of the device table repeat the same values over and over ("-",
+manufacturer names, dates). :class:`RowStore` keeps one dictionary-encoded
+column per field: every distinct value is stored once and each row only
+holds a 4 byte code per field. Dicts are materialized for the rows that are
+actually sent to the table; QR thumbnails and the preview link are not
+stored at all.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+# Fields kept per calibration row
+ROW_FIELDS = ("I4201", "I4202", "I4203", "I4204", "I4206", "C2301", "C2303", "MTAG", "C2339")
+
+
+def row_from_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the table row for one ``calibration`` entry of the calServer API."""
+
+    inv = entry.get("inventory") or {}
+    return {
+        "I4201": inv.get("I4201") or "-",
+        "I4202": inv.get("I4202") or "-",
+        "I4203": inv.get("I4203") or "-",
+        "I4204": inv.get("I4204") or "-",
+        "I4206": inv.get("I4206") or "-",
+        "C2301": entry.get("C2301") or "-",
+        "C2303": entry.get("C2303") or "-",
+        "MTAG": entry.get("MTAG") or inv.get("MTAG") or "-",
+        "C2339": entry.get("C2339"),
+    }
+
+
+class RowStore(Sequence):
+    """Sequence of rows stored as dictionary-encoded columns.
+
+    Indexing returns a freshly materialized ``dict``; use :meth:`column` or
+    :meth:`value` to read single fields without building rows.
+    """
+
+    def __init__(self, fields: Sequence[str] = ROW_FIELDS) -> None:
+        self.fields = tuple(fields)
+        self.clear()
+
+    def clear(self) -> None:
+        """Remove all rows."""
+
+        self._codes: Dict[str, array] = {f: array("I") for f in self.fields}
+        self._values: Dict[str, List[Any]] = {f: [] for f in self.fields}
+        self._lookup: Dict[str, Dict[Any, int]] = {f: {} for f in self.fields}
+        self._len = 0
+
+    def _encode(self, field: str, value: Any) -> int:
+        lookup = self._lookup[field]
+        try:
+            code = lookup.get(value)
+        except TypeError:
+            # unhashable (nested dict/list from calServer): stored as JSON text
+            value = json.dumps(value, sort_keys=True, default=str)
+            code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self._values[field])
+            self._values[field].append(value)
+        return code
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """Append ``row``; fields missing from it are stored as ``None``.
+
+        Unhashable values are stored as their JSON text.
+        """
+
+        # encode every field first, so a failure never leaves columns of
+        # different lengths behind
+        codes = [self._encode(field, row.get(field)) for field in self.fields]
+        for field, code in zip(self.fields, codes):
+            self._codes[field].append(code)
+        self._len += 1
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Append all ``rows``."""
+
+        for row in rows:
+            self.append(row)
+
+    def set_row(self, index: int, row: Dict[str, Any]) -> None:
+        """Replace the row at ``index``."""
+
+        codes = [self._encode(field, row.get(field)) for field in self.fields]
+        for field, code in zip(self.fields, codes):
+            self._codes[field][index] = code
+
+    def __len__(self) -> int:
+        return self._len
+
+    def value(self, index: int, field: str) -> Any:
+        """Return a single field of the row at ``index``."""
+
+        return self._values[field][self._codes[field][index]]
+
+    def column(self, field: str) -> List[Any]:
+        """Return all values of ``field`` in row order."""
+
+        values = self._values[field]
+        return [values[code] for code in self._codes[field]]
+
+    def _row(self, index: int) -> Dict[str, Any]:
+        return {f: self._values[f][self._codes[f][index]] for f in self.fields}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("row index out of range")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._len):
+            yield self._row(i)
+
+    def rows(self, indices: Iterable[int]) -> List[Dict[str, Any]]:
+        """Materialize the rows at ``indices``."""
+
+        return [self._row(i) for i in indices]
+
+    def memory_usage(self) -> int:
+        """Return the approximate number of bytes held by the store."""
+
+        size = 0
+        for field in self.fields:
+            codes = self._codes[field]
+            size += codes.buffer_info()[1] * codes.itemsize
+            size += sys.getsizeof(self._values[field]) + sys.getsizeof(self._lookup[field])
+            size += sum(sys.getsizeof(v) for v in self._values[field])
+        return size
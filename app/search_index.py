@@ -0,0 +1,101 @@
+"""Precomputed search index for the device table filter."""
+
+from __future__ import annotations
+
+import bisect
+from array import array
+from typing import Any, Dict, Iterable, List, Sequence, Set
+
+from .table_data import SEARCH_FIELDS
+
+# Separates the fields inside a row's haystack so matches cannot span two
+# fields, which keeps the semantics of a per-field substring test.
+_SEPARATOR = "\x1f"
+
+
+class SearchIndex:
+    """Lowercase haystacks plus an n-gram index over the searchable fields.
+
+    Rows are addressed by their position in the row list the index was built
+    from. Queries of at least ``n`` characters only check the rows listed
+    for the query's rarest n-gram; shorter queries scan the precomputed
+    haystacks. Posting lists are sorted ``array`` objects (4 bytes per
+    entry) so the index stays small for large inventories.
+    """
+
+    def __init__(self, fields: Sequence[str] = SEARCH_FIELDS, n: int = 3) -> None:
+        self.fields = tuple(fields)
+        self.n = n
+        self._haystacks: List[str] = []
+        self._grams: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._haystacks)
+
+    def _haystack(self, row: Dict[str, Any]) -> str:
+        return _SEPARATOR.join(str(row.get(f, "")).lower() for f in self.fields)
+
+    def _ngrams(self, text: str) -> Set[str]:
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def _index(self, pos: int, haystack: str) -> None:
+        grams = self._grams
+        for gram in self._ngrams(haystack):
+            postings = grams.get(gram)
+            if postings is None:
+                if _SEPARATOR not in gram:
+                    grams[gram] = array("i", (pos,))
+            elif not postings or postings[-1] < pos:
+                postings.append(pos)
+            elif postings[-1] != pos:
+                bisect.insort(postings, pos)
+
+    def _unindex(self, pos: int, haystack: str) -> None:
+        for gram in self._ngrams(haystack):
+            postings = self._grams.get(gram)
+            if postings is not None:
+                i = bisect.bisect_left(postings, pos)
+                if i < len(postings) and postings[i] == pos:
+                    del postings[i]
+
+    def build(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Replace the index content with ``rows``."""
+
+        self.clear()
+        self.extend(rows)
+
+    def clear(self) -> None:
+        """Remove all rows from the index."""
+
+        self._haystacks = []
+        self._grams = {}
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Append ``rows`` after the rows already indexed."""
+
+        for row in rows:
+            haystack = self._haystack(row)
+            self._haystacks.append(haystack)
+            self._index(len(self._haystacks) - 1, haystack)
+
+    def update(self, pos: int, row: Dict[str, Any]) -> None:
+        """Re-index the row at ``pos`` after it changed."""
+
+        self._unindex(pos, self._haystacks[pos])
+        haystack = self._haystack(row)
+        self._haystacks[pos] = haystack
+        self._index(pos, haystack)
+
+    def query(self, text: str) -> List[int]:
+        """Return the positions of rows containing ``text``, in row order."""
+
+        needle = text.lower()
+        if not needle:
+            return list(range(len(self._haystacks)))
+        haystacks = self._haystacks
+        if len(needle) < self.n:
+            return [i for i, h in enumerate(haystacks) if needle in h]
+        grams = self._grams
+        rarest = min((grams.get(g, ()) for g in self._ngrams(needle)), key=len)
+        # The rarest n-gram narrows the candidates; confirm the whole needle.
+        return [i for i in rarest if needle in haystacks[i]]
@@ -0,0 +1,233 @@
+"""Per-browser session state for concurrent operators.
+
+With a shared store (``SHARED_STORE``) the login of a session is kept there
+too, so any worker process behind the proxy can serve the browser. The
+login holds the calServer password and API key, so it is only shared
+encrypted: with ``STORAGE_SECRET`` set and the ``cryptography`` package
+installed (see :func:`login_cipher`). Otherwise logins stay in the memory
+of the worker that received them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+from .row_store import RowStore
+from .search_index import SearchIndex
+from .shared_store import get_store
+
+logger = logging.getLogger(__name__)
+
+
+def _deep_size(value: Any) -> int:
+    """Return an estimate of the memory used by ``value`` in bytes."""
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + _deep_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_deep_size(v) for v in value)
+    return size
+
+
+def login_cipher(secret: str | None) -> Any:
+    """Return a Fernet cipher for stored logins keyed by ``secret``, or ``None``.
+
+    ``None`` is returned without a secret or without ``cryptography``.
+    """
+
+    if not secret:
+        return None
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        logger.warning("cryptography is not installed, logins are not shared between workers")
+        return None
+    key = hashlib.sha256(b"calserver-print session login\0" + secret.encode("utf-8")).digest()
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+class Session:
+    """Login, loaded rows and caches of one operator's browser.
+
+    UI elements belong to the page (NiceGUI client) that created them; the
+    session only keeps data that must survive navigating from the login page
+    to ``/app`` or reloading the page. Only the login is written to
+    ``store``, encrypted with ``cipher`` (nothing is stored without one);
+    rows are loaded again by the worker that serves the page.
+    """
+
+    def __init__(self, session_id: str, store: Any = None, ttl: float | None = None, cipher: Any = None) -> None:
+        self.id = session_id
+        self.store = store if cipher is not None else None
+        self.ttl = ttl
+        self.cipher = cipher
+        self.login: Dict[str, str] = {}
+        self.all_rows = RowStore()
+        self.search_index = SearchIndex()
+        self.cache: Dict[Any, Any] = {}
+        # Background task loading ``all_rows`` (see ``main_page``)
+        self.load_task: Any = None
+        # Latest finished trace of this operator's actions (status panel)
+        self.last_trace: Any = None
+        self.created = time.monotonic()
+        self.last_seen = self.created
+        self._stored = 0.0
+
+    @property
+    def store_key(self) -> str:
+        return f"session:{self.id}"
+
+    def set_login(self, login: Dict[str, str]) -> None:
+        """Remember ``login`` and publish it to the shared store."""
+
+        self.login = dict(login)
+        self._store_login()
+
+    def _store_login(self) -> None:
+        if self.store is None or not self.login:
+            return
+        try:
+            token = self.cipher.encrypt(json.dumps(self.login).encode("utf-8"))
+            self.store.set(self.store_key, token, self.ttl)
+            self._stored = time.monotonic()
+        except Exception as e:
+            logger.warning("Storing session %s failed: %s", self.id, e)
+
+    def restore_login(self) -> None:
+        """Take over the login another worker stored for this session."""
+
+        if self.store is None:
+            return
+        try:
+            raw = self.store.get(self.store_key)
+            login = json.loads(self.cipher.decrypt(raw)) if raw else None
+        except Exception as e:  # unreadable store or another STORAGE_SECRET
+            logger.warning("Reading session %s failed: %s", self.id, e)
+            return
+        if login:
+            self.login = login
+            self._stored = time.monotonic()
+
+    def touch(self) -> None:
+        """Mark the session as used right now."""
+
+        self.last_seen = time.monotonic()
+        # keep the stored login alive while the operator is active
+        if self.store is None or not self.login or not self.ttl or self.last_seen - self._stored <= self.ttl / 4:
+            return
+        self._stored = self.last_seen
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._store_login()
+        else:
+            # the store may wait for SQLite locks, keep that off the event loop
+            loop.run_in_executor(None, self._store_login)
+
+    def clear(self) -> None:
+        """Forget login, rows and cached values (logout)."""
+
+        self.login.clear()
+        self.last_trace = None
+        if self.store is not None:
+            try:
+                self.store.delete(self.store_key)
+            except Exception as e:
+                logger.warning("Removing session %s failed: %s", self.id, e)
+        self.all_rows.clear()
+        self.search_index.clear()
+        self.cache.clear()
+
+    def memory_usage(self) -> int:
+        """Return the approximate number of bytes held by this session."""
+
+        return _deep_size(self.login) + self.all_rows.memory_usage() + _deep_size(self.cache)
+
+
+class SessionManager:
+    """Registry of sessions with idle eviction.
+
+    Parameters
+    ----------
+    idle_timeout:
+        Seconds after the last activity before a session is evicted.
+    store:
+        Optional :class:`~app.shared_store.SharedStore` holding the logins,
+        which expire there after ``idle_timeout`` as well.
+    cipher:
+        Encrypts the logins in ``store`` (see :func:`login_cipher`); without
+        it ``store`` is not used.
+    """
+
+    def __init__(self, idle_timeout: float = 1800.0, store: Any = None, cipher: Any = None) -> None:
+        self.idle_timeout = idle_timeout
+        self.store = store
+        self.cipher = cipher
+        self._sessions: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> Session:
+        """Return the session for ``session_id``, creating it if necessary."""
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            created = session is None
+            if created:
+                session = self._sessions[session_id] = Session(
+                    session_id, self.store, self.idle_timeout, self.cipher
+                )
+        if created:
+            session.restore_login()
+        session.touch()
+        return session
+
+    def drop(self, session_id: str) -> None:
+        """Remove the session ``session_id`` if it exists."""
+
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def evict_idle(self, now: float | None = None) -> List[str]:
+        """Remove sessions idle for longer than :attr:`idle_timeout`."""
+
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [sid for sid, s in self._sessions.items() if now - s.last_seen > self.idle_timeout]
+            for sid in expired:
+                del self._sessions[sid]
+        if expired:
+            logger.info("Evicted %d idle session(s)", len(expired))
+        return expired
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Return the approximate memory use in bytes per session id."""
+
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {s.id: s.memory_usage() for s in sessions}
+
+
+def _from_env() -> SessionManager:
+    store, cipher = get_store(), None
+    if store is not None:
+        secret = os.getenv("STORAGE_SECRET")
+        if not secret:
+            logger.warning("Logins are not shared between workers: STORAGE_SECRET is not set")
+        cipher = login_cipher(secret)
+    return SessionManager(float(os.getenv("SESSION_IDLE_TIMEOUT", "1800")), store, cipher)
+
+
+SESSIONS = _from_env()
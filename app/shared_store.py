@@ -0,0 +1,213 @@
+"""Key/value store shared by several app processes.
+
+With ``SHARED_STORE`` set, logins, print job states and rendered label
+artifacts are kept where every worker can read them, so the app can run as
+several processes or containers behind one proxy::
+
+    SHARED_STORE=sqlite:/data/shared.sqlite3     # one host, shared volume
+    SHARED_STORE=memory                          # this process only (tests)
+    SHARED_STORE=mypackage.redis_store:RedisStore
+
+Further drivers are classes implementing :class:`SharedStore`, given as
+``"module:Class"`` and created without arguments, or registered in
+:data:`STORE_DRIVERS`. Without ``SHARED_STORE`` nothing is shared and the
+state stays in process memory as before.
+"""
+
+from __future__ import annotations
+
+import abc
+import importlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SharedStore(abc.ABC):
+    """Bytes values under string keys, optionally expiring."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """Return the value of ``key``, ``None`` if missing or expired."""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        """Store ``value`` under ``key`` for ``ttl`` seconds (``None``: no expiry)."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove ``key`` if present."""
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStore(SharedStore):
+    """Store in the memory of the current process."""
+
+    def __init__(self, location: str = "") -> None:
+        self._data: Dict[str, Tuple[bytes, float | None]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] < time.time():
+                del self._data[key]
+                return None
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteStore(SharedStore):
+    """Store in an SQLite file that several processes open at once.
+
+    The database runs in WAL mode, so readers do not block the writer.
+    Expired entries are purged every ``purge_every`` writes. Of the keys
+    starting with a prefix in ``bounded`` (cached artifacts) only the
+    ``max_entries`` most recently written are kept; other entries, such as
+    logins and print jobs, are only removed once they expire.
+
+    Parameters
+    ----------
+    path:
+        Database file, on a volume all workers can reach.
+    max_entries:
+        Upper bound of stored entries per prefix in ``bounded``.
+    bounded:
+        Key prefixes whose entries may be dropped before they expire.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 20000,
+        purge_every: int = 500,
+        bounded: Tuple[str, ...] = ("render:",),
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.bounded = bounded
+        self.purge_every = purge_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # opened on first use, so merely importing does not touch the disk
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, updated REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS kv_updated ON kv (updated)")
+            try:
+                os.chmod(self.path, 0o600)  # holds calServer logins
+            except OSError:  # pragma: no cover - e.g. foreign owner
+                pass
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            row = self._connection().execute("SELECT value, expires FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return bytes(row[0])
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires, updated) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl if ttl else None, now),
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._purge(conn, now)
+
+    def _purge(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires < ?", (now,))
+        for prefix in self.bounded:
+            # key range instead of LIKE, so the primary key index is used
+            end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            conn.execute(
+                "DELETE FROM kv WHERE key IN (SELECT key FROM kv WHERE key >= ? AND key < ? "
+                "ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+                (prefix, end, self.max_entries),
+            )
+
+    def purge(self) -> None:
+        """Drop expired entries and bounded ones beyond :attr:`max_entries` now."""
+
+        with self._lock:
+            self._purge(self._connection(), time.time())
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+STORE_DRIVERS: Dict[str, Callable[[str], SharedStore]] = {
+    "memory": MemoryStore,
+    "sqlite": SQLiteStore,
+}
+
+
+def open_store(url: str) -> SharedStore:
+    """Create the store described by ``url`` (``"driver:location"``)."""
+
+    driver, _, location = url.partition(":")
+    factory = STORE_DRIVERS.get(driver)
+    if factory is not None:
+        if driver == "sqlite" and location.startswith("//"):
+            location = location[2:]  # sqlite:///abs/path
+        return factory(location)
+    if not location:
+        raise ValueError(f"Unknown shared store driver: {driver}")
+    return getattr(importlib.import_module(driver), location)()
+
+
+_store: SharedStore | None = None
+_configured = False
+
+
+def get_store() -> SharedStore | None:
+    """Return the store configured in ``SHARED_STORE``, or ``None`` if unset."""
+
+    global _store, _configured
+    if not _configured:
+        _configured = True
+        url = os.getenv("SHARED_STORE")
+        if url:
+            try:
+                _store = open_store(url)
+            except (ValueError, ImportError, AttributeError) as e:
+                logger.warning("Shared store %s unavailable, keeping state per process: %s", url, e)
+    return _store
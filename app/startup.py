@@ -0,0 +1,270 @@
+"""Cold start helpers: lazy imports, background warm-up and startup timings.
+
+Only what the login page needs is imported before ``ui.run``. Label
+rendering, QR codes, printing and the SVG converters are bound with
+:func:`lazy_import` and loaded by :func:`warm_up_in_background` once the
+server listens, so neither the first page nor the first print waits for
+them.
+
+``python -m app.startup`` prints where import time goes (``-X importtime``
+of ``app.main``).
+
+Once the server accepts connections :func:`announce_ready` prints
+``LABELTOOL_READY <url>`` and optionally writes the URL to a ready file, so
+a parent process (the Electron shell) can open the window without polling
+a fixed port.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Any, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+# Reference point for all startup timings; this module is imported first.
+T0 = time.perf_counter()
+
+# Imported by the warm-up thread after the server is listening
+WARM_UP_MODULES = (
+    "jinja2",
+    "PIL.Image",
+    "qrcode",
+    "app.qrcode_utils",
+    "app.label_templates",
+    "app.print_utils",
+    "svglib.svglib",
+    "reportlab.graphics.renderPM",
+    "reportlab.graphics.renderPDF",
+    "cairosvg",
+)
+
+_marks: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def mark(event: str, seconds: float | None = None) -> None:
+    """Record ``event`` once, at ``seconds`` after start (default: now)."""
+
+    with _lock:
+        if event not in _marks:
+            _marks[event] = time.perf_counter() - T0 if seconds is None else seconds
+            logger.debug("Startup: %s after %.3f s", event, _marks[event])
+
+
+def marks() -> Dict[str, float]:
+    """Return the recorded startup events and their times in seconds."""
+
+    with _lock:
+        return dict(_marks)
+
+
+class _LazyModule(ModuleType):
+    """Stand-in for a module that is imported on first attribute access.
+
+    ``importlib.util.LazyLoader`` is not thread-safe before Python 3.12: the
+    warm-up thread and a request handler touching the module at the same
+    time could both execute it. Here the first access runs a regular
+    import, which holds the import system's per-module lock.
+    """
+
+    def __getattr__(self, attr: str) -> Any:
+        # only called for attributes missing on the stand-in itself
+        module = self.__dict__.get("_module")
+        if module is None:
+            module = self.__dict__["_module"] = importlib.import_module(self.__name__)
+        return getattr(module, attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(importlib.import_module(self.__name__), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(importlib.import_module(self.__name__), attr)
+
+
+def lazy_import(name: str, package: str | None = None) -> ModuleType:
+    """Return module ``name``, executing it only on first attribute access.
+
+    Already imported modules are returned as they are.
+    """
+
+    name = importlib.util.resolve_name(name, package) if name.startswith(".") else name
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No module named {name!r}", name=name)
+    return _LazyModule(name)
+
+
+def warm_up(modules: Iterable[str] = WARM_UP_MODULES) -> Dict[str, float]:
+    """Import ``modules``; return the seconds each one took.
+
+    Missing optional libraries are skipped. Lazily bound modules are
+    executed by touching one of their attributes.
+    """
+
+    timings: Dict[str, float] = {}
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(name)
+            getattr(module, "__doc__", None)
+        except Exception as e:  # pragma: no cover - optional dependency may be missing
+            logger.debug("Warm-up of %s skipped: %s", name, e)
+            continue
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def warm_up_in_background(modules: Iterable[str] = WARM_UP_MODULES) -> threading.Thread:
+    """Run :func:`warm_up` on a daemon thread and record ``warm_up_done``."""
+
+    modules = tuple(modules)
+
+    def run() -> None:
+        start = time.perf_counter()
+        timings = warm_up(modules)
+        mark("warm_up_done")
+        slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:3]
+        logger.info(
+            "Warm-up imported %d module(s) in %.2f s (slowest: %s)",
+            len(timings),
+            time.perf_counter() - start,
+            ", ".join(f"{n} {t:.2f} s" for n, t in slowest),
+        )
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+READY_PREFIX = "LABELTOOL_READY"
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    """Return a port on ``host`` that is currently unused."""
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_listening(host: str, port: int, timeout: float = 30.0) -> bool:
+    """Return ``True`` as soon as ``host:port`` accepts connections.
+
+    Startup hooks run before uvicorn binds its socket, so readiness is
+    checked by connecting to it.
+    """
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(0.01)
+            continue
+        writer.close()
+        return True
+    return False
+
+
+def announce_ready(url: str, ready_file: str | None = None) -> None:
+    """Tell the parent process that the app is served at ``url``.
+
+    Prints ``LABELTOOL_READY <url>`` on stdout (if there is one; windowed
+    builds have none) and writes ``{"url", "port", "pid"}`` to
+    ``ready_file``. The file is replaced atomically, so readers never see
+    it half written.
+    """
+
+    mark("ready")
+    if sys.stdout is not None:
+        try:
+            print(f"{READY_PREFIX} {url}", flush=True)
+        except (OSError, ValueError):  # pragma: no cover - closed pipe
+            pass
+    if ready_file:
+        info = {"url": url, "port": int(url.rsplit(":", 1)[1].split("/")[0]), "pid": os.getpid()}
+        tmp = f"{ready_file}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(info, fh)
+        os.replace(tmp, ready_file)
+
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` output into ``{module, self_us, cumulative_us, depth}``."""
+
+    entries = []
+    for line in output.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            entries.append({
+                "module": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": (len(match.group(3)) - 1) // 2,
+            })
+    return entries
+
+
+def import_time_report(module: str = "app.main", top: int = 20) -> List[Dict[str, Any]]:
+    """Import ``module`` in a fresh interpreter; return its slowest top level imports."""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        timeout=120,
+    )
+    entries = [e for e in parse_importtime(result.stderr) if e["depth"] <= 1]
+    return sorted(entries, key=lambda e: e["cumulative_us"], reverse=True)[:top]
+
+
+def register_startup_endpoint(app: Any, token: str | None = None) -> None:
+    """Add ``GET /admin/startup`` (timings and import report) to ``app``.
+
+    Like ``/admin/profile`` it is only added when ``PROFILE_ADMIN_TOKEN`` is set.
+    """
+
+    token = token if token is not None else os.getenv("PROFILE_ADMIN_TOKEN")
+    if not token:
+        return
+
+    from fastapi import Request
+    from fastapi.responses import JSONResponse
+
+    from .print_api import authorized
+
+    @app.get("/admin/startup")
+    async def startup_report(request: Request, imports: bool = False) -> Any:
+        if not authorized(request.headers, token):
+            return JSONResponse({"error": "unauthorized"}, status_code=401)
+        report: Dict[str, Any] = {"marks": marks()}
+        if imports:
+            report["imports"] = await asyncio.to_thread(import_time_report)
+        return report
+
+
+if __name__ == "__main__":  # pragma: no cover - manual diagnostic
+    module = sys.argv[1] if len(sys.argv) > 1 else "app.main"
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for entry in import_time_report(module):
+        print(f"{entry['cumulative_us'] / 1000:>14.1f} {entry['self_us'] / 1000:>8.1f}  {entry['module']}")
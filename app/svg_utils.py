@@ -1,50 +1,210 @@
+"""Conversion of SVG label strings into PIL images and PDF documents.
+
+Two renderer backends are supported: ``svglib`` (parsing into a ReportLab
+drawing) and ``cairosvg``. The backend is chosen with :func:`set_backend` or
+the ``SVG_BACKEND`` environment variable; ``"auto"`` picks the fastest
+installed backend with a short benchmark on first use. Parsed documents are
+kept in an LRU cache keyed by the SVG content hash, so rendering the same
+label as PNG and PDF, or printing it again, parses it only once.
+
+Each render worker process (see :mod:`render_service`) keeps its own
+parse cache and jobs are not pinned to workers, so PNG and PDF of one label
+may still be parsed twice when two workers pick them up. Repeated renders
+of the same label are served from ``RENDER_CACHE`` in the parent instead.
+"""
+
+import hashlib
 import io
+import logging
+import os
+import time
 
+from .cache import LRUCache
 
-def svg_to_png_image(svg_string: str):
-    """Return a PIL Image from an SVG string.
+BACKENDS = ("svglib", "cairosvg")
 
-    This first tries to use ``svglib`` to parse the SVG. If that fails, a
-    fallback via ``cairosvg`` is attempted when available.
-    """
-    from svglib.svglib import svg2rlg
-    from reportlab.graphics import renderPM
-    from PIL import Image
+# Parsed documents keyed by ``(backend, sha256 of the SVG)``.
+DRAWING_CACHE = LRUCache(maxsize=int(os.getenv("SVG_DRAWING_CACHE", "128")))
 
-    drawing = svg2rlg(io.StringIO(svg_string))
-    if drawing is not None:
-        return renderPM.drawToPIL(drawing)
+logger = logging.getLogger(__name__)
 
-    try:  # fallback when svglib cannot parse the SVG
-        from cairosvg import svg2png
-    except Exception:  # pragma: no cover - optional dependency may be missing
-        raise ValueError("Invalid SVG data")
+_backend = "svglib"
 
-    png_bytes = svg2png(bytestring=svg_string.encode())
-    return Image.open(io.BytesIO(png_bytes))
+# Label sized sample used to compare the backends.
+BENCHMARK_SVG = """<?xml version='1.0' encoding='UTF-8' standalone='no'?>
+<svg width='400' height='200' xmlns='http://www.w3.org/2000/svg'>
+  <rect width='100%' height='100%' fill='white'/>
+  <text x='10' y='30' font-size='16'>Gerät: Benchmark</text>
+  <text x='10' y='70' font-size='16'>Ablauf: 2030-01-01</text>
+  <g transform='translate(280,10)'>
+    <rect width='100' height='100' fill='none' stroke='black'/>
+    <rect x='10' y='10' width='20' height='20'/><rect x='70' y='10' width='20' height='20'/>
+    <rect x='10' y='70' width='20' height='20'/><rect x='40' y='40' width='20' height='20'/>
+  </g>
+</svg>
+"""
 
 
-def svg_to_pdf_bytes(svg_string: str) -> bytes:
-    """Return PDF bytes created from the given SVG string.
+def available_backends() -> list[str]:
+    """Return the names of the renderer backends that can be imported."""
+
+    found = []
+    for name, module in (("svglib", "svglib.svglib"), ("cairosvg", "cairosvg")):
+        try:
+            __import__(module)
+        except Exception:  # pragma: no cover - optional dependency may be missing
+            continue
+        found.append(name)
+    return found
+
+
+def benchmark_backends(svg_string: str = BENCHMARK_SVG, rounds: int = 3) -> dict[str, float]:
+    """Return the best PNG + PDF conversion time in seconds per backend."""
+
+    results = {}
+    for name in available_backends():
+        best = float("inf")
+        try:
+            for _ in range(rounds):
+                start = time.perf_counter()
+                _convert(name, _parse(name, svg_string), svg_string, "png")
+                _convert(name, _parse(name, svg_string), svg_string, "pdf")
+                best = min(best, time.perf_counter() - start)
+        except Exception:  # pragma: no cover - broken installation
+            continue
+        results[name] = best
+    return results
+
+
+def set_backend(name: str) -> None:
+    """Select the renderer backend (``svglib``, ``cairosvg`` or ``auto``)."""
+
+    global _backend
+    if name not in BACKENDS and name != "auto":
+        raise ValueError(f"Unknown SVG backend: {name}")
+    _backend = name
+
+
+def _backend_from_env() -> None:
+    name = os.getenv("SVG_BACKEND")
+    if not name:
+        return
+    try:
+        set_backend(name)
+    except ValueError as e:
+        logger.warning("%s, using svglib", e)
+
+
+_backend_from_env()
+
+
+def get_backend() -> str:
+    """Return the active backend, resolving ``auto`` on first use."""
+
+    global _backend
+    if _backend == "auto":
+        timings = benchmark_backends()
+        _backend = min(timings, key=timings.get) if timings else "svglib"
+    return _backend
+
+
+def _parse(backend: str, svg_string: str):
+    """Parse ``svg_string`` with ``backend``; ``None`` if it cannot."""
+
+    if backend == "cairosvg":
+        try:
+            from cairosvg.parser import Tree
+        except Exception:  # pragma: no cover - older cairosvg or missing
+            return None
+        return Tree(bytestring=svg_string.encode())
 
-    As with :func:`svg_to_png_image`, ``svglib`` is used first and ``cairosvg``
-    is attempted as a fallback.
-    """
     from svglib.svglib import svg2rlg
-    from reportlab.graphics import renderPDF
 
-    drawing = svg2rlg(io.StringIO(svg_string))
-    if drawing is not None:
+    return svg2rlg(io.StringIO(svg_string))
+
+
+def _convert(backend: str, parsed, svg_string: str, fmt: str):
+    """Render a parsed document as ``png`` (PIL image) or ``pdf`` (bytes)."""
+
+    if backend == "svglib":
+        from reportlab.graphics import renderPDF, renderPM
+
+        if fmt == "png":
+            return renderPM.drawToPIL(parsed)
         try:
-            return renderPDF.drawToString(drawing)
+            return renderPDF.drawToString(parsed)
         except AttributeError:  # pragma: no cover - fallback for older versions
             buffer = io.BytesIO()
-            renderPDF.drawToFile(drawing, buffer)
+            renderPDF.drawToFile(parsed, buffer)
             return buffer.getvalue()
 
-    try:  # fallback when svglib cannot parse the SVG
-        from cairosvg import svg2pdf
-    except Exception:  # pragma: no cover - optional dependency may be missing
-        raise ValueError("Invalid SVG data")
+    from PIL import Image
+
+    if parsed is not None:
+        from cairosvg.surface import PDFSurface, PNGSurface
+
+        output = io.BytesIO()
+        surface_cls = PNGSurface if fmt == "png" else PDFSurface
+        surface_cls(parsed, output, 96).finish()
+        data = output.getvalue()
+    else:
+        from cairosvg import svg2pdf, svg2png
+
+        convert = svg2png if fmt == "png" else svg2pdf
+        data = convert(bytestring=svg_string.encode())
+    return Image.open(io.BytesIO(data)) if fmt == "png" else data
+
+
+def parse_drawing(svg_string: str, backend: str | None = None):
+    """Return the parsed document for ``svg_string``, using the cache."""
+
+    backend = backend or get_backend()
+    key = (backend, hashlib.sha256(svg_string.encode()).hexdigest())
+    return DRAWING_CACHE.get_or_create(key, lambda: _parse(backend, svg_string))
+
+
+def _render(svg_string: str, fmt: str):
+    # Timed by the caller (``RenderService``): this usually runs in a worker
+    # process whose metrics and spans never reach ``/metrics``.
+    return _render_with(get_backend(), svg_string, fmt)
+
+
+def _render_with(backend: str, svg_string: str, fmt: str):
+    if backend == "svglib":
+        drawing = parse_drawing(svg_string, "svglib")
+        if drawing is not None:
+            return _convert("svglib", drawing, svg_string, fmt)
+        try:  # fallback when svglib cannot parse the SVG
+            import cairosvg  # noqa: F401
+        except Exception:  # pragma: no cover - optional dependency may be missing
+            raise ValueError("Invalid SVG data")
+        return _convert("cairosvg", None, svg_string, fmt)
+
+    try:
+        return _convert("cairosvg", parse_drawing(svg_string, "cairosvg"), svg_string, fmt)
+    except ImportError:  # cairosvg configured but not installed
+        drawing = parse_drawing(svg_string, "svglib")
+        if drawing is None:
+            raise ValueError("Invalid SVG data")
+        return _convert("svglib", drawing, svg_string, fmt)
+
+
+def svg_to_png_image(svg_string: str):
+    """Return a PIL Image from an SVG string.
+
+    With the default ``svglib`` backend the SVG is parsed with ``svglib``
+    first. If that fails, a fallback via ``cairosvg`` is attempted when
+    available.
+    """
+
+    return _render(svg_string, "png")
+
+
+def svg_to_pdf_bytes(svg_string: str) -> bytes:
+    """Return PDF bytes created from the given SVG string.
+
+    As with :func:`svg_to_png_image`, the configured backend is used and
+    ``cairosvg`` serves as a fallback for SVGs ``svglib`` cannot parse.
+    """
 
-    return svg2pdf(bytestring=svg_string.encode())
+    return _render(svg_string, "pdf")
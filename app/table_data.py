@@ -0,0 +1,92 @@
+"""Filtering, sorting and paging of device table rows on the server.
+
+The functions work on row positions so a :class:`~app.row_store.RowStore`
+is never materialized as a whole; plain lists of dicts work as well.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+# Row fields matched by the search box
+SEARCH_FIELDS = ("I4201", "I4202", "I4203", "I4204", "I4206", "MTAG")
+
+
+def _column(rows: Sequence[Dict[str, Any]], field: str) -> List[Any]:
+    if hasattr(rows, "column"):
+        return rows.column(field)
+    return [r.get(field) for r in rows]
+
+
+def filter_positions(
+    rows: Sequence[Dict[str, Any]],
+    only_current: bool = False,
+    search: str | None = None,
+    index: Any = None,
+) -> List[int]:
+    """Return the positions of rows matching the current-only switch and search.
+
+    ``index`` is an optional :class:`~app.search_index.SearchIndex` built from
+    ``rows``; it answers the search without scanning every row.
+    """
+
+    if search and index is not None and len(index) == len(rows):
+        positions = index.query(search)
+    elif search:
+        sv = search.lower()
+        columns = [_column(rows, f) for f in SEARCH_FIELDS]
+        positions = [
+            i for i, values in enumerate(zip(*columns))
+            if any(sv in str("" if v is None else v).lower() for v in values)
+        ]
+    else:
+        positions = list(range(len(rows)))
+    if only_current:
+        current = _column(rows, "C2339")
+        positions = [i for i in positions if current[i] == 1]
+    return positions
+
+
+def sort_positions(
+    rows: Sequence[Dict[str, Any]],
+    positions: Sequence[int],
+    sort_by: str | None = None,
+    descending: bool = False,
+) -> List[int]:
+    """Return ``positions`` ordered by the column ``sort_by`` (case-insensitive)."""
+
+    if not sort_by:
+        return list(positions)
+    column = _column(rows, sort_by)
+    return sorted(positions, key=lambda i: str(column[i] or "").lower(), reverse=descending)
+
+
+def filter_rows(
+    rows: Sequence[Dict[str, Any]],
+    only_current: bool = False,
+    search: str | None = None,
+    index: Any = None,
+) -> List[Dict[str, Any]]:
+    """Return the rows matching the current-only switch and search text."""
+
+    return [rows[i] for i in filter_positions(rows, only_current, search, index)]
+
+
+def sort_rows(
+    rows: Sequence[Dict[str, Any]],
+    sort_by: str | None = None,
+    descending: bool = False,
+) -> List[Dict[str, Any]]:
+    """Return ``rows`` ordered by the column ``sort_by`` (case-insensitive)."""
+
+    return [rows[i] for i in sort_positions(rows, range(len(rows)), sort_by, descending)]
+
+
+def page_rows(rows: Sequence[Any], page: int, rows_per_page: int) -> List[Any]:
+    """Return the rows shown on ``page`` (1-based); ``0`` rows per page means all."""
+
+    if rows_per_page <= 0:
+        return list(rows)
+    page = max(1, page)
+    start = (page - 1) * rows_per_page
+    return list(rows[start:start + rows_per_page])
@@ -0,0 +1,132 @@
+"""Row-level diffs for pushing device table changes to the browser.
+
+``ui.table.update()`` resends every prop of the table, including all rows
+with their inline QR images. :class:`TableSync` instead compares the rows
+last sent with the new ones and patches the table's props in the browser
+with only the removed keys, the new or changed rows and the new order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+from typing import Any, Awaitable, Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def payload_size(data: Any) -> int:
+    """Return the size of ``data`` serialized as compact JSON in bytes."""
+
+    return len(json.dumps(data, separators=(",", ":"), default=str).encode())
+
+
+def diff_rows(old: Sequence[Dict[str, Any]], new: Sequence[Dict[str, Any]], key: str) -> Dict[str, Any]:
+    """Return the changes turning ``old`` into ``new``.
+
+    The result has ``remove`` (keys no longer shown), ``upsert`` (rows that
+    are new or changed, by key) and ``order`` (the keys of ``new`` in order).
+    """
+
+    previous = {r[key]: r for r in old}
+    current = {r[key]: r for r in new}
+    return {
+        "remove": [k for k in previous if k not in current],
+        "upsert": {k: r for k, r in current.items() if previous.get(k) != r},
+        "order": [r[key] for r in new],
+    }
+
+
+# Applies a diff to the reactive props of the table element in the browser.
+# ``mounted_app.elements`` is NiceGUI internal; the script answers ``false``
+# when it cannot find the table so that the next push sends the full table.
+_PATCH_JS = """
+(() => {
+  const el = window.mounted_app && mounted_app.elements[%(id)d];
+  if (!el) return false;
+  const patch = %(patch)s;
+  const byKey = {};
+  for (const row of el.props.rows) byKey[row[patch.key]] = row;
+  const rows = patch.order.map(k => patch.upsert[k] || byKey[k]);
+  el.props.rows.splice(0, el.props.rows.length, ...rows);
+  if (patch.pagination) el.props.pagination = patch.pagination;
+  return true;
+})();
+"""
+
+
+class TableSync:
+    """Send the rows of a NiceGUI table as diffs instead of full updates.
+
+    Parameters
+    ----------
+    table:
+        The ``ui.table`` whose ``rows`` prop is the list passed to :meth:`push`.
+    key:
+        Row field identifying a row.
+    """
+
+    def __init__(self, table: Any, key: str) -> None:
+        self.table = table
+        self.key = key
+        self.bytes_sent = 0
+        self.bytes_saved = 0
+        self._sent: List[Dict[str, Any]] | None = None
+        self._pagination: Dict[str, Any] | None = None
+
+    def reset(self) -> None:
+        """Force the next :meth:`push` to send the full table."""
+
+        self._sent = None
+
+    def push(self, rows: Sequence[Dict[str, Any]], pagination: Dict[str, Any] | None = None) -> int:
+        """Bring the browser in line with ``rows``; return the bytes sent."""
+
+        full = payload_size({"rows": rows, "pagination": pagination})
+        if self._sent is None:
+            size = full
+            self.table.update()
+        else:
+            patch = diff_rows(self._sent, rows, self.key)
+            patch["key"] = self.key
+            if pagination != self._pagination:
+                patch["pagination"] = pagination
+            size = payload_size(patch)
+            if size >= full:
+                size = full
+                self.table.update()
+            elif patch["remove"] or patch["upsert"] or "pagination" in patch or [
+                r[self.key] for r in self._sent
+            ] != patch["order"]:
+                self._run_javascript(_PATCH_JS % {"id": self.table.id, "patch": json.dumps(patch, default=str)})
+            else:
+                size = 0
+        self._sent = [dict(r) for r in rows]
+        self._pagination = dict(pagination) if pagination is not None else None
+        self.bytes_sent += size
+        self.bytes_saved += full - size
+        logger.debug("Table %s update: %d bytes sent (full update: %d bytes)", self.table.id, size, full)
+        return size
+
+    def _run_javascript(self, code: str) -> None:
+        client = self.table.client
+        try:
+            result = client.run_javascript(code, respond=True)  # NiceGUI 1.x
+        except TypeError:
+            result = client.run_javascript(code)
+        if inspect.isawaitable(result):
+            asyncio.ensure_future(self._check_patch(result))
+
+    async def _check_patch(self, result: Awaitable[Any]) -> None:
+        """Fall back to a full update if the browser did not apply a patch."""
+
+        try:
+            applied = await result
+        except Exception as e:  # timeout or disconnected client
+            logger.debug("Table %s patch got no answer: %s", self.table.id, e)
+            applied = False
+        if applied is not True:
+            logger.warning("Table %s patch was not applied, sending the full table next time", self.table.id)
+            self.reset()
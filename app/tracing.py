@@ -0,0 +1,427 @@
+"""Lightweight tracing of UI actions across fetch, render and print.
+
+Every UI action wrapped with :func:`traced` (login, load, select, print)
+opens a trace. Code running inside it records spans with :func:`span`::
+
+    with span("print_label", printer=printer_name) as s:
+        queue = _dispatch(...)
+        s.set(queue=queue)
+
+The current span is kept in a :class:`contextvars.ContextVar`, so spans of
+``asyncio`` tasks and ``asyncio.to_thread`` calls nest below the action
+that started them. Outside a trace :func:`span` does nothing but a context
+variable lookup.
+
+Finished traces are kept in memory (:func:`latest_trace`, ``TRACE_KEEP``)
+and exported as configured in ``TRACE_EXPORT``:
+
+``jsonl:<path>``
+    One JSON object per trace appended to ``path``.
+``otlp:<url>``
+    OTLP/HTTP JSON posted to ``<url>/v1/traces`` from a background thread,
+    e.g. to an OpenTelemetry collector or Jaeger (port 4318).
+
+``python -m app.tracing traces.jsonl`` prints the newest trace of a file.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = os.getenv("TRACE_SERVICE", "calserver-print")
+
+
+class Span:
+    """One timed operation of a trace with free-form attributes."""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "start", "end", "attributes", "status")
+
+    def __init__(self, name: str, trace: "Trace", parent_id: str | None = None, **attributes: Any) -> None:
+        self.name = name
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end: float | None = None
+        self.attributes: Dict[str, Any] = attributes
+        self.status = "ok"
+        trace.spans.append(self)
+
+    def set(self, **attributes: Any) -> None:
+        """Add or replace attributes."""
+
+        self.attributes.update(attributes)
+
+    def fail(self, error: BaseException) -> None:
+        self.status = "error"
+        self.attributes["error"] = f"{type(error).__name__}: {error}"
+
+    def finish(self, end: float | None = None) -> None:
+        if self.end is None:
+            self.end = time.time() if end is None else end
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoSpan:
+    """Stand-in yielded by :func:`span` outside a trace."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def fail(self, error: BaseException) -> None:
+        pass
+
+    def finish(self, end: float | None = None) -> None:
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Trace:
+    """Spans of one UI action; the first span is the root."""
+
+    def __init__(self, name: str) -> None:
+        self.id = secrets.token_hex(16)
+        self.name = name
+        # list.append is atomic, spans may be added from worker threads
+        self.spans: List[Span] = []
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "start": self.root.start,
+            "duration": self.root.duration,
+            "status": self.root.status,
+            "spans": [s.to_dict() for s in list(self.spans)],
+        }
+
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("trace_span", default=None)
+
+RECENT: Deque[Trace] = collections.deque(maxlen=int(os.getenv("TRACE_KEEP", "50")))
+EXPORTERS: List[Any] = []
+
+
+def current_span() -> Span | _NoSpan:
+    """Return the innermost open span, or :data:`NO_SPAN` outside a trace."""
+
+    return _current.get() or NO_SPAN
+
+
+def latest_trace() -> Trace | None:
+    return RECENT[-1] if RECENT else None
+
+
+@contextmanager
+def trace(name: str, **attributes: Any) -> Iterator[Span]:
+    """Open a new trace with root span ``name``; export it when done."""
+
+    root = Span(name, Trace(name), **attributes)
+    token = _current.set(root)
+    try:
+        yield root
+    except asyncio.CancelledError:
+        root.status = "cancelled"
+        raise
+    except BaseException as e:
+        root.fail(e)
+        raise
+    finally:
+        _current.reset(token)
+        root.finish()
+        _finish(root.trace)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | _NoSpan]:
+    """Record ``name`` as child of the current span (no-op outside a trace)."""
+
+    parent = _current.get()
+    if parent is None:
+        yield NO_SPAN
+        return
+    child = Span(name, parent.trace, parent.span_id, **attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except asyncio.CancelledError:
+        child.status = "cancelled"
+        raise
+    except BaseException as e:
+        child.fail(e)
+        raise
+    finally:
+        _current.reset(token)
+        child.finish()
+
+
+def start_span(name: str, **attributes: Any) -> Span | _NoSpan:
+    """Return a child of the current span without making it current.
+
+    For generators and callbacks, which may resume in another context; call
+    :meth:`Span.finish` when done.
+    """
+
+    parent = _current.get()
+    if parent is None:
+        return NO_SPAN
+    return Span(name, parent.trace, parent.span_id, **attributes)
+
+
+def record(name: str, seconds: float, **attributes: Any) -> None:
+    """Add a finished child span of ``seconds`` ending now.
+
+    Used for work summed over many small steps (e.g. building rows chunk
+    by chunk), which would otherwise produce hundreds of spans.
+    """
+
+    child = start_span(name, **attributes)
+    if isinstance(child, Span):
+        child.start = time.time() - seconds
+        child.finish(child.start + seconds)
+
+
+def traced(
+    action: str,
+    on_finish: Callable[[Trace], None] | None = None,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator running the function inside a new trace ``action``.
+
+    ``on_finish(trace)`` is called with every finished trace, e.g. to keep
+    the latest one of a session. A cancelled coroutine (such as a debounced
+    action superseded by a newer one) ends its trace with status
+    ``"cancelled"`` and is not passed to ``on_finish``.
+    """
+
+    def decorate(func: Callable[..., Any]) -> Callable[..., Any]:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with trace(action) as root:
+                    cancelled = False
+                    try:
+                        return await func(*args, **kwargs)
+                    except asyncio.CancelledError:
+                        cancelled = True
+                        raise
+                    finally:
+                        if on_finish and not cancelled:
+                            on_finish(root.trace)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with trace(action) as root:
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    if on_finish:
+                        on_finish(root.trace)
+
+        return wrapper
+
+    return decorate
+
+
+def _finish(finished: Trace) -> None:
+    RECENT.append(finished)
+    for exporter in EXPORTERS:
+        try:
+            exporter.export(finished)
+        except Exception as e:  # tracing must never break the action
+            logger.warning("Exporting trace %s failed: %s", finished.id, e)
+
+
+def format_trace(finished: Trace | None) -> List[str]:
+    """Return ``finished`` as indented lines with durations and attributes."""
+
+    if finished is None:
+        return ["Noch kein Ablauf aufgezeichnet"]
+    children: Dict[str | None, List[Span]] = {}
+    for s in sorted(finished.spans, key=lambda s: s.start):
+        children.setdefault(s.parent_id, []).append(s)
+    lines: List[str] = []
+
+    def walk(s: Span, depth: int) -> None:
+        attrs = " ".join(f"{k}={v}" for k, v in s.attributes.items())
+        flag = {"error": " FEHLER", "cancelled": " ABGEBROCHEN"}.get(s.status, "")
+        lines.append(f"{'  ' * depth}{s.name} {s.duration * 1000:.0f} ms{flag} {attrs}".rstrip())
+        for child in children.get(s.span_id, []):
+            walk(child, depth + 1)
+
+    walk(finished.root, 0)
+    return lines
+
+
+class JsonlExporter:
+    """Append every trace as one JSON line to ``path``."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, finished: Trace) -> None:
+        line = json.dumps(finished.to_dict(), default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(finished: Trace, service: str = SERVICE_NAME) -> Dict[str, Any]:
+    """Return ``finished`` as OTLP/JSON ``ExportTraceServiceRequest``."""
+
+    spans = []
+    for s in list(finished.spans):
+        item = {
+            "traceId": finished.id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(int(s.start * 1e9)),
+            "endTimeUnixNano": str(int((s.start + s.duration) * 1e9)),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+            "status": {"code": 2, "message": s.attributes.get("error", "")} if s.status == "error" else {"code": 1},
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        spans.append(item)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+        }]
+    }
+
+
+class OtlpExporter:
+    """Post traces as OTLP/HTTP JSON from a background thread.
+
+    Parameters
+    ----------
+    endpoint:
+        Collector base URL; traces go to ``<endpoint>/v1/traces``.
+    max_queue:
+        Traces waiting for export; further ones are dropped.
+    """
+
+    def __init__(self, endpoint: str, service: str = SERVICE_NAME, max_queue: int = 1000, timeout: float = 5.0) -> None:
+        endpoint = endpoint.rstrip("/")
+        self.url = endpoint if endpoint.endswith("/v1/traces") else endpoint + "/v1/traces"
+        self.service = service
+        self.timeout = timeout
+        self.dropped = 0
+        self._queue: "queue.Queue[Trace | None]" = queue.Queue(max_queue)
+        self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+        self._thread.start()
+
+    def export(self, finished: Trace) -> None:
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            finished = self._queue.get()
+            if finished is None:
+                return
+            body = json.dumps(to_otlp(finished, self.service)).encode("utf-8")
+            request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout):
+                    pass
+            except Exception as e:
+                logger.warning("Posting trace %s to %s failed: %s", finished.id, self.url, e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until all queued traces were posted."""
+
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join(self.timeout)
+
+
+def configure(spec: str | None = None) -> None:
+    """Set the exporters from ``spec`` (default: ``TRACE_EXPORT``)."""
+
+    spec = os.getenv("TRACE_EXPORT", "") if spec is None else spec
+    EXPORTERS.clear()
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        kind, _, target = item.partition(":")
+        if kind == "jsonl" and target:
+            EXPORTERS.append(JsonlExporter(target))
+        elif kind == "otlp" and target:
+            EXPORTERS.append(OtlpExporter(target))
+        else:
+            logger.warning("Ignoring trace export %r (use jsonl:<path> or otlp:<url>)", item)
+
+
+configure()
+
+
+def _load_latest(path: str) -> Trace:
+    with open(path, encoding="utf-8") as fh:
+        data = json.loads(fh.readlines()[-1])
+    loaded = Trace(data["name"])
+    loaded.id = data["trace_id"]
+    for item in data["spans"]:
+        s = Span(item["name"], loaded, item["parent_id"], **item["attributes"])
+        s.span_id, s.start, s.status = item["span_id"], item["start"], item["status"]
+        s.finish(s.start + item["duration"])
+    return loaded
+
+
+if __name__ == "__main__":
+    print("\n".join(format_trace(_load_latest(sys.argv[1] if len(sys.argv) > 1 else "traces.jsonl"))))
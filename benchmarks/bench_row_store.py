@@ -0,0 +1,67 @@
+"""Memory benchmark: list of row dicts versus :class:`app.row_store.RowStore`.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_row_store 10000 100000
+
+The "dicts" variant reproduces the former row layout including the stored
+base64 QR thumbnail and preview snippet.
+"""
+
+from __future__ import annotations
+
+import sys
+import tracemalloc
+
+from app.row_store import RowStore, row_from_entry
+from benchmarks.synthetic import make_calibration_entries
+
+# Size of a typical 80x80 PNG QR data URL as previously stored per row
+QR_DATA_URL_LENGTH = 1200
+PREVIEW = "<span style='cursor:pointer;color:blue'>Vorschau</span>"
+
+
+def _measure(build) -> int:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = build()  # noqa: F841 - keep the result alive while measuring
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used
+
+
+def run(count: int) -> dict:
+    entries = make_calibration_entries(count)
+
+    def as_dicts():
+        rows = []
+        for i, entry in enumerate(entries):
+            row = row_from_entry(entry)
+            # every row used to carry its own QR data URL
+            row["qrcode"] = "data:image/png;base64," + f"{i:08d}" * (QR_DATA_URL_LENGTH // 8)
+            row["preview"] = PREVIEW
+            rows.append(row)
+        return rows
+
+    def as_store():
+        store = RowStore()
+        store.extend(row_from_entry(e) for e in entries)
+        return store
+
+    return {"rows": count, "dicts": _measure(as_dicts), "store": _measure(as_store)}
+
+
+def main(argv: list[str]) -> None:
+    sizes = [int(a) for a in argv] or [10_000, 100_000]
+    print(f"{'rows':>8} {'dicts MiB':>10} {'store MiB':>10} {'ratio':>6}")
+    for count in sizes:
+        result = run(count)
+        print(
+            f"{count:>8} {result['dicts'] / 2**20:>10.1f} {result['store'] / 2**20:>10.1f}"
+            f" {result['dicts'] / max(result['store'], 1):>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,118 @@
+"""Startup benchmark: time to the login page and latency of the first print.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup            # both measurements
+    python -m benchmarks.bench_startup --skip-server
+
+``ready`` starts ``launcher.py --port 0`` and waits for its readiness
+line, ``login page`` then fetches ``/``. ``first print`` renders a label
+to PDF in a fresh interpreter, once cold and once after
+:func:`app.startup.warm_up` as done in the background after the server is
+listening; spooling is not included.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+from app.startup import READY_PREFIX
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_FIRST_PRINT = """
+import json, time
+warm = {warm}
+if warm:
+    from app.startup import warm_up
+    warm_up()
+start = time.perf_counter()
+from app.label_templates import render_label_template
+from app.svg_utils import svg_to_pdf_bytes
+svg = render_label_template("Standard", "Multimeter", "2030-01-01", "https://example.com/qrcode/MT-1")
+svg_to_pdf_bytes(svg)
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+
+def time_to_login_page(timeout: float = 60.0) -> tuple[float, float]:
+    """Start the app on a free port; return seconds until ready and until ``/`` answers."""
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "launcher.py"), "--port", "0"],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    try:
+        timer = threading.Timer(timeout, proc.kill)
+        timer.start()
+        try:
+            for line in proc.stdout:
+                if line.startswith(READY_PREFIX):
+                    url = line.split(maxsplit=1)[1].strip()
+                    break
+            else:
+                raise RuntimeError(f"App exited with code {proc.wait()} before it was ready")
+            ready = time.perf_counter() - start
+            with urllib.request.urlopen(url + "/", timeout=timeout) as response:
+                response.read()
+            return ready, time.perf_counter() - start
+        finally:
+            timer.cancel()
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def first_print_latency(warm: bool) -> float:
+    """Return the seconds of the first label render in a fresh interpreter."""
+
+    result = subprocess.run(
+        [sys.executable, "-c", _FIRST_PRINT.format(warm=warm)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])["seconds"]
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--skip-server", action="store_true", help="Only measure the first print.")
+    args = parser.parse_args(argv)
+
+    results: dict[str, list[float]] = {"first print cold": [], "first print warm": []}
+    if not args.skip_server:
+        results["ready"] = []
+        results["login page"] = []
+    for _ in range(args.rounds):
+        if not args.skip_server:
+            ready, login = time_to_login_page()
+            results["ready"].append(ready)
+            results["login page"].append(login)
+        results["first print cold"].append(first_print_latency(warm=False))
+        results["first print warm"].append(first_print_latency(warm=True))
+
+    print(f"{'measurement':<18} {'min ms':>8} {'median ms':>10}")
+    for name, values in results.items():
+        values.sort()
+        print(f"{name:<18} {values[0] * 1000:>8.0f} {values[len(values) // 2] * 1000:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
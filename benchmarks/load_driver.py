@@ -0,0 +1,271 @@
+"""Load driver simulating concurrent operators against a running label tool.
+
+Start the mock calServer and the app, then drive N sessions::
+
+    python -m benchmarks.mock_calserver --rows 50000 --latency 0.2 &
+    python launcher.py --port 8080 &
+    python -m benchmarks.load_driver --sessions 20 --duration 120 \\
+        --app http://127.0.0.1:8080 --calserver http://127.0.0.1:8765
+
+``browser`` mode (default) uses Playwright (``pip install playwright &&
+playwright install chromium``). Every session opens its own browser
+context and repeats login → load → search → preview → print. ``api`` mode
+needs no browser: it fetches the login page and prints through
+``/api/print``. The app looks up the labels on the calServer configured by
+``CALSERVER_*``, so point that at the mock as well. A virtual printer
+(``PRINTER_BACKENDS``) lets the print step run on machines without one.
+
+The report lists p50/p95/p99 latency per step and completed flows per
+second; ``--json`` writes it to a file as well.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List
+
+from benchmarks.synthetic import DEVICES
+
+# Labels of the NiceGUI widgets the browser sessions interact with
+LOGIN_FIELDS = ("API URL", "Benutzername", "Passwort", "API Key")
+LOGIN_BUTTON = "LOGIN"
+SEARCH_FIELD = "Gerätename suchen"
+PRINT_BUTTON = "Drucken"
+TABLE_ROWS = ".q-table tbody tr"
+NOTIFICATION = ".q-notification"
+
+STEPS = ("login_page", "login", "load", "search", "preview", "print")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Return the ``q`` (0..100) percentile of ``values`` with linear interpolation."""
+
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Recorder:
+    """Latencies per step, failures and completed flows of all sessions."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.flows = 0
+        self.started = time.perf_counter()
+
+    def record(self, step: str, seconds: float) -> None:
+        self.latencies.setdefault(step, []).append(seconds)
+
+    def fail(self, step: str) -> None:
+        self.errors[step] = self.errors.get(step, 0) + 1
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        steps = {}
+        for step, values in self.latencies.items():
+            steps[step] = {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "errors": self.errors.get(step, 0),
+            }
+        for step, count in self.errors.items():
+            steps.setdefault(step, {"count": 0, "p50": None, "p95": None, "p99": None, "errors": count})
+        return {
+            "seconds": elapsed,
+            "flows": self.flows,
+            "flows_per_second": self.flows / elapsed if elapsed else 0.0,
+            "steps": steps,
+        }
+
+
+class _Step:
+    """``async with _Step(recorder, "load"):`` records the duration or a failure."""
+
+    def __init__(self, recorder: Recorder, name: str) -> None:
+        self.recorder = recorder
+        self.name = name
+
+    async def __aenter__(self) -> "_Step":
+        self.start = time.perf_counter()
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        if exc_type is None:
+            self.recorder.record(self.name, time.perf_counter() - self.start)
+        elif exc_type is not asyncio.CancelledError:
+            self.recorder.fail(self.name)
+        return False
+
+
+async def browser_session(browser: Any, args: argparse.Namespace, recorder: Recorder, deadline: float) -> None:
+    """Repeat the operator flow in one browser context until ``deadline``."""
+
+    rnd = random.Random()
+    context = await browser.new_context()
+    page = await context.new_page()
+    page.set_default_timeout(args.timeout * 1000)
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                async with _Step(recorder, "login_page"):
+                    await page.goto(args.app)
+                    await page.get_by_label(LOGIN_FIELDS[0]).wait_for()
+                values = (args.calserver, args.username, args.password, args.api_key)
+                for label, value in zip(LOGIN_FIELDS, values):
+                    await page.get_by_label(label).fill(value)
+                async with _Step(recorder, "login"):
+                    await page.get_by_role("button", name=LOGIN_BUTTON).click()
+                    await page.wait_for_url("**/app")
+                async with _Step(recorder, "load"):
+                    await page.locator(TABLE_ROWS).first.wait_for()
+                term = rnd.choice(DEVICES)
+                async with _Step(recorder, "search"):
+                    await page.get_by_label(SEARCH_FIELD).fill(term)
+                    await page.wait_for_function(
+                        """([selector, term]) => {
+                            const rows = [...document.querySelectorAll(selector)];
+                            return rows.length > 0 && rows.every(r => r.innerText.includes(term));
+                        }""",
+                        arg=[TABLE_ROWS, term],
+                    )
+                async with _Step(recorder, "preview"):
+                    await page.locator(TABLE_ROWS).nth(rnd.randrange(await page.locator(TABLE_ROWS).count())).click()
+                    info = page.get_by_text(re.compile(r"^I4201: .+, C2303: "))
+                    await info.wait_for()
+                    name = (await info.inner_text()).split(",")[0][len("I4201: "):]
+                    await page.locator("svg text", has_text=name).first.wait_for()
+                async with _Step(recorder, "print"):
+                    await page.get_by_role("button", name=PRINT_BUTTON).click()
+                    notice = page.locator(NOTIFICATION, has_text=re.compile("Printed on|Error|Renderer"))
+                    await notice.last.wait_for()
+                    if "Printed on" not in await notice.last.inner_text():
+                        raise RuntimeError(await notice.last.inner_text())
+                recorder.flows += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await context.clear_cookies()
+    finally:
+        await context.close()
+
+
+async def run_browser(args: argparse.Namespace, recorder: Recorder) -> None:
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError:
+        sys.exit("browser mode needs Playwright: pip install playwright && playwright install chromium")
+    deadline = time.perf_counter() + args.duration
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=not args.headed)
+        try:
+            await asyncio.gather(*(browser_session(browser, args, recorder, deadline) for _ in range(args.sessions)))
+        finally:
+            await browser.close()
+
+
+def _request(url: str, body: Dict[str, Any] | None = None, token: str | None = None, timeout: float = 30) -> Any:
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, headers=headers)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        payload = response.read()
+    return json.loads(payload) if response.headers.get_content_type() == "application/json" else payload
+
+
+async def api_session(args: argparse.Namespace, recorder: Recorder, deadline: float) -> None:
+    """Repeat login page → print request → finished job until ``deadline``."""
+
+    rnd = random.Random()
+    base = args.app.rstrip("/")
+    while time.perf_counter() < deadline:
+        try:
+            async with _Step(recorder, "login_page"):
+                await asyncio.to_thread(_request, base + "/", None, None, args.timeout)
+            mtags = [f"MT{rnd.randrange(args.rows):07d}" for _ in range(args.labels)]
+            body = {"mtags": mtags, "template": args.template, "printer": args.printer}
+            async with _Step(recorder, "submit"):
+                job = await asyncio.to_thread(_request, base + "/api/print", body, args.token, args.timeout)
+            async with _Step(recorder, "print"):
+                while True:
+                    state = await asyncio.to_thread(_request, f"{base}/api/jobs/{job['job_id']}", None, args.token)
+                    if state["status"] in ("done", "failed"):
+                        break
+                    await asyncio.sleep(0.05)
+                if state["status"] != "done":
+                    raise RuntimeError(state.get("errors"))
+            recorder.flows += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await asyncio.sleep(0.1)
+
+
+async def run_api(args: argparse.Namespace, recorder: Recorder) -> None:
+    deadline = time.perf_counter() + args.duration
+    await asyncio.gather(*(api_session(args, recorder, deadline) for _ in range(args.sessions)))
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'step':<12} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    order = list(STEPS) + ["submit"]
+    for step in sorted(report["steps"], key=lambda s: order.index(s) if s in order else len(order)):
+        values = report["steps"][step]
+        cells = [f"{values[p] * 1000:>9.0f}" if values[p] is not None else f"{'-':>9}" for p in ("p50", "p95", "p99")]
+        lines.append(f"{step:<12} {values['count']:>6} {values['errors']:>6} {' '.join(cells)}")
+    lines.append(f"{report['flows']} flows in {report['seconds']:.1f} s ({report['flows_per_second']:.2f}/s)")
+    return "\n".join(lines)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Simulate concurrent label tool sessions.")
+    parser.add_argument("--mode", choices=("browser", "api"), default="browser")
+    parser.add_argument("--app", default="http://127.0.0.1:8080")
+    parser.add_argument("--calserver", default="http://127.0.0.1:8765", help="calServer URL entered at login.")
+    parser.add_argument("--username", default="load-test")
+    parser.add_argument("--password", default="load-test")
+    parser.add_argument("--api-key", default="load-test")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds per step before it counts as failed.")
+    parser.add_argument("--headed", action="store_true", help="Show the browser windows.")
+    parser.add_argument("--printer", help="Printer of api mode print jobs.")
+    parser.add_argument("--template", default="Standard")
+    parser.add_argument("--labels", type=int, default=1, help="Labels per print request in api mode.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Rows of the mock calServer (api mode MTAGs).")
+    parser.add_argument("--token", help="PRINT_API_TOKEN of the app.")
+    parser.add_argument("--json", metavar="PATH", help="Also write the report as JSON.")
+    args = parser.parse_args(argv)
+    if args.mode == "api" and not args.printer:
+        parser.error("--printer is required in api mode")
+    return args
+
+
+def main(argv: List[str]) -> None:
+    args = parse_args(argv)
+    recorder = Recorder()
+    asyncio.run(run_browser(args, recorder) if args.mode == "browser" else run_api(args, recorder))
+    report = recorder.report()
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
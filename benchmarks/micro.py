@@ -0,0 +1,282 @@
+"""Microbenchmarks of the hot paths with JSON baselines.
+
+Run from the repository root::
+
+    python -m benchmarks.micro --save main        # record a baseline
+    python -m benchmarks.micro --compare main     # exit 1 on regressions
+    python -m benchmarks.micro -k qr --quick
+
+Baselines are written to ``benchmarks/baselines/<name>.json``. They depend
+on the machine, so they are not committed; record one on the base branch
+and compare the working tree against it. A case regresses when its median
+is more than ``--threshold`` (default 25 %) slower than in the baseline.
+Cases whose libraries are not installed are skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from benchmarks.synthetic import make_calibration_entries
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+QR_DATA = "https://calserver.example.com/qrcode/MT0000042"
+# 80 px table thumbnails, 100 px on labels, 200 px in previews
+QR_SIZES = (80, 100, 200)
+ROW_COUNTS = (1_000, 10_000, 100_000)
+
+Case = Callable[[], Callable[[], Any]]
+CASES: List[Tuple[str, Case]] = []
+
+
+def case(name: str) -> Callable[[Case], Case]:
+    """Register ``setup`` as benchmark ``name``.
+
+    ``setup`` prepares the input and returns the callable to be timed. An
+    :class:`ImportError` raised by either skips the case.
+    """
+
+    def register(setup: Case) -> Case:
+        CASES.append((name, setup))
+        return setup
+
+    return register
+
+
+def measure(func: Callable[[], Any], min_time: float = 0.2, rounds: int = 7) -> Dict[str, float]:
+    """Time ``func`` in ``rounds`` rounds of at least ``min_time`` seconds each.
+
+    Returns ``min``, ``median`` and ``stdev`` seconds per call.
+    """
+
+    func()  # warm caches
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4 or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < min_time / 40 else 2
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        times.append((time.perf_counter() - start) / loops)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "loops": loops,
+    }
+
+
+def _label_svg() -> str:
+    from app.label_templates import render_label_template
+
+    return render_label_template("Standard", "Multimeter 42", "2030-01-01", QR_DATA)
+
+
+for _size in QR_SIZES:
+    @case(f"qr.generate[{_size}]")
+    def _qr_generate(size: int = _size) -> Callable[[], Any]:
+        from app.qrcode_utils import generate_qr_code
+
+        return lambda: generate_qr_code(QR_DATA, size=size)
+
+    @case(f"qr.data_url[{_size}]")
+    def _qr_data_url(size: int = _size) -> Callable[[], Any]:
+        from app.qrcode_utils import generate_qr_code_data_url
+
+        return lambda: generate_qr_code_data_url(QR_DATA, size=size)
+
+
+for _template in ("Standard", "Einfach"):
+    @case(f"template.label[{_template}]")
+    def _label_template(template: str = _template) -> Callable[[], Any]:
+        from app.label_templates import render_label_template
+
+        return lambda: render_label_template(template, "Multimeter 42", "2030-01-01", QR_DATA)
+
+
+@case("label.raster[device_label]")
+def _raster_label() -> Callable[[], Any]:
+    from app.label_templates import device_label
+
+    # with LABEL_FONT set, text comes from the font manager's caches
+    return lambda: device_label("Multimeter 42", "2030-01-01", QR_DATA)
+
+
+for _template in ("Standard", "Modern"):
+    @case(f"template.preview[{_template}]")
+    def _preview_template(template: str = _template) -> Callable[[], Any]:
+        from app.artifacts import QR_CACHE
+        from app.preview_templates import render_preview_template
+
+        def run() -> str:
+            QR_CACHE.clear()  # a new device needs a new QR code
+            return render_preview_template(template, "Multimeter 42", "2030-01-01", QR_DATA)
+
+        return run
+
+
+for _backend in ("svglib", "cairosvg"):
+    for _fmt in ("png", "pdf"):
+        @case(f"convert.{_fmt}[{_backend}]")
+        def _convert(backend: str = _backend, fmt: str = _fmt) -> Callable[[], Any]:
+            from app import svg_utils
+
+            if backend not in svg_utils.available_backends():
+                raise ImportError(f"{backend} is not installed")
+            svg = _label_svg()
+
+            def run() -> Any:
+                svg_utils.DRAWING_CACHE.clear()  # parse like a label not seen before
+                return svg_utils._render_with(backend, svg, fmt)
+
+            return run
+
+
+for _count in ROW_COUNTS:
+    @case(f"table.filter[{_count}]")
+    def _filter(count: int = _count) -> Callable[[], Any]:
+        from app.row_store import RowStore, row_from_entry
+        from app.table_data import filter_positions
+
+        rows = RowStore()
+        rows.extend(row_from_entry(e) for e in make_calibration_entries(count))
+        return lambda: filter_positions(rows, only_current=True, search="waage")
+
+    @case(f"table.filter_indexed[{_count}]")
+    def _filter_indexed(count: int = _count) -> Callable[[], Any]:
+        from app.row_store import RowStore, row_from_entry
+        from app.search_index import SearchIndex
+        from app.table_data import filter_positions
+
+        rows = RowStore()
+        rows.extend(row_from_entry(e) for e in make_calibration_entries(count))
+        index = SearchIndex()
+        index.extend(rows)
+        return lambda: filter_positions(rows, only_current=True, search="waage", index=index)
+
+    @case(f"rows.build[{_count}]")
+    def _build_rows(count: int = _count) -> Callable[[], Any]:
+        from app.row_store import RowStore, row_from_entry
+
+        entries = make_calibration_entries(count)
+
+        def run() -> RowStore:
+            rows = RowStore()
+            rows.extend(row_from_entry(e) for e in entries)
+            return rows
+
+        return run
+
+
+def run_cases(pattern: str | None = None, quick: bool = False) -> Iterator[Tuple[str, Dict[str, float] | None]]:
+    """Yield ``(name, timings)`` per case; ``timings`` is ``None`` when skipped."""
+
+    for name, setup in CASES:
+        if pattern and pattern not in name:
+            continue
+        try:
+            func = setup()
+            func()  # lazily imported libraries
+        except ImportError:
+            yield name, None
+            continue
+        yield name, measure(func, min_time=0.05, rounds=3) if quick else measure(func)
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[Tuple[str, float, float, float]]:
+    """Return ``(name, baseline, current, ratio)`` of cases slower than ``threshold``."""
+
+    regressions = []
+    for name, timings in results.items():
+        if name not in baseline:
+            continue
+        before, now = baseline[name]["median"], timings["median"]
+        ratio = now / before if before > 0 else 1.0
+        if ratio > 1 + threshold:
+            regressions.append((name, before, now, ratio))
+    return regressions
+
+
+def baseline_path(name: str) -> str:
+    return name if name.endswith(".json") else os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(name: str, results: Dict[str, Dict[str, float]]) -> str:
+    path = baseline_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()} {platform.processor()}".strip(),
+            "results": results,
+        }, fh, indent=2, sort_keys=True)
+    return path
+
+
+def load_baseline(name: str) -> Dict[str, Dict[str, float]]:
+    with open(baseline_path(name), encoding="utf-8") as fh:
+        return json.load(fh)["results"]
+
+
+def _format(seconds: float) -> str:
+    for unit, factor in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= factor:
+            return f"{seconds / factor:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the label tool hot paths.")
+    parser.add_argument("-k", dest="pattern", help="Only run cases containing this text.")
+    parser.add_argument("--quick", action="store_true", help="Fewer, shorter rounds.")
+    parser.add_argument("--save", metavar="NAME", help="Store the results as baseline NAME.")
+    parser.add_argument("--compare", metavar="NAME", help="Compare against baseline NAME.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%).")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.compare) if args.compare else {}
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'case':<30} {'median':>10} {'min':>10} {'baseline':>10}")
+    for name, timings in run_cases(args.pattern, args.quick):
+        if timings is None:
+            print(f"{name:<30} {'skipped':>10}")
+            continue
+        results[name] = timings
+        before = _format(baseline[name]["median"]) if name in baseline else "-"
+        print(f"{name:<30} {_format(timings['median']):>10} {_format(timings['min']):>10} {before:>10}")
+
+    if args.save:
+        print(f"Baseline written to {save_baseline(args.save, results)}")
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, now, ratio in regressions:
+            print(f"REGRESSION {name}: {_format(before)} -> {_format(now)} ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
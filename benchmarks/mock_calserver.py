@@ -0,0 +1,235 @@
+"""Local stand-in for calServer's ``/api/calibration`` used in load tests.
+
+Run from the repository root and log in with the printed URL::
+
+    python -m benchmarks.mock_calserver --rows 50000 --latency 0.2 \\
+        --jitter 0.1 --error-rate 0.02 --port 8765
+
+Requests take the same query parameters as calServer
+(``HTTP_X_REST_USERNAME``, ``HTTP_X_REST_PASSWORD``,
+``HTTP_X_REST_API_KEY``, ``filter``) and are answered with
+``{"data": {"calibration": [...]}}`` built from
+:func:`benchmarks.synthetic.make_calibration_entries`. ``limit`` and
+``offset`` page through the result. Filters are validated: unknown
+properties or operators are answered with HTTP 400, wrong credentials with
+401. ``--error-rate`` answers a share of requests with HTTP 503.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import make_calibration_entries
+
+logger = logging.getLogger(__name__)
+
+TOP_LEVEL_FIELDS = ("C2301", "C2303", "C2339", "MTAG")
+INVENTORY_FIELDS = ("I4201", "I4202", "I4203", "I4204", "I4206")
+
+
+def _compare(op: str) -> Callable[[Any, Any], bool]:
+    def like(actual: Any, expected: Any) -> bool:
+        return str(expected).strip("%").lower() in str(actual or "").lower()
+
+    return {
+        "=": lambda a, b: str(a) == str(b),
+        "!=": lambda a, b: str(a) != str(b),
+        "<": lambda a, b: a is not None and str(a) < str(b),
+        "<=": lambda a, b: a is not None and str(a) <= str(b),
+        ">": lambda a, b: a is not None and str(a) > str(b),
+        ">=": lambda a, b: a is not None and str(a) >= str(b),
+        "in": lambda a, b: str(a) in {str(v) for v in b},
+        "like": like,
+    }[op]
+
+
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "in", "like")
+
+
+def _field(entry: Dict[str, Any], name: str) -> Any:
+    if name in TOP_LEVEL_FIELDS:
+        return entry.get(name)
+    return (entry.get("inventory") or {}).get(name)
+
+
+def parse_filter(text: str | None) -> List[Tuple[str, str, Any]]:
+    """Return ``(property, operator, value)`` conditions of a ``filter`` parameter.
+
+    Accepts a list of ``{"property", "value", "operator"}`` objects as sent
+    by the app, or a ``{"property": value}`` shorthand. Raises
+    :class:`ValueError` for anything calServer would reject.
+    """
+
+    if not text:
+        return []
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"filter is not valid JSON: {e}") from None
+    if isinstance(data, dict):
+        data = [{"property": k, "value": v, "operator": "="} for k, v in data.items()]
+    if not isinstance(data, list):
+        raise ValueError("filter must be a list or an object")
+    conditions = []
+    for item in data:
+        if not isinstance(item, dict) or "property" not in item or "value" not in item:
+            raise ValueError(f"invalid filter condition: {item!r}")
+        prop, op, value = item["property"], item.get("operator", "="), item["value"]
+        if prop not in TOP_LEVEL_FIELDS + INVENTORY_FIELDS:
+            raise ValueError(f"unknown filter property: {prop}")
+        if op not in OPERATORS:
+            raise ValueError(f"unknown filter operator: {op}")
+        if op == "in" and not isinstance(value, list):
+            raise ValueError("operator 'in' needs a list value")
+        conditions.append((prop, op, value))
+    return conditions
+
+
+def apply_filter(entries: List[Dict[str, Any]], conditions: List[Tuple[str, str, Any]]) -> List[Dict[str, Any]]:
+    """Return the entries matching all ``conditions``."""
+
+    checks = [(prop, _compare(op), value) for prop, op, value in conditions]
+    return [e for e in entries if all(check(_field(e, prop), value) for prop, check, value in checks)]
+
+
+class MockCalServer:
+    """Threaded HTTP server answering ``/api/calibration`` from synthetic data.
+
+    Parameters
+    ----------
+    rows:
+        Number of calibration entries.
+    latency:
+        Seconds added before every response.
+    jitter:
+        Upper bound of random extra seconds per response.
+    error_rate:
+        Share of requests (0..1) answered with HTTP 503.
+    credentials:
+        ``(username, password, api_key)`` to accept; ``None`` accepts any
+        non-empty values.
+    seed:
+        Seed of the data generator and of the random latency/errors.
+    """
+
+    def __init__(
+        self,
+        rows: int = 10_000,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        credentials: Tuple[str, str, str] | None = None,
+        seed: int = 0,
+    ) -> None:
+        self.entries = make_calibration_entries(rows, seed=seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.credentials = credentials
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    def _handler(self) -> type:
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug(format, *args)
+
+            def _send(self, status: int, payload: Any) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                # in pieces, like a large response arriving over the network
+                for start in range(0, len(body), 65536):
+                    self.wfile.write(body[start:start + 65536])
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                if url.path.rstrip("/") != "/api/calibration":
+                    self._send(404, {"success": False, "message": "not found"})
+                    return
+                status, payload = mock.respond({k: v[-1] for k, v in parse_qs(url.query).items()})
+                self._send(status, payload)
+
+        return Handler
+
+    def respond(self, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        """Return ``(status, payload)`` for the query ``params`` of one request."""
+
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failing = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failing:
+            return 503, {"success": False, "message": "Service temporarily unavailable"}
+        given = tuple(params.get(k, "") for k in ("HTTP_X_REST_USERNAME", "HTTP_X_REST_PASSWORD", "HTTP_X_REST_API_KEY"))
+        if not all(given) or (self.credentials is not None and given != tuple(self.credentials)):
+            return 401, {"success": False, "message": "Invalid credentials"}
+        try:
+            conditions = parse_filter(params.get("filter"))
+            offset = int(params.get("offset", 0))
+            limit = int(params["limit"]) if "limit" in params else None
+            if offset < 0 or (limit is not None and limit < 0):
+                raise ValueError("offset and limit must not be negative")
+        except ValueError as e:
+            return 400, {"success": False, "message": str(e)}
+        matches = apply_filter(self.entries, conditions)
+        page = matches[offset:] if limit is None else matches[offset:offset + limit]
+        return 200, {"success": True, "data": {"total": len(matches), "calibration": page}}
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on a background thread; return the base URL."""
+
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="mock-calserver", daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Mock calServer for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra seconds (upper bound).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 503.")
+    parser.add_argument("--credentials", nargs=3, metavar=("USER", "PASSWORD", "API_KEY"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = MockCalServer(args.rows, args.latency, args.jitter, args.error_rate, args.credentials, args.seed)
+    url = server.start(args.host, args.port)
+    print(f"Mock calServer with {args.rows} entries at {url}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
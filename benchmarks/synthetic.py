@@ -0,0 +1,36 @@
+"""Synthetic calServer payloads for benchmarks and load tests."""
+
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+DEVICES = ["Multimeter", "Waage", "Druckmesser", "Thermometer", "Oszilloskop", "Messschieber", "Pipette"]
+MANUFACTURERS = ["Fluke", "Sartorius", "WIKA", "Keysight", "Mettler Toledo", "Testo", "Hioki", "Mitutoyo"]
+
+
+def make_calibration_entries(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Return ``count`` calibration entries shaped like ``/api/calibration`` data."""
+
+    rnd = random.Random(seed)
+    start = date(2020, 1, 1)
+    entries = []
+    for i in range(count):
+        calibrated = start + timedelta(days=rnd.randint(0, 5 * 365))
+        expires = calibrated + timedelta(days=rnd.choice([365, 730]))
+        device = rnd.choice(DEVICES)
+        entries.append({
+            "C2301": calibrated.isoformat(),
+            "C2303": expires.isoformat(),
+            "C2339": rnd.choice([0, 1, 1, 1]),
+            "MTAG": f"MT{i:07d}",
+            "inventory": {
+                "I4201": f"{device} {rnd.randint(1, 500)}",
+                "I4202": rnd.choice(MANUFACTURERS),
+                "I4203": f"{device[:2].upper()}-{rnd.randint(100, 999)}",
+                "I4204": rnd.choice(["-", "", f"{device} Labor {rnd.randint(1, 9)}"]),
+                "I4206": f"SN{rnd.randint(0, 10**8):08d}",
+            },
+        })
+    return entries
@@ -1,10 +1,15 @@
 const { app, BrowserWindow } = require("electron");
 const { spawn } = require("child_process");
+const fs = require("fs");
+const os = require("os");
 const path = require("path");
 const isDev = require("electron-is-dev");
-const waitOn = require("wait-on");
+
+const READY_PREFIX = "LABELTOOL_READY ";
+const READY_TIMEOUT = 30000;
 
 let childProcess;
+let readyFile;
 
 function terminateChild() {
   if (!childProcess) {
@@ -18,6 +23,57 @@ function terminateChild() {
   }
 
   childProcess = undefined;
+  if (readyFile) {
+    fs.rm(readyFile, { force: true }, () => {});
+  }
+}
+
+// Resolve with the backend URL as soon as it accepts connections. The
+// backend prints it on stdout and writes it to the ready file; windowed
+// builds may have no stdout, so the file is checked as well.
+function waitForBackend(child, file) {
+  return new Promise((resolve, reject) => {
+    let buffer = "";
+    let done = false;
+    const finish = (err, url) => {
+      if (done) {
+        return;
+      }
+      done = true;
+      clearInterval(poll);
+      clearTimeout(timer);
+      if (err) {
+        reject(err);
+      } else {
+        resolve(url);
+      }
+    };
+
+    if (child.stdout) {
+      child.stdout.on("data", (chunk) => {
+        buffer += chunk.toString();
+        const lines = buffer.split(/\r?\n/);
+        buffer = lines.pop();
+        const line = lines.find((l) => l.startsWith(READY_PREFIX));
+        if (line) {
+          finish(null, line.slice(READY_PREFIX.length).trim());
+        }
+      });
+    }
+    const poll = setInterval(() => {
+      fs.readFile(file, "utf8", (err, text) => {
+        if (!err) {
+          try {
+            finish(null, JSON.parse(text).url);
+          } catch (e) {
+            // file is replaced atomically; ignore a stale or foreign file
+          }
+        }
+      });
+    }, 50);
+    const timer = setTimeout(() => finish(new Error("backend not ready in time")), READY_TIMEOUT);
+    child.on("exit", (code) => finish(new Error(`backend exited with code ${code}`)));
+  });
 }
 
 function createWindow() {
@@ -33,26 +89,28 @@ function createWindow() {
     ? path.join(__dirname, "..", "dist", "labeltool.exe")
     : path.join(process.resourcesPath, "labeltool.exe");
 
-  childProcess = spawn(exePath, [], {
+  readyFile = path.join(os.tmpdir(), `labeltool-ready-${process.pid}.json`);
+  fs.rmSync(readyFile, { force: true });
+
+  // Port 0 lets the backend pick a free port; it reports the URL when ready
+  childProcess = spawn(exePath, ["--port", "0", "--ready-file", readyFile], {
     detached: true,
-    stdio: "ignore",
+    stdio: ["ignore", "pipe", "ignore"],
     windowsHide: true
   });
 
-  childProcess.unref();
-
-  // Wait until the NiceGUI backend is available on its default port
-  waitOn({ resources: ["http://localhost:8080"], timeout: 15000 }, (err) => {
-    if (err) {
-      console.error("NiceGUI not available:", err);
-    } else {
+  waitForBackend(childProcess, readyFile).then(
+    (url) => {
       // Once ready load the actual application UI
-      win.loadURL("http://localhost:8080");
+      win.loadURL(url);
       if (isDev) {
         win.webContents.openDevTools();
       }
+    },
+    (err) => {
+      console.error("NiceGUI not available:", err);
     }
-  });
+  );
 }
 
 app.whenReady().then(createWindow);
@@ -11,15 +11,28 @@ Environment:
 
 Command-line arguments:
 --debug   Run in debug mode (more verbose logging)
+--profile [ACTIONS]
+          Profile fetch_data, update_label and do_print (or a comma
+          separated subset); profiles are written to PROFILE_DIR
+--host HOST
+          Interface to bind (default: HOST or all interfaces)
+--port PORT
+          Port to serve on (default: PORT or 8080); 0 picks a free port
+--ready-file PATH
+          Write {"url", "port", "pid"} as JSON to PATH once the server
+          accepts connections. A "LABELTOOL_READY <url>" line is printed
+          on stdout as well.
 """
 
 import logging
 import argparse
+import multiprocessing
 import os
 import sys
 
+# first, so startup timings include the imports below
+import app.startup  # noqa: F401
 from dotenv import load_dotenv
-from app.main import main
 
 def setup_logging(debug: bool):
     level = logging.DEBUG if debug else logging.INFO
@@ -39,19 +52,47 @@ def check_environment():
 def parse_args():
     parser = argparse.ArgumentParser(description="Launch NiceGUI app.")
     parser.add_argument("--debug", action="store_true", help="Run in debug mode.")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="all",
+        metavar="ACTIONS",
+        help="Profile UI actions (comma separated, default: all).",
+    )
+    parser.add_argument("--host", help="Interface to bind.")
+    parser.add_argument("--port", type=int, help="Port to serve on, 0 for a free port.")
+    parser.add_argument("--ready-file", metavar="PATH", help="Write the URL here once the server is ready.")
     return parser.parse_args()
 
-# ``ui.run`` needs to be executed even when the script is started via
-# ``multiprocessing`` (e.g. when bundled with PyInstaller).  In such
-# cases the module name is ``"__mp_main__"``.  We therefore check for
-# both names here.
-if __name__ in {"__main__", "__mp_main__"}:  # pragma: no cover - manual start
+def run():
+    from app.main import main
+
     args = parse_args()
     setup_logging(args.debug)
     logging.info("Launcher started.")
     check_environment()
+    if args.profile:
+        from app.profiling import PROFILER
+
+        PROFILER.enable(args.profile)
+        logging.info("Profiling %s into %s", ", ".join(sorted(PROFILER.enabled)), PROFILER.directory)
     try:
-        main()
+        main(host=args.host, port=args.port, ready_file=args.ready_file)
     except Exception as e:
         logging.exception(f"An error occurred while running the app: {e}")
         sys.exit(1)
+
+# ``ui.run`` needs to be executed even when the script is started via
+# ``multiprocessing`` (e.g. when bundled with PyInstaller or in NiceGUI's
+# reload worker).  In such cases the module name is ``"__mp_main__"``.  We
+# therefore check for both names here.
+if __name__ in {"__main__", "__mp_main__"}:  # pragma: no cover - manual start
+    # Render workers are started with ``spawn``; frozen executables must hand
+    # control to the worker code before the app starts again.
+    multiprocessing.freeze_support()
+    from app.render_service import in_worker
+
+    # Render workers import this script as ``__mp_main__`` as well; they
+    # only run conversions and must not start another app.
+    if not in_worker():
+        run()
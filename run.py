@@ -1,7 +1,11 @@
 """Entry point for running the NiceGUI application."""
 
-from app.main import main
+from app.render_service import in_worker
 
 
-if __name__ in {"__main__", "__mp_main__"}:  # pragma: no cover - manual start
+# Render workers import this script again as ``__mp_main__``; only NiceGUI's
+# reload worker must run ``main()`` there.
+if __name__ in {"__main__", "__mp_main__"} and not in_worker():  # pragma: no cover - manual start
+    from app.main import main
+
     main()
@@ -0,0 +1,115 @@
+import importlib
+import subprocess
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    """Import ``app.batch`` with a stand-in ``requests`` module.
+
+    ``monkeypatch`` puts ``requests`` and the API module back afterwards, so
+    other tests still import their own stubs.
+    """
+
+    if 'requests' not in sys.modules:
+        monkeypatch.setitem(sys.modules, 'requests', types.SimpleNamespace(get=None))
+    for name in ('batch', 'calserver_api'):
+        monkeypatch.delitem(sys.modules, f'app.{name}', raising=False)
+        monkeypatch.delattr(app, name, raising=False)
+    return importlib.import_module('app.batch')
+
+
+def _row(mtag, name='Device'):
+    return {'I4201': name, 'C2303': '2030-01-01', 'MTAG': mtag, 'C2339': 1}
+
+
+def _fake_render(template, name, expiry, qr_data, fmt):
+    if qr_data.endswith('/BAD'):
+        raise ValueError('broken label')
+    return f'{template}|{name}|{expiry}|{qr_data}|{fmt}'.encode()
+
+
+def test_label_fields_build_qr_link(batch):
+    assert batch.label_fields(_row('M1'), 'https://cal.example/') == (
+        'Device', '2030-01-01', 'https://cal.example/qrcode/M1'
+    )
+
+
+def test_run_batch_emits_labels_in_order(batch, monkeypatch):
+    monkeypatch.setattr(batch, '_render_label', _fake_render)
+    received = []
+    rows = (_row(f'M{i}') for i in range(25))
+    report = batch.run_batch(rows, lambda i, row, data: received.append((i, data)), 'https://cal', 'Einfach', 'png', workers=0)
+    assert [i for i, _ in received] == list(range(25))
+    assert received[3][1] == b'Einfach|Device|2030-01-01|https://cal/qrcode/M3|png'
+    assert report['labels'] == 25
+    assert report['failed'] == 0
+    assert report['per_second'] > 0
+
+
+def test_run_batch_counts_failures(batch, monkeypatch):
+    monkeypatch.setattr(batch, '_render_label', _fake_render)
+    report = batch.run_batch([_row('M1'), _row('BAD'), _row('M2')], lambda *a: None, 'https://cal', workers=0)
+    assert report['labels'] == 2
+    assert report['failed'] == 1
+
+
+def test_run_batch_rejects_unknown_format(batch):
+    with pytest.raises(ValueError):
+        batch.run_batch([], lambda *a: None, 'https://cal', fmt='gif', workers=0)
+
+
+def test_directory_sink_writes_files(batch, tmp_path):
+    sink = batch.DirectorySink(str(tmp_path / 'out'), 'pdf')
+    path = sink(7, _row('A/B 1'), b'%PDF')
+    assert path.endswith('000007_A_B_1.pdf')
+    assert (tmp_path / 'out' / '000007_A_B_1.pdf').read_bytes() == b'%PDF'
+
+
+def test_stream_rows_filters_current(batch, monkeypatch):
+    chunks = [[{'MTAG': 'A', 'C2339': 1}, {'MTAG': 'B', 'C2339': 0}], [{'MTAG': 'C', 'C2339': 1}]]
+    monkeypatch.setattr(batch, 'iter_calibration_data', lambda *a, **k: iter(chunks))
+    rows = batch.stream_rows('u', 'n', 'p', 'k', [], only_current=True)
+    assert [r['MTAG'] for r in rows] == ['A', 'C']
+
+
+def test_parse_args_requires_credentials_and_target(batch, monkeypatch):
+    for var in ('CALSERVER_URL', 'CALSERVER_USERNAME', 'CALSERVER_PASSWORD', 'CALSERVER_API_KEY'):
+        monkeypatch.delenv(var, raising=False)
+    with pytest.raises(SystemExit):
+        batch.parse_args(['--output-dir', 'x'])
+    monkeypatch.setenv('CALSERVER_URL', 'https://cal')
+    monkeypatch.setenv('CALSERVER_USERNAME', 'u')
+    monkeypatch.setenv('CALSERVER_PASSWORD', 'p')
+    monkeypatch.setenv('CALSERVER_API_KEY', 'k')
+    with pytest.raises(SystemExit):
+        batch.parse_args([])
+    args = batch.parse_args(
+        ['--printer', 'Zebra', '--filter', '[{"property": "C2339", "value": 1, "operator": "="}]', '--workers', '0']
+    )
+    assert args.filter == [{'property': 'C2339', 'value': 1, 'operator': '='}]
+    assert args.workers == 0
+
+
+def test_batch_does_not_import_nicegui():
+    code = (
+        "import sys, types\n"
+        "sys.modules.setdefault('requests', types.SimpleNamespace(get=None))\n"
+        "import app.batch\n"
+        "assert 'nicegui' not in sys.modules, 'app.batch imported nicegui'\n"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=Path(__file__).resolve().parents[1])
+
+
+def test_render_label_uses_preview_templates(batch, monkeypatch):
+    monkeypatch.setattr(batch, 'render_label_svg', lambda *a: '|'.join(a))
+    monkeypatch.setattr(batch, 'render_bytes', lambda svg, fmt: f'{svg}|{fmt}'.encode())
+    assert batch._render_label('Standard', 'Device', '2030-01-01', 'https://cal/qrcode/M1', 'pdf') == (
+        b'Standard|Device|2030-01-01|https://cal/qrcode/M1|pdf'
+    )
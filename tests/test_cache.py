@@ -0,0 +1,41 @@
+import importlib
+
+cache = importlib.import_module('app.cache')
+
+
+def test_lru_eviction_order():
+    c = cache.LRUCache(maxsize=2)
+    c.put('a', 1)
+    c.put('b', 2)
+    assert c.get('a') == 1
+    c.put('c', 3)
+    assert 'b' not in c
+    assert 'a' in c and 'c' in c
+
+
+def test_get_or_create_counts_hits():
+    c = cache.LRUCache(maxsize=4)
+    created = []
+    for _ in range(3):
+        c.get_or_create('k', lambda: created.append(1) or 'v')
+    assert created == [1]
+    assert c.hits == 2 and c.misses == 1
+    assert round(c.hit_ratio, 2) == 0.67
+
+
+def test_zero_size_disables_cache():
+    c = cache.LRUCache(maxsize=0)
+    c.put('a', 1)
+    assert len(c) == 0
+
+
+def test_shared_store_backs_local_misses():
+    store = importlib.import_module('app.shared_store').MemoryStore()
+    worker_a = cache.LRUCache(maxsize=4, shared=store, namespace='render')
+    worker_b = cache.LRUCache(maxsize=4, shared=store, namespace='render')
+    worker_a.put(('png', 'abc'), b'PNG')
+    assert store.get('render:png:abc') == b'PNG'
+    assert ('png', 'abc') in worker_b
+    assert worker_b.get(('png', 'abc')) == b'PNG'
+    assert len(worker_b) == 1 and worker_b.hits == 1
+    assert worker_b.get(('png', 'other')) is None and worker_b.misses == 1
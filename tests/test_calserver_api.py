@@ -1,6 +1,7 @@
 import builtins
 import importlib
 import json
+import time
 from types import SimpleNamespace
 
 import sys
@@ -36,3 +37,90 @@ def test_fetch_calibration_data():
     assert data["params"]["HTTP_X_REST_USERNAME"] == "user"
     assert data["params"]["filter"] == json.dumps({"foo": 1})
     assert data["json"] is None
+
+
+class StreamingResponse:
+    def __init__(self, body, chunk=7):
+        self.body = body.encode()
+        self.chunk = chunk
+        self.closed = False
+    def raise_for_status(self):
+        pass
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), self.chunk):
+            yield self.body[i:i + self.chunk]
+    def close(self):
+        self.closed = True
+
+
+def _stream(monkeypatch, body, **kwargs):
+    response = StreamingResponse(body)
+    calls = {}
+
+    def get(url, params=None, timeout=10, stream=False):
+        calls['stream'] = stream
+        return response
+
+    monkeypatch.setattr(calserver_api.requests, 'get', get, raising=False)
+    chunks = list(calserver_api.iter_calibration_data('http://x', 'u', 'p', 'k', [], **kwargs))
+    assert calls['stream'] is True
+    assert response.closed
+    return chunks
+
+
+def test_iter_calibration_data_streams_entries(monkeypatch):
+    entries = [{"MTAG": f"M{i}", "inventory": {"I4201": "Gerät ä"}} for i in range(5)]
+    body = json.dumps({"data": {"count": 5, "calibration": entries}})
+    chunks = _stream(monkeypatch, body, chunk_size=2)
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert [e for c in chunks for e in c] == entries
+
+
+def test_iter_calibration_data_top_level_list(monkeypatch):
+    entries = [{"MTAG": "A"}, {"MTAG": "B"}]
+    chunks = _stream(monkeypatch, json.dumps(entries))
+    assert chunks == [entries]
+
+
+def test_iter_calibration_data_without_entries(monkeypatch):
+    assert _stream(monkeypatch, json.dumps({"data": {}})) == []
+
+
+def test_iter_calibration_data_cancelled(monkeypatch):
+    body = json.dumps([{"MTAG": str(i)} for i in range(50)])
+    assert _stream(monkeypatch, body, chunk_size=1, cancelled=lambda: True) == []
+
+
+def test_fetch_records_metrics():
+    metrics = importlib.import_module('app.metrics')
+    before = metrics.CALSERVER_SECONDS.count(mode='full')
+    calserver_api.fetch_calibration_data("http://example.com", "user", "pass", "key", {})
+    assert metrics.CALSERVER_SECONDS.count(mode='full') == before + 1
+
+
+def test_throttled_requests_are_retried_after_retry_after(monkeypatch):
+    responses = [
+        SimpleNamespace(status_code=429, headers={'Retry-After': '0.05'}, close=lambda: None),
+        DummyResponse({'data': {'calibration': []}}),
+    ]
+    monkeypatch.setattr(calserver_api.requests, 'get', lambda *a, **kw: responses.pop(0), raising=False)
+    limiter = calserver_api.get_limiter('http://throttled.example.com')
+    started = time.monotonic()
+    data = calserver_api.fetch_calibration_data('http://throttled.example.com', 'u', 'p', 'k', {})
+    assert data == {'data': {'calibration': []}}
+    assert time.monotonic() - started >= 0.04
+    assert limiter.throttled == 1 and limiter.in_flight == 0
+
+
+def test_failed_requests_release_the_limiter(monkeypatch):
+    def get(*args, **kwargs):
+        raise ConnectionError('down')
+
+    monkeypatch.setattr(calserver_api.requests, 'get', get, raising=False)
+    limiter = calserver_api.get_limiter('http://down.example.com')
+    for _ in range(2):
+        try:
+            list(calserver_api.iter_calibration_data('http://down.example.com', 'u', 'p', 'k', [], priority='background'))
+        except ConnectionError:
+            pass
+    assert limiter.in_flight == 0 and limiter.limit < limiter.max_concurrency
@@ -0,0 +1,95 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+fonts = importlib.import_module('app.fonts')
+
+
+class FakeFont:
+    """Every character is ``size / 2`` pixels wide."""
+
+    def __init__(self, path, size):
+        self.size = size
+
+    def getlength(self, text):
+        return len(text) * self.size / 2
+
+    def getbbox(self, text):
+        return 0, 2, int(self.getlength(text)), self.size
+
+
+class FakeImage:
+    def __init__(self, mode='RGB', size=(400, 200)):
+        self.size = size
+        self.pasted = []
+
+    def paste(self, fill, box, mask=None):
+        self.pasted.append((fill, box, mask))
+
+
+class FakeDraw:
+    def __init__(self, image):
+        self.image = image
+
+    def text(self, xy, text, font=None, fill=None):
+        rendered.append((text, getattr(font, 'size', None)))
+
+
+rendered = []
+loaded = []
+
+
+@pytest.fixture
+def pil(monkeypatch):
+    rendered.clear()
+    loaded.clear()
+    image_mod = types.SimpleNamespace(new=lambda mode, size, color=0: FakeImage(mode, size))
+    draw_mod = types.SimpleNamespace(Draw=FakeDraw)
+
+    def truetype(path, size):
+        loaded.append(size)
+        return FakeFont(path, size)
+
+    font_mod = types.SimpleNamespace(truetype=truetype, load_default=lambda: 'bitmap')
+    pil_mod = types.SimpleNamespace(Image=image_mod, ImageDraw=draw_mod, ImageFont=font_mod)
+    for name, mod in (('PIL', pil_mod), ('PIL.Image', image_mod), ('PIL.ImageDraw', draw_mod), ('PIL.ImageFont', font_mod)):
+        monkeypatch.setitem(sys.modules, name, mod)
+
+
+def test_segments_are_rendered_once_per_size(pil):
+    manager = fonts.FontManager('Face.ttf', size=20)
+    label = FakeImage()
+    for name in ('Waage 1', 'Waage 2', 'Waage 1'):
+        manager.draw_line(label, FakeDraw(label), (10, 10), ('Gerät: ', name))
+    assert loaded == [20]
+    assert sorted(rendered) == [('Gerät: ', 20), ('Waage 1', 20), ('Waage 2', 20)]
+    # the name follows the prefix, offset by the glyph box
+    assert [box for _, box, _ in label.pasted[:2]] == [(10, 12), (80, 12)]
+
+
+def test_long_names_shrink_to_fit(pil):
+    manager = fonts.FontManager('Face.ttf', size=20, min_size=10)
+    size, parts = manager.fit(('Gerät: ', 'x' * 13), max_width=200)
+    assert (size, parts) == (20, ('Gerät: ', 'x' * 13))
+    size, parts = manager.fit(('Gerät: ', 'x' * 23), max_width=200)
+    assert size == 13 and 30 * size / 2 <= 200 < 30 * (size + 1) / 2
+    assert manager.fit(('Gerät: ', 'x' * 23), max_width=200) == (size, parts)
+    assert manager.fits.hits == 1
+
+
+def test_names_too_long_for_min_size_are_shortened(pil):
+    manager = fonts.FontManager('Face.ttf', size=20, min_size=10)
+    size, parts = manager.fit(('Gerät: ', 'Messschieber digital 150 mm'), max_width=120)
+    assert size == 10
+    assert parts[0] == 'Gerät: ' and parts[1].endswith(fonts.ELLIPSIS)
+    assert sum(len(p) for p in parts) * 5 <= 120
+
+
+def test_bitmap_font_without_label_font(pil):
+    manager = fonts.FontManager(None)
+    label = FakeImage()
+    assert manager.draw_line(label, FakeDraw(label), (10, 50), ('Ablauf: ', '2030-01-01'), max_width=10) == 0
+    assert rendered == [('Ablauf: 2030-01-01', None)]
+    assert label.pasted == []
@@ -0,0 +1,32 @@
+import asyncio
+
+from benchmarks.load_driver import Recorder, _Step, format_report, percentile
+
+
+def test_percentile_interpolates():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50.5
+    assert percentile(values, 99) == 99.01
+    assert percentile([3.0], 95) == 3.0
+
+
+def test_recorder_report_counts_failures():
+    recorder = Recorder()
+
+    async def scenario():
+        async with _Step(recorder, "load"):
+            pass
+        try:
+            async with _Step(recorder, "print"):
+                raise RuntimeError("no printer")
+        except RuntimeError:
+            pass
+
+    asyncio.run(scenario())
+    recorder.flows = 1
+    report = recorder.report()
+    assert report["steps"]["load"]["count"] == 1
+    assert report["steps"]["print"] == {"count": 0, "p50": None, "p95": None, "p99": None, "errors": 1}
+    text = format_report(report)
+    assert text.splitlines()[1].startswith("load")
+    assert "1 flows" in text
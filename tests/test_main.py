@@ -15,6 +15,7 @@ sys.modules["PIL.Image"] = pil_image_mod
 
 ng_mod = types.ModuleType("nicegui")
 ng_mod.ui = types.SimpleNamespace()
+ng_mod.app = types.SimpleNamespace()
 sys.modules["nicegui"] = ng_mod
 sys.modules["nicegui.ui"] = ng_mod.ui
 
@@ -68,3 +69,41 @@ def test_pil_to_data_url_prefix():
 
     result = main._pil_to_data_url(DummyImg())
     assert result.startswith('data:image/png;base64,')
+
+
+def test_build_table_kwargs_server_side_pagination():
+    pagination = {'page': 1, 'rowsPerPage': 10, 'rowsNumber': 0}
+    kwargs = main._build_table_kwargs(dummy_table_a, [], None, pagination)
+    assert kwargs['pagination'] is pagination
+
+
+def test_throttled_login_does_not_stall_the_loop(monkeypatch):
+    import asyncio
+    import time
+
+    session_mod = importlib.import_module('app.session')
+
+    def throttled_fetch(*args):
+        time.sleep(0.3)  # e.g. waiting for the calServer rate limiter
+        return []
+
+    monkeypatch.setattr(main, 'fetch_calibration_data', throttled_fetch)
+    session = session_mod.Session('s')
+    login = {'base_url': 'https://cal', 'username': 'u', 'password': 'p', 'api_key': 'k'}
+
+    async def run():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        await main._check_login(session, login)
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 10
+    assert session.login == login
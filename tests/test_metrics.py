@@ -0,0 +1,74 @@
+import importlib
+
+import pytest
+
+metrics = importlib.import_module('app.metrics')
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, 'REGISTRY', registry)
+    return registry
+
+
+def test_counter_render(registry):
+    counter = metrics.Counter('jobs_total', 'Jobs')
+    counter.inc(printer='Zebra')
+    counter.inc(2, printer='Zebra')
+    counter.inc(printer='Brother "2"')
+    text = registry.render()
+    assert '# TYPE jobs_total counter' in text
+    assert 'jobs_total{printer="Zebra"} 3' in text
+    assert 'jobs_total{printer="Brother \\"2\\""} 1' in text
+    assert counter.value(printer='Zebra') == 3
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    hist = metrics.Histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        hist.observe(value, mode='full')
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{mode="full",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{mode="full",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{mode="full",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{mode="full"} 4' in lines
+    assert 'latency_seconds_sum{mode="full"} 4.25' in lines
+
+
+def test_histogram_time(registry):
+    hist = metrics.Histogram('block_seconds', 'Block')
+    with pytest.raises(ValueError):
+        with hist.time(step='a'):
+            raise ValueError()
+    assert hist.count(step='a') == 1
+
+
+def test_gauge_callbacks(registry):
+    metrics.Gauge('sessions', 'Sessions', lambda: 4)
+    metrics.Gauge('ratio', 'Ratio', lambda: {(('cache', 'qr'),): 0.5})
+    metrics.Gauge('broken', 'Broken', lambda: 1 / 0)
+    text = registry.render()
+    assert 'sessions 4' in text
+    assert 'ratio{cache="qr"} 0.5' in text
+    assert '# TYPE broken gauge' in text
+
+
+def test_duplicate_names_rejected(registry):
+    metrics.Counter('dup', 'x')
+    with pytest.raises(ValueError):
+        metrics.Counter('dup', 'x')
+
+
+def test_watch_caches():
+    cache = importlib.import_module('app.cache').LRUCache(4)
+    metrics.watch_caches({'demo': cache})
+    cache.put('a', 1)
+    cache.get('a')
+    cache.get('b')
+    cache.clear()
+    text = metrics.REGISTRY.render()
+    assert '# TYPE cache_hits_total counter' in text
+    assert 'cache_hits_total{cache="demo"} 1' in text
+    assert 'cache_misses_total{cache="demo"} 1' in text
+    assert 'cache_hit_ratio{cache="demo"} 0.5' in text
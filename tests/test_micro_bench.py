@@ -0,0 +1,37 @@
+import json
+
+from benchmarks import micro
+
+
+def test_measure_reports_per_call_times():
+    calls = []
+    timings = micro.measure(lambda: calls.append(1), min_time=0.001, rounds=3)
+    assert 0 < timings["min"] <= timings["median"]
+    assert len(calls) >= 1 + 3 * timings["loops"]
+
+
+def test_compare_flags_only_slowdowns_above_threshold():
+    baseline = {"a": {"median": 1.0}, "b": {"median": 1.0}, "c": {"median": 1.0}}
+    results = {"a": {"median": 1.2}, "b": {"median": 1.5}, "c": {"median": 0.5}, "new": {"median": 9.0}}
+    assert micro.compare(results, baseline, 0.25) == [("b", 1.0, 1.5, 1.5)]
+
+
+def test_baseline_roundtrip_and_regression_exit_code(tmp_path, monkeypatch):
+    path = tmp_path / "base.json"
+    monkeypatch.setattr(micro, "CASES", [])
+    micro.case("fast")(lambda: (lambda: None))
+    assert micro.main(["--quick", "--save", str(path)]) == 0
+    data = json.loads(path.read_text())
+    assert set(data["results"]) == {"fast"}
+
+    data["results"]["fast"]["median"] = 1e-12
+    path.write_text(json.dumps(data))
+    assert micro.main(["--quick", "--compare", str(path)]) == 1
+
+
+def test_missing_library_skips_case(monkeypatch):
+    def setup():
+        raise ImportError("not installed")
+
+    monkeypatch.setattr(micro, "CASES", [("needs_lib", setup)])
+    assert list(micro.run_cases()) == [("needs_lib", None)]
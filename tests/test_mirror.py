@@ -0,0 +1,94 @@
+import importlib
+
+mirror_mod = importlib.import_module('app.mirror')
+
+ROWS = [
+    {'I4201': 'Waage', 'I4206': 'SN-100', 'MTAG': 'M1', 'C2303': '2025-03-01', 'C2339': 1},
+    {'I4201': 'Multimeter', 'I4206': 'SN-200', 'MTAG': 'M2', 'C2303': '2024-01-01', 'C2339': 0},
+    {'I4201': 'Waagschale_1', 'I4206': 'AB-300', 'MTAG': 'M3', 'C2303': '2026-07-15', 'C2339': 1},
+]
+
+
+def test_store_and_load_round_trip():
+    mirror = mirror_mod.CalibrationMirror(':memory:')
+    assert mirror.snapshot('https://a') is None
+    assert mirror.store('https://a', ROWS) == 3
+    loaded = mirror.load('https://a')
+    assert [r['MTAG'] for r in loaded] == ['M1', 'M2', 'M3']
+    assert loaded[0]['I4206'] == 'SN-100'
+    assert loaded[0]['I4202'] is None
+    assert [r['MTAG'] for r in mirror.load('https://a', only_current=True)] == ['M1', 'M3']
+    assert mirror.load('https://b') == []
+    snapshot = mirror.snapshot('https://a')
+    assert snapshot['rows'] == 3 and snapshot['complete']
+
+
+def test_store_replaces_snapshot():
+    mirror = mirror_mod.CalibrationMirror(':memory:')
+    mirror.store('https://a', ROWS)
+    mirror.store('https://a', ROWS[:1])
+    assert [r['MTAG'] for r in mirror.load('https://a')] == ['M1']
+
+
+def test_current_only_store_keeps_other_rows():
+    mirror = mirror_mod.CalibrationMirror(':memory:')
+    mirror.store('https://a', ROWS)
+    mirror.store('https://a', [dict(ROWS[0], C2303='2027-01-01')], only_current=True)
+    rows = {r['MTAG']: r for r in mirror.load('https://a')}
+    assert set(rows) == {'M1', 'M2'}
+    assert rows['M1']['C2303'] == '2027-01-01'
+    assert mirror.snapshot('https://a')['complete']
+
+
+def test_current_only_store_appends_unique_positions():
+    mirror = mirror_mod.CalibrationMirror(':memory:')
+    mirror.store('https://a', ROWS)
+    mirror.store('https://a', [ROWS[0], ROWS[2]], only_current=True)
+    mirror.store('https://a', [ROWS[2]], only_current=True)
+    assert [r['MTAG'] for r in mirror.load('https://a')] == ['M2', 'M3']
+
+
+def test_mirror_source_separates_accounts():
+    source = mirror_mod.mirror_source('https://a/', 'alice', 'key')
+    assert source.startswith('https://a#')
+    assert source == mirror_mod.mirror_source('https://a', 'alice', 'key')
+    assert source != mirror_mod.mirror_source('https://a', 'bob', 'key')
+    assert len(source.split('#')[1]) == 16
+
+
+def test_old_schema_is_rebuilt(tmp_path):
+    path = str(tmp_path / 'mirror.sqlite3')
+    conn = mirror_mod.sqlite3.connect(path)
+    conn.execute('CREATE TABLE calibration (base_url TEXT, pos INTEGER)')
+    conn.commit()
+    conn.close()
+    mirror = mirror_mod.CalibrationMirror(path)
+    assert mirror.store('https://a', ROWS) == 3
+
+
+def test_find():
+    mirror = mirror_mod.CalibrationMirror(':memory:')
+    mirror.store('https://a', ROWS)
+    assert [r['MTAG'] for r in mirror.find('https://a', mtags=['M3', 'M1', 'X'])] == ['M1', 'M3']
+    assert [r['MTAG'] for r in mirror.find('https://a', name='waag')] == ['M1', 'M3']
+    assert [r['MTAG'] for r in mirror.find('https://a', name='Waagschale_')] == ['M3']
+    assert mirror.find('https://a', name='Waage_') == []
+    assert [r['MTAG'] for r in mirror.find('https://a', serial='sn-2')] == ['M2']
+    assert mirror.find('https://a') == []
+
+
+def test_file_mirror_persists(tmp_path):
+    path = str(tmp_path / 'sub' / 'mirror.sqlite3')
+    mirror = mirror_mod.CalibrationMirror(path)
+    mirror.store('https://a', ROWS)
+    mirror.close()
+    assert len(mirror_mod.CalibrationMirror(path).load('https://a')) == 3
+
+
+def test_default_path(monkeypatch):
+    monkeypatch.setenv('MIRROR_PATH', 'off')
+    assert mirror_mod.default_path() is None
+    monkeypatch.setenv('MIRROR_PATH', '/tmp/m.sqlite3')
+    assert mirror_mod.default_path() == '/tmp/m.sqlite3'
+    monkeypatch.delenv('MIRROR_PATH')
+    assert mirror_mod.default_path().endswith('mirror.sqlite3')
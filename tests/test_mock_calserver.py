@@ -0,0 +1,67 @@
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pytest
+
+from benchmarks import mock_calserver
+from benchmarks.mock_calserver import MockCalServer, parse_filter
+
+LOGIN = {"HTTP_X_REST_USERNAME": "u", "HTTP_X_REST_PASSWORD": "p", "HTTP_X_REST_API_KEY": "k"}
+
+
+def _get(url, **params):
+    query = urllib.parse.urlencode({**LOGIN, **params})
+    try:
+        with urllib.request.urlopen(f"{url}/api/calibration?{query}", timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture
+def server():
+    mock = MockCalServer(rows=200, credentials=("u", "p", "k"))
+    url = mock.start()
+    yield mock, url
+    mock.stop()
+
+
+def test_filter_and_pagination(server):
+    mock, url = server
+    status, body = _get(url, filter=json.dumps([{"property": "C2339", "value": 1, "operator": "="}]))
+    assert status == 200
+    current = body["data"]["calibration"]
+    assert current and all(e["C2339"] == 1 for e in current)
+    assert body["data"]["total"] == len(current)
+
+    status, page = _get(url, filter="[]", offset=10, limit=5)
+    assert [e["MTAG"] for e in page["data"]["calibration"]] == [f"MT{i:07d}" for i in range(10, 15)]
+
+    mtags = ["MT0000003", "MT0000007"]
+    _, body = _get(url, filter=json.dumps([{"property": "MTAG", "value": mtags, "operator": "in"}]))
+    assert [e["MTAG"] for e in body["data"]["calibration"]] == mtags
+    assert mock.requests == 3
+
+
+def test_invalid_requests_are_rejected(server):
+    _, url = server
+    assert _get(url, filter=json.dumps([{"property": "X9999", "value": 1}]))[0] == 400
+    assert _get(url, filter="{not json")[0] == 400
+    assert _get(url, HTTP_X_REST_PASSWORD="wrong")[0] == 401
+
+
+def test_error_rate():
+    mock = MockCalServer(rows=10, error_rate=1.0)
+    assert mock.respond(LOGIN)[0] == 503
+
+
+def test_parse_filter_shorthand_and_inventory_fields():
+    assert parse_filter('{"C2339": 1}') == [("C2339", "=", 1)]
+    entries = mock_calserver.make_calibration_entries(50)
+    name = entries[0]["inventory"]["I4201"]
+    matches = mock_calserver.apply_filter(entries, parse_filter(json.dumps([{"property": "I4201", "value": name}])))
+    assert matches and all(e["inventory"]["I4201"] == name for e in matches)
+    with pytest.raises(ValueError):
+        parse_filter('[{"property": "MTAG", "value": "x", "operator": "in"}]')
@@ -0,0 +1,120 @@
+import asyncio
+import datetime
+import importlib
+import sys
+import types
+
+import pytest
+
+_stubbed = 'requests' not in sys.modules
+if _stubbed:
+    sys.modules['requests'] = types.SimpleNamespace(get=None)
+_fresh = 'app.calserver_api' not in sys.modules
+
+prerender = importlib.import_module('app.prerender')
+artifacts = importlib.import_module('app.artifacts')
+
+if _stubbed:
+    del sys.modules['requests']
+if _fresh:
+    del sys.modules['app.calserver_api']
+
+
+class FakeRenderer:
+    def __init__(self):
+        self.calls = []
+
+    async def _render(self, fmt, svg):
+        if 'BROKEN' in svg:
+            raise ValueError('render failed')
+        self.calls.append((fmt, svg))
+        artifacts.RENDER_CACHE.put(artifacts.render_key(fmt, svg), b'data')
+        return b'data'
+
+    async def png_bytes(self, svg):
+        return await self._render('png', svg)
+
+    async def pdf(self, svg):
+        return await self._render('pdf', svg)
+
+    async def bitmap_bytes(self, name, expiry, qr_data):
+        if 'BROKEN' in name:
+            raise ValueError('render failed')
+        self.calls.append(('bitmap', name))
+        artifacts.RENDER_CACHE.put(artifacts.bitmap_key(name, expiry, qr_data), b'data')
+        return b'data'
+
+
+LOGIN = {'base_url': 'https://cal/', 'username': 'u', 'password': 'p', 'api_key': 'k'}
+
+
+def _entries(*mtags):
+    return [{'MTAG': m, 'C2303': '2030-01-01', 'inventory': {'I4201': f'Dev {m}'}} for m in mtags]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    artifacts.RENDER_CACHE.clear()
+    yield
+    artifacts.RENDER_CACHE.clear()
+
+
+def test_parse_and_check_hours():
+    assert prerender.parse_hours('20-6') == (20, 6)
+    assert prerender.in_hours((20, 6), datetime.datetime(2026, 1, 1, 23))
+    assert prerender.in_hours((20, 6), datetime.datetime(2026, 1, 1, 3))
+    assert not prerender.in_hours((20, 6), datetime.datetime(2026, 1, 1, 12))
+    assert prerender.in_hours((8, 17), datetime.datetime(2026, 1, 1, 12))
+    assert prerender.in_hours((0, 0), datetime.datetime(2026, 1, 1, 12))
+    with pytest.raises(ValueError):
+        prerender.parse_hours('20-30')
+
+
+def test_due_filters():
+    expiring, renewed = prerender.due_filters(14, datetime.date(2026, 3, 1))
+    assert expiring == [
+        {'property': 'C2303', 'value': '2026-03-01', 'operator': '>='},
+        {'property': 'C2303', 'value': '2026-03-15', 'operator': '<='},
+    ]
+    assert renewed == [{'property': 'C2301', 'value': '2026-02-15', 'operator': '>='}]
+
+
+def test_run_once_renders_due_labels_once(monkeypatch):
+    results = [[_entries('A', 'B')], [_entries('B', 'C')]]
+    monkeypatch.setattr(prerender, 'iter_calibration_data', lambda *a, **kw: iter(results.pop(0) if results else []))
+    monkeypatch.setattr(prerender, 'in_hours', lambda hours: True)
+    renderer = FakeRenderer()
+    scheduler = prerender.PrerenderScheduler(
+        lambda t, name, expiry, qr: f'{t}|{name}|{expiry}|{qr}', renderer, templates=['Standard', 'Einfach'], login=LOGIN
+    )
+
+    stats = asyncio.run(scheduler.run_once())
+    assert stats == {'devices': 3, 'rendered': 9, 'cached': 0, 'failed': 0}
+    assert ('bitmap', 'Dev A') in renderer.calls
+    assert ('pdf', 'Einfach|Dev C|2030-01-01|https://cal/qrcode/C') in renderer.calls
+
+    results[:] = [[_entries('A')], []]
+    stats = asyncio.run(scheduler.run_once())
+    assert stats == {'devices': 1, 'rendered': 0, 'cached': 3, 'failed': 0}
+
+
+def test_run_once_stops_outside_window_and_counts_failures(monkeypatch):
+    monkeypatch.setattr(prerender, 'iter_calibration_data', lambda *a, **kw: iter([_entries('A', 'BROKEN', 'C')]))
+    open_checks = iter([True, True, False])
+    monkeypatch.setattr(prerender, 'in_hours', lambda hours: next(open_checks))
+    scheduler = prerender.PrerenderScheduler(
+        lambda t, name, expiry, qr: f'{name}', FakeRenderer(), login=LOGIN
+    )
+    stats = asyncio.run(scheduler.run_once())
+    assert stats == {'devices': 3, 'rendered': 2, 'cached': 0, 'failed': 2}
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.delenv('PRERENDER', raising=False)
+    assert prerender.PrerenderScheduler.from_env(None, None) is None
+    monkeypatch.setenv('PRERENDER', '1')
+    monkeypatch.setenv('PRERENDER_TEMPLATES', 'Standard, Einfach')
+    monkeypatch.setenv('PRERENDER_HOURS', '22-5')
+    scheduler = prerender.PrerenderScheduler.from_env(None, None)
+    assert scheduler.templates == ['Standard', 'Einfach']
+    assert scheduler.hours == (22, 5)
@@ -0,0 +1,42 @@
+import sys
+import types
+
+from app import preview_templates
+
+
+def test_render_preview_template_embeds_qr_code(monkeypatch):
+    if "jinja2" not in sys.modules:
+        try:
+            import jinja2  # noqa: F401
+        except ImportError:
+            class Template:
+                def __init__(self, text):
+                    self.text = text
+
+                def render(self, **kwargs):
+                    result = self.text
+                    for k, v in kwargs.items():
+                        result = result.replace(f"{{{{ {k} }}}}", str(v))
+                    return result
+
+            monkeypatch.setitem(sys.modules, "jinja2", types.SimpleNamespace(Template=Template))
+    monkeypatch.setattr(preview_templates, "_compiled", {})
+    monkeypatch.setattr(preview_templates, "qr_data_url", lambda data, size: f"data:{data}:{size}")
+
+    svg = preview_templates.render_preview_template("Modern", "Waage 7", "2030-01-01", "MT1")
+    assert "Waage 7" in svg
+    assert "Ablauf: 2030-01-01" in svg
+    assert "<image href='data:MT1:200'" in svg
+
+
+def test_render_label_svg_prefers_preview_templates(monkeypatch):
+    label_templates = types.SimpleNamespace(
+        svg_header=lambda: "<?xml?>",
+        render_label_template=lambda *a: "label:" + "|".join(a),
+    )
+    monkeypatch.setattr(sys.modules["app"], "label_templates", label_templates, raising=False)
+    monkeypatch.setitem(sys.modules, "app.label_templates", label_templates)
+    monkeypatch.setattr(preview_templates, "render_preview_template", lambda *a: "preview:" + "|".join(a))
+
+    assert preview_templates.render_label_svg("Standard", "Waage", "2030", "MT1") == "<?xml?>preview:Standard|Waage|2030|MT1"
+    assert preview_templates.render_label_svg("Einfach", "Waage", "2030", "MT1") == "label:Einfach|Waage|2030|MT1"
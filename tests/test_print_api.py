@@ -0,0 +1,72 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+_stubbed = 'requests' not in sys.modules
+if _stubbed:
+    sys.modules['requests'] = types.SimpleNamespace(get=None)
+_fresh = 'app.calserver_api' not in sys.modules
+
+print_api = importlib.import_module('app.print_api')
+
+if _stubbed:
+    del sys.modules['requests']
+if _fresh:
+    del sys.modules['app.calserver_api']
+
+
+def test_parse_submission_mtags():
+    items, template, printer = print_api.parse_submission({'mtags': ['1', 2], 'printer': 'Zebra'})
+    assert items == [{'mtag': '1'}, {'mtag': '2'}]
+    assert template == 'Standard'
+    assert printer == 'Zebra'
+
+
+def test_parse_submission_labels():
+    items, template, _ = print_api.parse_submission(
+        {'labels': [{'mtag': 'A', 'name': 'Waage', 'expiry': '2030'}], 'template': 'Einfach', 'printer': 'Zebra'}
+    )
+    assert items == [{'mtag': 'A', 'name': 'Waage', 'expiry': '2030'}]
+    assert template == 'Einfach'
+
+
+@pytest.mark.parametrize('payload', [
+    [],
+    {'printer': 'Zebra'},
+    {'mtags': [], 'printer': 'Zebra'},
+    {'mtags': ['A']},
+    {'labels': ['A'], 'printer': 'Zebra'},
+    {'labels': [{'name': 'no mtag'}], 'printer': 'Zebra'},
+])
+def test_parse_submission_rejects(payload):
+    with pytest.raises(ValueError):
+        print_api.parse_submission(payload)
+
+
+def test_parse_submission_limit(monkeypatch):
+    monkeypatch.setattr(print_api, 'MAX_LABELS', 2)
+    with pytest.raises(ValueError):
+        print_api.parse_submission({'mtags': ['1', '2', '3'], 'printer': 'Zebra'})
+
+
+def test_authorized():
+    assert print_api.authorized({}, None)
+    assert not print_api.authorized({}, 'secret')
+    assert print_api.authorized({'authorization': 'Bearer secret'}, 'secret')
+    assert print_api.authorized({'x-api-key': 'secret'}, 'secret')
+    assert not print_api.authorized({'x-api-key': 'wrong'}, 'secret')
+
+
+class _NoRoutes:
+    def __getattr__(self, name):
+        raise AssertionError(f'route registered via {name}')
+
+
+def test_register_print_api_requires_token_and_calserver_url(monkeypatch):
+    monkeypatch.delenv('PRINT_API_TOKEN', raising=False)
+    manager = types.SimpleNamespace(base_url='https://cal')
+    assert print_api.register_print_api(_NoRoutes(), manager) is False
+    manager.base_url = ''
+    assert print_api.register_print_api(_NoRoutes(), manager, token='secret') is False
@@ -0,0 +1,174 @@
+import asyncio
+import importlib
+import sys
+import types
+
+import pytest
+
+_stubbed = 'requests' not in sys.modules
+if _stubbed:
+    sys.modules['requests'] = types.SimpleNamespace(get=None)
+_fresh = 'app.calserver_api' not in sys.modules
+
+print_jobs = importlib.import_module('app.print_jobs')
+
+if _stubbed:
+    del sys.modules['requests']
+if _fresh:
+    del sys.modules['app.calserver_api']
+
+
+class FakeRenderer:
+    max_pending = 4
+
+    async def png(self, svg):
+        if 'BROKEN' in svg:
+            raise ValueError('render failed')
+        return f'png:{svg}'
+
+
+def _render_svg(template, name, expiry, qr_data):
+    return f'{template}|{name}|{expiry}|{qr_data}'
+
+
+@pytest.fixture
+def spooled(monkeypatch):
+    calls = []
+
+    def print_images(images, printer):
+        if printer == 'offline':
+            raise RuntimeError('printer offline')
+        calls.append((printer, list(images)))
+        return printer + '-1'
+
+    monkeypatch.setitem(sys.modules, 'app.print_utils', types.SimpleNamespace(print_images=print_images))
+    return calls
+
+
+def _manager(**kwargs):
+    kwargs.setdefault('lookup', lambda mtags: {m: {'I4201': f'Dev {m}', 'C2303': '2030-01-01'} for m in mtags if m != 'X'})
+    return print_jobs.PrintJobManager(_render_svg, FakeRenderer(), base_url='https://cal', batch_window=0.01, **kwargs)
+
+
+async def _wait(job):
+    for _ in range(200):
+        if job.finished:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError('job did not finish')
+
+
+def test_large_job_is_spooled_in_batches(spooled):
+    manager = _manager(batch_size=50)
+
+    async def run():
+        job = manager.submit([{'mtag': str(i)} for i in range(120)], 'Standard', 'Zebra')
+        await _wait(job)
+        await manager.stop()
+        return job
+
+    job = asyncio.run(run())
+    assert [len(images) for _, images in spooled] == [50, 50, 20]
+    assert spooled[0][1][0] == 'png:Standard|Dev 0|2030-01-01|https://cal/qrcode/0'
+    assert job.to_dict()['status'] == 'done'
+    assert job.printed == 120
+    assert job.queues == ['Zebra-1']
+
+
+def test_jobs_for_same_printer_share_a_spool_job(spooled):
+    manager = _manager()
+
+    async def run():
+        first = manager.submit([{'mtag': 'A', 'name': 'Given', 'expiry': '2031'}], 'Einfach', 'Zebra')
+        second = manager.submit([{'mtag': 'B'}], 'Standard', 'Zebra')
+        other = manager.submit([{'mtag': 'C'}], 'Standard', 'Brother')
+        for job in (first, second, other):
+            await _wait(job)
+        await manager.stop()
+
+    asyncio.run(run())
+    assert sorted((printer, len(images)) for printer, images in spooled) == [('Brother', 1), ('Zebra', 2)]
+    zebra = [images for printer, images in spooled if printer == 'Zebra'][0]
+    assert zebra[0] == 'png:Einfach|Given|2031|https://cal/qrcode/A'
+
+
+def test_failed_labels_are_reported(spooled):
+    manager = _manager()
+
+    async def run():
+        job = manager.submit([{'mtag': 'A'}, {'mtag': 'X'}, {'mtag': 'B', 'name': 'BROKEN'}], 'Standard', 'Zebra')
+        offline = manager.submit([{'mtag': 'C'}], 'Standard', 'offline')
+        await _wait(job)
+        await _wait(offline)
+        await manager.stop()
+        return job, offline
+
+    job, offline = asyncio.run(run())
+    assert job.status == 'failed'
+    assert job.printed == 1
+    assert sorted(e['mtag'] for e in job.errors) == ['B', 'X']
+    assert offline.errors == [{'mtag': 'C', 'error': 'printer offline'}]
+
+
+def test_submit_validates_items():
+    manager = _manager()
+    with pytest.raises(ValueError):
+        manager.submit([], 'Standard', 'Zebra')
+    with pytest.raises(ValueError):
+        manager.submit([{'mtag': ''}], 'Standard', 'Zebra')
+    with pytest.raises(ValueError):
+        manager.submit([{'mtag': 'A'}], 'Standard', '')
+
+
+def test_lookup_devices_chunks_requests(monkeypatch):
+    filters = []
+
+    def fake_iter(base_url, username, password, api_key, payload):
+        filters.append(payload[0]['value'])
+        return iter([[{'MTAG': m, 'inventory': {'I4201': f'Dev {m}'}} for m in payload[0]['value']]])
+
+    monkeypatch.setattr(print_jobs, 'iter_calibration_data', fake_iter)
+    login = {'base_url': 'u', 'username': 'n', 'password': 'p', 'api_key': 'k'}
+    rows = print_jobs.lookup_devices([str(i) for i in range(150)] + ['1'], login)
+    assert [len(f) for f in filters] == [100, 50]
+    assert rows['149']['I4201'] == 'Dev 149'
+
+
+def test_lookup_devices_falls_back_to_mirror(monkeypatch):
+    mirror_mod = importlib.import_module('app.mirror')
+    mirror = mirror_mod.CalibrationMirror(':memory:')
+    mirror.store(mirror_mod.mirror_source('u', 'n', 'k'), [{'MTAG': 'A', 'I4201': 'Waage', 'C2303': '2030-01-01'}])
+    mirror.store(mirror_mod.mirror_source('u', 'other', 'k2'), [{'MTAG': 'B', 'I4201': 'Fremd', 'C2303': '2030-01-01'}])
+
+    def unreachable(*args):
+        raise ConnectionError('calServer down')
+
+    monkeypatch.setattr(print_jobs, 'iter_calibration_data', unreachable)
+    monkeypatch.setattr(print_jobs, 'get_mirror', lambda: mirror)
+    login = {'base_url': 'u', 'username': 'n', 'password': 'p', 'api_key': 'k'}
+    found = print_jobs.lookup_devices(['A', 'B'], login)
+    assert found['A']['I4201'] == 'Waage'
+    assert 'B' not in found
+
+    monkeypatch.setattr(print_jobs, 'get_mirror', lambda: None)
+    with pytest.raises(ConnectionError):
+        print_jobs.lookup_devices(['A'], login)
+
+
+def test_job_status_is_visible_to_other_workers(spooled):
+    store = importlib.import_module('app.shared_store').MemoryStore()
+    manager = _manager(store=store)
+    other = _manager(store=store)
+
+    async def run():
+        job = manager.submit([{'mtag': 'A'}], 'Standard', 'Zebra')
+        queued = other.status(job.id)
+        await _wait(job)
+        await manager.stop()
+        return job, queued
+
+    job, queued = asyncio.run(run())
+    assert queued['status'] == 'queued'
+    assert other.status(job.id) == job.to_dict()
+    assert other.status(job.id)['status'] == 'done'
+    assert other.status('unknown') is None
@@ -1,3 +1,4 @@
+import json
 import importlib
 import sys
 import types
@@ -156,3 +157,170 @@ def test_print_file_cups(monkeypatch):
     pu.print_file('dummy.pdf', 'printer')
     assert printed.get('file') == 'dummy.pdf'
 
+
+
+def _cups_with_printers(printers, jobs=None, printed=None):
+    def print_file(printer, path, title, options):
+        if printed is not None:
+            printed.append(printer)
+    return types.SimpleNamespace(Connection=lambda: types.SimpleNamespace(
+        getPrinters=lambda: printers,
+        getJobs=lambda **kw: jobs or {},
+        printFile=print_file,
+    ))
+
+
+def test_printer_group_least_queued(monkeypatch):
+    pu = _load_print_utils()
+    monkeypatch.setattr(pu.platform, 'system', lambda: 'Linux')
+    printers = {
+        'zebra1': {'printer-state': 4, 'printer-state-reasons': ['none']},
+        'zebra2': {'printer-state': 3, 'printer-state-reasons': ['none']},
+    }
+    jobs = {1: {'job-printer-uri': 'ipp://localhost/printers/zebra1'}}
+    printed = []
+    monkeypatch.setattr(pu, 'cups', _cups_with_printers(printers, jobs, printed))
+    pu.register_printer_group('Etiketten', ['zebra1', 'zebra2'])
+
+    for _ in range(3):
+        assert pu.print_file('label.pdf', 'Etiketten') == 'zebra2'
+    assert printed == ['zebra2'] * 3
+    assert pu.list_printers()[0] == 'Etiketten'
+
+
+def test_printer_group_round_robin_skips_paused(monkeypatch):
+    pu = _load_print_utils()
+    monkeypatch.setattr(pu.platform, 'system', lambda: 'Linux')
+    printers = {
+        'a': {'printer-state': 3, 'printer-state-reasons': ['none']},
+        'b': {'printer-state': 5, 'printer-state-reasons': ['paused']},
+        'c': {'printer-state': 3, 'printer-state-reasons': ['media-empty-error']},
+        'd': {'printer-state': 3, 'printer-state-reasons': ['none']},
+    }
+    printed = []
+    monkeypatch.setattr(pu, 'cups', _cups_with_printers(printers, printed=printed))
+    pu.load_printer_groups('{"Pool": {"members": ["a", "b", "c", "d"], "strategy": "round_robin"}}')
+
+    for _ in range(4):
+        pu.print_file('label.pdf', 'Pool')
+    assert set(printed) == {'a', 'd'}
+    assert printed.count('a') == printed.count('d') == 2
+
+
+def test_printer_group_failover(monkeypatch):
+    pu = _load_print_utils()
+    monkeypatch.setattr(pu.platform, 'system', lambda: 'Other')
+    pu.register_printer_group('Pool', ['broken', 'ok'], strategy='round_robin')
+    sent = []
+
+    def send(member):
+        if member == 'broken':
+            raise OSError('offline')
+        sent.append(member)
+
+    assert pu._dispatch('Pool', send) == 'ok'
+    assert pu._dispatch('Pool', send) == 'ok'
+    assert pu.PRINTER_GROUPS['Pool'].candidates() == ['ok']
+
+
+def test_printer_group_all_unavailable(monkeypatch):
+    pu = _load_print_utils()
+    monkeypatch.setattr(pu.platform, 'system', lambda: 'Linux')
+    printers = {'a': {'printer-state': 5, 'printer-state-reasons': ['paused']}}
+    monkeypatch.setattr(pu, 'cups', _cups_with_printers(printers))
+    pu.register_printer_group('Pool', ['a', 'missing'])
+    with pytest.raises(RuntimeError):
+        pu.print_file('label.pdf', 'Pool')
+
+
+def test_print_images_single_spool_job(monkeypatch):
+    pu = _load_print_utils()
+    saved = {}
+
+    class Page:
+        mode = 'RGB'
+
+        def save(self, path, fmt=None, save_all=False, append_images=()):
+            saved.update(path=path, fmt=fmt, save_all=save_all, pages=1 + len(append_images))
+
+    spooled = []
+    monkeypatch.setattr(pu, '_spool_file', lambda path, printer: spooled.append((path, printer)))
+    unlinked = []
+    monkeypatch.setattr(pu.os, 'unlink', lambda path: unlinked.append(path))
+
+    assert pu.print_images([Page(), Page(), Page()], 'Zebra') == 'Zebra'
+    assert saved['fmt'] == 'PDF' and saved['save_all'] and saved['pages'] == 3
+    assert spooled == [(saved['path'], 'Zebra')]
+    assert unlinked == [saved['path']]
+    with pytest.raises(ValueError):
+        pu.print_images([], 'Zebra')
+
+
+class PngImage:
+    def save(self, target, format=None):
+        target.write(b'png-bytes')
+
+
+def test_virtual_printer_writes_jobs(monkeypatch, tmp_path):
+    pu = _load_print_utils(with_win32=False, with_cups=False)
+    monkeypatch.setattr(pu.platform, 'system', lambda: 'Linux')
+    spool = tmp_path / 'spool'
+    pu.load_printer_backends({'Virtual': {'type': 'virtual', 'directory': str(spool)}})
+    pdf = tmp_path / 'label.pdf'
+    pdf.write_bytes(b'%PDF-1.4 label')
+
+    assert pu.list_printers() == ['Virtual']
+    assert pu.print_label(PngImage(), 'Virtual') == 'Virtual'
+    assert pu.print_file(str(pdf), 'Virtual') == 'Virtual'
+
+    printer = pu.PRINTER_BACKENDS['Virtual']
+    assert printer.stats()['jobs'] == 2
+    assert printer.stats()['bytes'] == len(b'png-bytes') + len(b'%PDF-1.4 label')
+    assert pu.printer_status('Virtual') == {'state': 'idle', 'jobs': 0}
+    files = sorted(p.name for p in spool.iterdir())
+    assert files[-1] == 'jobs.jsonl' and files[0].endswith('.png') and files[1].endswith('.pdf')
+    log = [json.loads(line) for line in (spool / 'jobs.jsonl').read_text().splitlines()]
+    assert [entry['bytes'] for entry in log] == [9, 14]
+
+
+def test_virtual_printer_discards_and_joins_groups(monkeypatch):
+    pu = _load_print_utils()
+    monkeypatch.setattr(pu.platform, 'system', lambda: 'Other')
+    null = pu.register_printer_backend(pu.VirtualPrinter('Null'))
+    pu.register_printer_group('Pool', ['Null'])
+
+    assert pu.list_printers() == ['Pool', 'Null']
+    assert pu.print_label(PngImage(), 'Pool') == 'Null'
+    assert null.stats()['jobs'] == 1
+
+
+def test_printer_backend_from_import_path(monkeypatch):
+    pu = _load_print_utils()
+    module = types.ModuleType('custom_backend')
+
+    class Custom(pu.PrinterBackend):
+        def __init__(self, name, host):
+            super().__init__(name)
+            self.host = host
+
+        def print_image(self, image):
+            pass
+
+        def print_file(self, file_path):
+            pass
+
+    module.Custom = Custom
+    monkeypatch.setitem(sys.modules, 'custom_backend', module)
+    pu.load_printer_backends('{"Remote": {"type": "custom_backend:Custom", "host": "10.0.0.5"}}')
+    assert pu.PRINTER_BACKENDS['Remote'].host == '10.0.0.5'
+
+
+def test_printer_backend_requires_print_methods():
+    pu = _load_print_utils()
+
+    class Incomplete(pu.PrinterBackend):
+        def print_image(self, image):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete('Half')
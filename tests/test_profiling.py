@@ -0,0 +1,86 @@
+import asyncio
+import importlib
+import json
+import os
+import pstats
+import time
+
+profiling = importlib.import_module('app.profiling')
+
+
+def _busy(seconds=0.02):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return 'done'
+
+
+def test_disabled_actions_are_not_profiled(tmp_path):
+    profiler = profiling.Profiler(str(tmp_path))
+    wrapped = profiler.wrap('do_print', _busy)
+    assert wrapped() == 'done'
+    assert profiler.files() == []
+
+
+def test_enable_and_disable():
+    profiler = profiling.Profiler()
+    profiler.enable('all')
+    assert profiler.enabled == set(profiling.ACTIONS)
+    profiler.disable('do_print, update_label')
+    assert profiler.enabled == {'fetch_data'}
+    profiler.disable()
+    assert profiler.enabled == set()
+
+
+def test_cprofile_writes_pstats(tmp_path):
+    profiler = profiling.Profiler(str(tmp_path))
+    profiler.enable('do_print')
+    wrapped = profiler.wrap('do_print', _busy)
+    assert wrapped() == 'done'
+    files = profiler.files()
+    assert len(files) == 1 and files[0].endswith('.pstats') and '-do_print-' in files[0]
+    stats = pstats.Stats(os.path.join(str(tmp_path), files[0]))
+    assert any(func[2] == '_busy' for func in stats.stats)
+
+
+def test_async_actions_in_sample_mode(tmp_path):
+    profiler = profiling.Profiler(str(tmp_path), mode='sample', interval=0.001)
+    profiler.enable('fetch_data')
+
+    async def load():
+        return _busy(0.05)
+
+    assert asyncio.run(profiler.wrap('fetch_data', load)()) == 'done'
+    files = profiler.files()
+    assert len(files) == 1 and files[0].endswith('.json')
+    with open(os.path.join(str(tmp_path), files[0])) as fh:
+        data = json.load(fh)
+    profile = data['profiles'][0]
+    assert profile['type'] == 'sampled' and profile['samples']
+    names = {data['shared']['frames'][i]['name'] for stack in profile['samples'] for i in stack}
+    assert '_busy' in names
+
+
+def test_rotation_keeps_newest(tmp_path):
+    profiler = profiling.Profiler(str(tmp_path), keep=2)
+    profiler.enable('do_print')
+    wrapped = profiler.wrap('do_print', lambda: None)
+    for _ in range(4):
+        wrapped()
+        time.sleep(0.01)
+    assert len(profiler.files()) == 2
+
+
+def test_profile_window(tmp_path):
+    profiler = profiling.Profiler(str(tmp_path), interval=0.001)
+    thread = profiler.profile_window(0.05)
+    _busy(0.08)
+    thread.join()
+    files = profiler.files()
+    assert len(files) == 1 and '-window-' in files[0]
+
+
+def test_unknown_mode_from_env_falls_back_to_cprofile(monkeypatch, caplog):
+    monkeypatch.setenv('PROFILE_MODE', 'perf')
+    assert profiling._mode_from_env() == 'cprofile'
+    assert 'PROFILE_MODE' in caplog.text
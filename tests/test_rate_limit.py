@@ -0,0 +1,97 @@
+import importlib
+import threading
+import time
+
+import pytest
+
+rate_limit = importlib.import_module('app.rate_limit')
+
+
+def test_token_bucket_limits_rate():
+    limiter = rate_limit.RateLimiter(rate=50, burst=2, max_concurrency=10)
+    started = time.monotonic()
+    for _ in range(4):
+        with limiter.slot():
+            pass
+    # two from the burst, two refilled at 50/s
+    assert time.monotonic() - started >= 0.03
+
+
+def test_concurrency_cap_and_timeout():
+    limiter = rate_limit.RateLimiter(rate=0, max_concurrency=1)
+    limiter.acquire()
+    with pytest.raises(rate_limit.CalServerBusy):
+        limiter.acquire(timeout=0.05)
+    assert limiter.stats()['waiting'] == 0
+    limiter.release()
+    assert limiter.acquire(timeout=0.05) < 0.05
+
+
+def test_interactive_requests_go_first():
+    limiter = rate_limit.RateLimiter(rate=0, max_concurrency=1)
+    limiter.acquire()
+    order = []
+
+    def request(priority):
+        with limiter.slot(priority):
+            order.append(priority)
+
+    background = threading.Thread(target=request, args=('background',))
+    background.start()
+    while limiter.stats()['waiting'] < 1:
+        time.sleep(0.001)
+    interactive = threading.Thread(target=request, args=('interactive',))
+    interactive.start()
+    while limiter.stats()['waiting'] < 2:
+        time.sleep(0.001)
+    limiter.release()
+    background.join(1)
+    interactive.join(1)
+    assert order == ['interactive', 'background']
+
+
+def test_background_leaves_slots_for_operators():
+    limiter = rate_limit.RateLimiter(rate=0, max_concurrency=4)
+    limiter.acquire('background')
+    limiter.acquire('background')
+    with pytest.raises(rate_limit.CalServerBusy):
+        limiter.acquire('background', timeout=0.02)
+    limiter.acquire('interactive', timeout=0.02)
+    with pytest.raises(ValueError):
+        limiter.acquire('prefetch')
+
+
+def test_aimd_adjusts_concurrency():
+    limiter = rate_limit.RateLimiter(max_concurrency=8, target_latency=1.0, cooldown=10)
+    limiter.observe(5.0, 200)
+    assert limiter.limit == 4
+    limiter.observe(None)  # within the cooldown
+    assert limiter.limit == 4
+    for _ in range(4):
+        limiter.observe(0.1, 200)
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+    limiter.observe(0.1, 401)  # client errors do not mean overload
+    assert limiter.limit > 5
+
+
+def test_retry_after_blocks_requests():
+    limiter = rate_limit.RateLimiter(rate=0)
+    limiter.observe(0.1, 429, '0.05')
+    assert limiter.throttled == 1
+    assert limiter.acquire() >= 0.04
+    limiter.release()
+    limiter.observe(0.1, 503)
+    assert limiter.stats()['blocked_for'] > 0.5
+
+
+def test_parse_retry_after():
+    assert rate_limit.parse_retry_after('120') == 120
+    assert rate_limit.parse_retry_after(None) is None
+    assert rate_limit.parse_retry_after('soon') is None
+    assert rate_limit.parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT', now=1445412470) == 10
+
+
+def test_one_limiter_per_host():
+    a = rate_limit.get_limiter('https://Cal.example.com/api/calibration')
+    assert rate_limit.get_limiter('https://cal.example.com/other') is a
+    assert rate_limit.get_limiter('https://other.example.com/api/calibration') is not a
@@ -0,0 +1,159 @@
+import asyncio
+import importlib
+import threading
+import time
+
+import pytest
+
+render_service = importlib.import_module('app.render_service')
+
+
+def _slow(seconds, value=None):
+    time.sleep(seconds)
+    return value
+
+
+def test_submit_returns_result():
+    service = render_service.RenderService(workers=0)
+
+    async def run():
+        return await service.submit(_slow, 0, 'done')
+
+    assert asyncio.run(run()) == 'done'
+    assert service.pending == 0
+    service.shutdown()
+
+
+def test_submit_timeout():
+    service = render_service.RenderService(workers=0, timeout=0.05)
+
+    async def run():
+        await service.submit(_slow, 0.3)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+    service.shutdown()
+
+
+def test_bounded_queue_applies_backpressure():
+    service = render_service.RenderService(workers=0, max_pending=1, queue_timeout=0.05)
+    release = threading.Event()
+
+    async def run():
+        first = asyncio.ensure_future(service.submit(release.wait, 1))
+        await asyncio.sleep(0.01)
+        assert service.pending == 1
+        with pytest.raises(render_service.RenderQueueFull):
+            await service.submit(_slow, 0)
+        release.set()
+        await first
+        # once the slot is free again new jobs are accepted
+        assert await service.submit(_slow, 0, 'ok') == 'ok'
+
+    asyncio.run(run())
+    service.shutdown()
+
+
+def test_get_render_service_from_env(monkeypatch):
+    monkeypatch.setattr(render_service, '_service', None)
+    monkeypatch.setenv('RENDER_WORKERS', '0')
+    monkeypatch.setenv('RENDER_QUEUE', '3')
+    service = render_service.get_render_service()
+    assert service.workers == 0
+    assert service.max_pending == 3
+    assert render_service.get_render_service() is service
+
+
+def test_render_results_are_cached(monkeypatch):
+    artifacts = importlib.import_module('app.artifacts')
+    artifacts.RENDER_CACHE.clear()
+    calls = []
+
+    def fake_pdf(svg):
+        calls.append(svg)
+        return b'%PDF'
+
+    monkeypatch.setattr(render_service, '_render_pdf', fake_pdf)
+    service = render_service.RenderService(workers=0)
+
+    async def run():
+        return [await service.pdf('<svg/>'), await service.pdf('<svg/>'), await service.pdf('<svg></svg>')]
+
+    metrics = importlib.import_module('app.metrics')
+    backend = importlib.import_module('app.svg_utils').get_backend()
+    converted = metrics.CONVERT_SECONDS.count(backend=backend, format='pdf')
+    assert asyncio.run(run()) == [b'%PDF'] * 3
+    assert calls == ['<svg/>', '<svg></svg>']
+    # conversions are timed in this process, cache hits are not
+    assert metrics.CONVERT_SECONDS.count(backend=backend, format='pdf') == converted + 2
+    assert artifacts.render_key('pdf', '<svg/>') in artifacts.RENDER_CACHE
+    service.shutdown()
+    artifacts.RENDER_CACHE.clear()
+
+
+def test_shared_cache_is_written_off_the_loop(monkeypatch):
+    artifacts = importlib.import_module('app.artifacts')
+    shared_store = importlib.import_module('app.shared_store')
+    writers = []
+
+    class RecordingStore(shared_store.MemoryStore):
+        def set(self, key, value, ttl=None):
+            writers.append(threading.get_ident())
+            super().set(key, value, ttl)
+
+    artifacts.RENDER_CACHE.clear()
+    monkeypatch.setattr(artifacts.RENDER_CACHE, 'shared', RecordingStore())
+    monkeypatch.setattr(render_service, '_render_pdf', lambda svg: b'%PDF')
+    service = render_service.RenderService(workers=0)
+
+    async def run():
+        return await service.pdf('<svg/>'), threading.get_ident()
+
+    data, loop_thread = asyncio.run(run())
+    assert data == b'%PDF'
+    assert writers and loop_thread not in writers
+    service.shutdown()
+    artifacts.RENDER_CACHE.clear()
+
+
+def test_bitmap_labels_are_cached(monkeypatch):
+    artifacts = importlib.import_module('app.artifacts')
+    artifacts.RENDER_CACHE.clear()
+    calls = []
+
+    def fake_bitmap(name, expiry, qr_data):
+        calls.append(name)
+        return b'PNG'
+
+    monkeypatch.setattr(render_service, '_render_bitmap', fake_bitmap)
+    service = render_service.RenderService(workers=0)
+
+    async def run():
+        return [await service.bitmap_bytes('Waage', '2030-01-01', 'https://cal/qrcode/M1') for _ in range(2)]
+
+    assert asyncio.run(run()) == [b'PNG'] * 2
+    assert calls == ['Waage']
+    assert artifacts.bitmap_key('Waage', '2030-01-01', 'https://cal/qrcode/M1') in artifacts.RENDER_CACHE
+    service.shutdown()
+    artifacts.RENDER_CACHE.clear()
+
+
+def test_workers_are_recognisable():
+    assert not render_service.in_worker()
+    service = render_service.RenderService(workers=1)
+
+    async def run():
+        return await service.submit(render_service.in_worker)
+
+    try:
+        assert asyncio.run(run()) is True
+    finally:
+        service.shutdown()
+
+
+def test_warm_up_uses_backend_of_parent(monkeypatch):
+    svg_utils = importlib.import_module('app.svg_utils')
+    monkeypatch.setattr(svg_utils, '_backend', 'auto')
+    monkeypatch.setattr(svg_utils, 'benchmark_backends', lambda: pytest.fail('benchmarked in worker'))
+    render_service._warm_up('cairosvg')
+    assert svg_utils.get_backend() == 'cairosvg'
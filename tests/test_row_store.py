@@ -0,0 +1,60 @@
+import importlib
+
+row_store = importlib.import_module('app.row_store')
+
+ENTRY = {
+    'C2301': '2024-01-01',
+    'C2303': '2025-01-01',
+    'C2339': 1,
+    'inventory': {'I4201': 'Waage', 'I4202': 'Sartorius', 'MTAG': 'MT-7'},
+}
+
+
+def test_row_from_entry_defaults():
+    row = row_store.row_from_entry(ENTRY)
+    assert row['I4201'] == 'Waage'
+    assert row['I4203'] == '-'
+    assert row['MTAG'] == 'MT-7'
+    assert row['C2339'] == 1
+    assert row_store.row_from_entry({'MTAG': 'top'})['MTAG'] == 'top'
+
+
+def test_store_round_trip_and_views():
+    store = row_store.RowStore()
+    rows = [row_store.row_from_entry(dict(ENTRY, MTAG=f'MT-{i}')) for i in range(5)]
+    store.extend(rows)
+    assert len(store) == 5
+    assert store[2] == rows[2]
+    assert store[-1] == rows[-1]
+    assert store[1:3] == rows[1:3]
+    assert store.rows([4, 0]) == [rows[4], rows[0]]
+    assert store.column('MTAG') == [f'MT-{i}' for i in range(5)]
+    assert store.value(3, 'I4202') == 'Sartorius'
+    assert list(store) == rows
+
+
+def test_repeated_values_are_stored_once():
+    store = row_store.RowStore()
+    store.extend(row_store.row_from_entry(ENTRY) for _ in range(100))
+    assert store._values['I4202'] == ['Sartorius']
+    assert len(store._codes['I4202']) == 100
+
+
+def test_set_row_and_clear():
+    store = row_store.RowStore()
+    store.append(row_store.row_from_entry(ENTRY))
+    store.set_row(0, dict(store[0], I4201='Pipette'))
+    assert store[0]['I4201'] == 'Pipette'
+    store.clear()
+    assert len(store) == 0
+
+
+def test_unhashable_values_keep_rows_aligned():
+    store = row_store.RowStore(('MTAG', 'I4201', 'C2339'))
+    store.append({'MTAG': 'A', 'I4201': {'de': 'Waage'}, 'C2339': 1})
+    store.append({'MTAG': 'B', 'I4201': ['x', 'y'], 'C2339': 0})
+    store.append({'MTAG': 'C', 'I4201': 'Multimeter', 'C2339': 1})
+    assert len(store) == 3
+    assert store[0] == {'MTAG': 'A', 'I4201': '{"de": "Waage"}', 'C2339': 1}
+    assert store.column('MTAG') == ['A', 'B', 'C']
+    assert store.value(2, 'I4201') == 'Multimeter'
@@ -0,0 +1,46 @@
+import importlib
+
+search_index = importlib.import_module('app.search_index')
+table_data = importlib.import_module('app.table_data')
+
+ROWS = [
+    {'I4201': 'Multimeter', 'I4202': 'Fluke', 'I4203': '87V', 'I4204': '-', 'I4206': 'SN1001', 'MTAG': 'MT-1'},
+    {'I4201': 'Waage', 'I4202': 'Sartorius', 'I4203': 'BP61', 'I4204': 'Laborwaage', 'I4206': 'SN2002', 'MTAG': 'MT-2'},
+    {'I4201': 'Druckmesser', 'I4202': 'WIKA', 'I4203': 'CPG1500', 'I4204': '-', 'I4206': 'SN3003', 'MTAG': 'MT-3'},
+]
+
+
+def _index(rows=ROWS):
+    idx = search_index.SearchIndex()
+    idx.build(rows)
+    return idx
+
+
+def test_query_matches_linear_scan():
+    idx = _index()
+    for needle in ['', 'm', 'sn', 'waage', 'SN2', 'mt-3', 'fluke', 'zzz', 'e-w']:
+        expected = table_data.filter_rows(ROWS, search=needle)
+        assert [ROWS[i] for i in idx.query(needle)] == expected, needle
+
+
+def test_match_does_not_span_fields():
+    idx = _index()
+    # "Fluke" + "87V" must not match "ke8"
+    assert idx.query('ke8') == []
+
+
+def test_incremental_extend_and_update():
+    rows = [dict(r) for r in ROWS]
+    idx = _index(rows[:1])
+    idx.extend(rows[1:])
+    assert idx.query('wika') == [2]
+    rows[0] = dict(rows[0], I4202='Keysight')
+    idx.update(0, rows[0])
+    assert idx.query('fluke') == []
+    assert idx.query('keysight') == [0]
+
+
+def test_filter_rows_uses_index():
+    idx = _index()
+    rows = table_data.filter_rows(ROWS, search='sartorius', index=idx)
+    assert rows == [ROWS[1]]
@@ -0,0 +1,105 @@
+import asyncio
+import base64
+import importlib
+import threading
+
+import pytest
+
+session_mod = importlib.import_module('app.session')
+
+
+class ReversingCipher:
+    """Stand-in for Fernet: enough to see that only ciphertext is stored."""
+
+    def encrypt(self, data):
+        return base64.b64encode(data[::-1])
+
+    def decrypt(self, token):
+        return base64.b64decode(token)[::-1]
+
+
+def test_sessions_are_isolated():
+    manager = session_mod.SessionManager()
+    a = manager.get('a')
+    b = manager.get('b')
+    a.login['username'] = 'alice'
+    a.all_rows.append({'MTAG': '1'})
+    assert b.login == {} and len(b.all_rows) == 0
+    assert manager.get('a') is a
+    assert len(manager) == 2
+
+
+def test_evict_idle_sessions():
+    manager = session_mod.SessionManager(idle_timeout=10)
+    old = manager.get('old')
+    manager.get('new')
+    old.last_seen -= 60
+    assert manager.evict_idle() == ['old']
+    assert len(manager) == 1
+
+
+def test_memory_usage_grows_with_rows():
+    manager = session_mod.SessionManager()
+    s = manager.get('s')
+    empty = manager.memory_usage()['s']
+    s.all_rows.extend({'I4201': f'Device {i}', 'MTAG': str(i)} for i in range(100))
+    assert manager.memory_usage()['s'] > empty
+    s.clear()
+    assert len(s.all_rows) == 0 and s.login == {}
+
+
+def test_login_is_shared_between_workers():
+    store = importlib.import_module('app.shared_store').MemoryStore()
+    worker_a = session_mod.SessionManager(idle_timeout=60, store=store, cipher=ReversingCipher())
+    worker_b = session_mod.SessionManager(idle_timeout=60, store=store, cipher=ReversingCipher())
+    worker_a.get('s').set_login({'username': 'alice', 'password': 'secret'})
+    assert b'secret' not in store.get('session:s')
+    assert worker_b.get('s').login == {'username': 'alice', 'password': 'secret'}
+    assert worker_b.get('other').login == {}
+    worker_b.get('s').clear()
+    assert session_mod.SessionManager(store=store, cipher=ReversingCipher()).get('s').login == {}
+
+
+def test_login_is_not_stored_without_cipher():
+    store = importlib.import_module('app.shared_store').MemoryStore()
+    manager = session_mod.SessionManager(store=store)
+    manager.get('s').set_login({'username': 'alice', 'password': 'secret'})
+    assert store.get('session:s') is None
+    assert manager.get('s').login['username'] == 'alice'
+
+
+def test_unreadable_login_is_ignored():
+    store = importlib.import_module('app.shared_store').MemoryStore()
+    store.set('session:s', b'not a token')
+    assert session_mod.SessionManager(store=store, cipher=ReversingCipher()).get('s').login == {}
+
+
+def test_login_cipher():
+    assert session_mod.login_cipher('') is None
+    pytest.importorskip('cryptography')
+    token = session_mod.login_cipher('s3cret').encrypt(b'{"password": "p"}')
+    assert b'password' not in token
+    assert session_mod.login_cipher('s3cret').decrypt(token) == b'{"password": "p"}'
+
+
+def test_touch_refreshes_the_stored_login_off_the_loop():
+    shared_store = importlib.import_module('app.shared_store')
+    writers = []
+
+    class RecordingStore(shared_store.MemoryStore):
+        def set(self, key, value, ttl=None):
+            writers.append(threading.get_ident())
+            super().set(key, value, ttl)
+
+    manager = session_mod.SessionManager(idle_timeout=60, store=RecordingStore(), cipher=ReversingCipher())
+    session = manager.get('s')
+    session.set_login({'username': 'alice'})
+    session._stored -= 60
+
+    async def run():
+        session.touch()
+        return threading.get_ident()
+
+    # asyncio.run() waits for the default executor before returning
+    loop_thread = asyncio.run(run())
+    assert len(writers) == 2 and writers[1] != loop_thread
@@ -0,0 +1,87 @@
+import importlib
+import time
+
+import pytest
+
+shared_store = importlib.import_module('app.shared_store')
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    s = shared_store.MemoryStore() if request.param == 'memory' else shared_store.SQLiteStore(str(tmp_path / 's.db'))
+    yield s
+    s.close()
+
+
+def test_set_get_delete(store):
+    assert store.get('a') is None
+    store.set('a', b'1')
+    assert store.get('a') == b'1'
+    store.set('a', b'2')
+    assert store.get('a') == b'2'
+    store.delete('a')
+    assert store.get('a') is None
+
+
+def test_entries_expire(store, monkeypatch):
+    store.set('a', b'1', ttl=10)
+    now = time.time()
+    monkeypatch.setattr(shared_store.time, 'time', lambda: now + 11)
+    assert store.get('a') is None
+
+
+def test_sqlite_file_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / 'sub' / 'shared.sqlite3')
+    first, second = shared_store.SQLiteStore(path), shared_store.SQLiteStore(path)
+    first.set('session:1', b'{}')
+    assert second.get('session:1') == b'{}'
+    second.delete('session:1')
+    assert first.get('session:1') is None
+    first.close()
+    second.close()
+
+
+def test_sqlite_purge_keeps_newest_entries(tmp_path):
+    store = shared_store.SQLiteStore(str(tmp_path / 's.sqlite3'), max_entries=2, purge_every=1000)
+    store.set('session:a', b'login')
+    for i in range(4):
+        store.set(f'render:{i}', b'x')
+    store.set('job:1', b'job')
+    store.set('old', b'x', ttl=-1)
+    store.purge()
+    keys = ('render:0', 'render:1', 'render:2', 'render:3', 'old')
+    assert [store.get(k) for k in keys] == [None, None, b'x', b'x', None]
+    # only the render cache is bounded, logins and jobs stay until they expire
+    assert store.get('session:a') == b'login'
+    assert store.get('job:1') == b'job'
+    store.close()
+
+
+def test_open_store_urls(tmp_path):
+    assert isinstance(shared_store.open_store('memory'), shared_store.MemoryStore)
+    sqlite = shared_store.open_store(f'sqlite:{tmp_path}/a.sqlite3')
+    assert isinstance(sqlite, shared_store.SQLiteStore) and sqlite.path == f'{tmp_path}/a.sqlite3'
+    assert isinstance(shared_store.open_store('app.shared_store:MemoryStore'), shared_store.MemoryStore)
+    with pytest.raises(ValueError):
+        shared_store.open_store('redis')
+
+
+def test_get_store_from_env(monkeypatch):
+    monkeypatch.setattr(shared_store, '_configured', False)
+    monkeypatch.setattr(shared_store, '_store', None)
+    monkeypatch.setenv('SHARED_STORE', 'nonexistent.module:Store')
+    assert shared_store.get_store() is None
+    monkeypatch.setattr(shared_store, '_configured', False)
+    monkeypatch.setenv('SHARED_STORE', 'memory')
+    store = shared_store.get_store()
+    assert isinstance(store, shared_store.MemoryStore)
+    assert shared_store.get_store() is store
+
+
+def test_store_drivers_must_implement_all_methods():
+    class GetOnly(shared_store.SharedStore):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
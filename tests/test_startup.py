@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import sys
+import textwrap
+
+from app import startup
+
+
+def test_lazy_import_defers_execution(tmp_path, monkeypatch):
+    (tmp_path / "lazy_probe.py").write_text("import builtins\nbuiltins.lazy_probe_loaded = True\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import builtins
+
+    try:
+        module = startup.lazy_import("lazy_probe")
+        assert not hasattr(builtins, "lazy_probe_loaded")
+        assert module.VALUE == 42
+        assert builtins.lazy_probe_loaded
+        assert startup.lazy_import("lazy_probe") is sys.modules["lazy_probe"]
+    finally:
+        sys.modules.pop("lazy_probe", None)
+        if hasattr(builtins, "lazy_probe_loaded"):
+            del builtins.lazy_probe_loaded
+
+
+def test_lazy_import_loads_once_across_threads(tmp_path, monkeypatch):
+    (tmp_path / "lazy_slow.py").write_text(
+        "import builtins, time\n"
+        "builtins.lazy_slow_runs = getattr(builtins, 'lazy_slow_runs', 0) + 1\n"
+        "time.sleep(0.1)\n"
+        "VALUE = 7\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import builtins
+    import threading
+
+    try:
+        module = startup.lazy_import("lazy_slow")
+        values = []
+        threads = [threading.Thread(target=lambda: values.append(module.VALUE)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert values == [7] * 4
+        assert builtins.lazy_slow_runs == 1
+    finally:
+        sys.modules.pop("lazy_slow", None)
+        if hasattr(builtins, "lazy_slow_runs"):
+            del builtins.lazy_slow_runs
+
+
+def test_lazy_import_missing_module():
+    try:
+        startup.lazy_import("no_such_module_xyz")
+    except ImportError as e:
+        assert "no_such_module_xyz" in str(e)
+    else:
+        raise AssertionError("ImportError expected")
+
+
+def test_warm_up_skips_missing_modules():
+    timings = startup.warm_up(["json", "no_such_module_xyz"])
+    assert list(timings) == ["json"]
+
+
+def test_warm_up_in_background_marks_done(monkeypatch):
+    monkeypatch.setattr(startup, "_marks", {})
+    startup.warm_up_in_background(["json"]).join(5)
+    assert "warm_up_done" in startup.marks()
+
+
+def test_mark_records_first_time_only(monkeypatch):
+    monkeypatch.setattr(startup, "_marks", {})
+    startup.mark("first_print_latency", 0.5)
+    startup.mark("first_print_latency", 0.1)
+    startup.mark("listening")
+    marks = startup.marks()
+    assert marks["first_print_latency"] == 0.5
+    assert marks["listening"] >= 0
+
+
+def test_parse_importtime():
+    output = textwrap.dedent("""\
+        import time: self [us] | cumulative | imported package
+        import time:       120 |        120 |   _io
+        import time:       300 |        900 | jinja2
+        import time:        50 |         50 |     markupsafe
+    """)
+    entries = startup.parse_importtime(output)
+    assert [e["module"] for e in entries] == ["_io", "jinja2", "markupsafe"]
+    assert entries[1] == {"module": "jinja2", "self_us": 300, "cumulative_us": 900, "depth": 0}
+    assert entries[0]["depth"] == 1
+    assert entries[2]["depth"] == 2
+
+
+def test_wait_until_listening_and_free_port():
+    async def scenario():
+        port = startup.free_port()
+        assert not await startup.wait_until_listening("127.0.0.1", port, timeout=0.05)
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", port)
+        async with server:
+            assert await startup.wait_until_listening("127.0.0.1", port, timeout=2)
+
+    asyncio.run(scenario())
+
+
+def test_announce_ready_prints_and_writes_file(tmp_path, capsys):
+    ready_file = tmp_path / "ready.json"
+    startup.announce_ready("http://127.0.0.1:5123", str(ready_file))
+    assert capsys.readouterr().out == "LABELTOOL_READY http://127.0.0.1:5123\n"
+    assert json.loads(ready_file.read_text()) == {"url": "http://127.0.0.1:5123", "port": 5123, "pid": os.getpid()}
+    assert os.listdir(tmp_path) == ["ready.json"]
+    assert "ready" in startup.marks()
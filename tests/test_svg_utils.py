@@ -99,3 +99,55 @@ def test_svg_to_pdf_bytes_fallback():
 def test_svg_to_pdf_bytes_cairosvg():
     su = _load_svg_utils(return_drawing=False)
     assert su.svg_to_pdf_bytes('<svg></svg>') == b'%PDF'
+
+
+def test_drawing_cache_skips_parsing():
+    su = _load_svg_utils()
+    calls = []
+    original = sys.modules['svglib.svglib'].svg2rlg
+    sys.modules['svglib.svglib'].svg2rlg = lambda src: calls.append(src) or original(src)
+
+    su.svg_to_png_image('<svg>a</svg>')
+    su.svg_to_pdf_bytes('<svg>a</svg>')
+    su.svg_to_png_image('<svg>a</svg>')
+    su.svg_to_png_image('<svg>b</svg>')
+
+    assert len(calls) == 2
+    assert su.DRAWING_CACHE.hits == 2
+
+
+def test_cairosvg_backend():
+    su = _load_svg_utils()
+    su.set_backend('cairosvg')
+    assert su.svg_to_pdf_bytes('<svg></svg>') == b'%PDF'
+    assert su.svg_to_png_image('<svg></svg>')[0] == 'IMG'
+
+
+def test_cairosvg_backend_missing_falls_back_to_svglib():
+    su = _load_svg_utils(has_cairosvg=False)
+    su.set_backend('cairosvg')
+    assert su.svg_to_pdf_bytes('<svg></svg>') == b'PDF'
+
+
+def test_auto_backend_picks_fastest(monkeypatch):
+    su = _load_svg_utils()
+    monkeypatch.setattr(su, 'benchmark_backends', lambda: {'svglib': 0.2, 'cairosvg': 0.1})
+    su.set_backend('auto')
+    assert su.get_backend() == 'cairosvg'
+
+
+def test_set_backend_invalid():
+    su = _load_svg_utils()
+    with pytest.raises(ValueError):
+        su.set_backend('inkscape')
+
+
+def test_invalid_backend_from_env_falls_back_to_svglib(monkeypatch, caplog):
+    monkeypatch.setenv('SVG_BACKEND', 'cairo')
+    su = _load_svg_utils()
+    assert su.get_backend() == 'svglib'
+    assert 'cairo' in caplog.text
+    monkeypatch.setenv('SVG_BACKEND', 'cairosvg')
+    assert _load_svg_utils().get_backend() == 'cairosvg'
+    monkeypatch.delenv('SVG_BACKEND')
+    _load_svg_utils()
@@ -0,0 +1,31 @@
+import importlib
+
+table_data = importlib.import_module('app.table_data')
+
+ROWS = [
+    {'I4201': 'Waage', 'I4202': 'Sartorius', 'MTAG': 'M1', 'C2303': '2025-03-01', 'C2339': 1},
+    {'I4201': 'multimeter', 'I4202': 'Fluke', 'MTAG': 'M2', 'C2303': '2024-01-01', 'C2339': 0},
+    {'I4201': 'Druckmesser', 'I4202': 'WIKA', 'MTAG': 'X3', 'C2303': '2026-07-15', 'C2339': 1},
+]
+
+
+def test_filter_rows_search_and_current():
+    assert [r['MTAG'] for r in table_data.filter_rows(ROWS, search='FLUKE')] == ['M2']
+    assert [r['MTAG'] for r in table_data.filter_rows(ROWS, search='m')] == ['M1', 'M2', 'X3']
+    assert [r['MTAG'] for r in table_data.filter_rows(ROWS, only_current=True)] == ['M1', 'X3']
+
+
+def test_sort_rows_case_insensitive():
+    names = [r['I4201'] for r in table_data.sort_rows(ROWS, 'I4201')]
+    assert names == ['Druckmesser', 'multimeter', 'Waage']
+    dates = [r['C2303'] for r in table_data.sort_rows(ROWS, 'C2303', descending=True)]
+    assert dates == ['2026-07-15', '2025-03-01', '2024-01-01']
+    assert table_data.sort_rows(ROWS, None) == ROWS
+
+
+def test_page_rows():
+    rows = list(range(25))
+    assert table_data.page_rows(rows, 1, 10) == list(range(10))
+    assert table_data.page_rows(rows, 3, 10) == [20, 21, 22, 23, 24]
+    assert table_data.page_rows(rows, 4, 10) == []
+    assert table_data.page_rows(rows, 1, 0) == rows
@@ -0,0 +1,104 @@
+import asyncio
+import importlib
+import json
+
+table_diff = importlib.import_module('app.table_diff')
+
+
+class DummyClient:
+    def __init__(self):
+        self.scripts = []
+
+    def run_javascript(self, code):
+        self.scripts.append(code)
+
+
+class DummyTable:
+    id = 7
+
+    def __init__(self):
+        self.client = DummyClient()
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+
+def _rows(keys, qr='x' * 500):
+    return [{'id': k, 'name': f'Device {k}', 'qrcode': qr} for k in keys]
+
+
+def test_diff_rows():
+    old = _rows([1, 2, 3])
+    new = _rows([3, 4, 1])
+    new[2]['name'] = 'renamed'
+    diff = table_diff.diff_rows(old, new, 'id')
+    assert diff['remove'] == [2]
+    assert set(diff['upsert']) == {4, 1}
+    assert diff['order'] == [3, 4, 1]
+
+
+def test_first_push_is_full_update():
+    table = DummyTable()
+    sync = table_diff.TableSync(table, 'id')
+    size = sync.push(_rows([1, 2]), {'page': 1})
+    assert table.updates == 1
+    assert size == table_diff.payload_size({'rows': _rows([1, 2]), 'pagination': {'page': 1}})
+
+
+def test_following_pushes_send_patches():
+    table = DummyTable()
+    sync = table_diff.TableSync(table, 'id')
+    sync.push(_rows(range(10)), {'page': 1})
+
+    size = sync.push(_rows([0, 2, 4, 6, 8]), {'page': 1})
+    assert table.updates == 1
+    script = table.client.scripts[-1]
+    assert 'mounted_app.elements[7]' in script
+    patch = json.loads(script.split('const patch = ', 1)[1].split(';\n', 1)[0])
+    assert patch['remove'] == [1, 3, 5, 7, 9]
+    assert patch['upsert'] == {}
+    assert 'pagination' not in patch
+    assert size < 200
+    assert sync.bytes_saved > 0
+
+
+def test_unchanged_rows_send_nothing():
+    table = DummyTable()
+    sync = table_diff.TableSync(table, 'id')
+    sync.push(_rows([1, 2]), {'page': 1})
+    assert sync.push(_rows([1, 2]), {'page': 1}) == 0
+    assert table.client.scripts == []
+
+
+def test_large_diff_falls_back_to_full_update():
+    table = DummyTable()
+    sync = table_diff.TableSync(table, 'id')
+    sync.push(_rows([1, 2]), {'page': 1})
+    sync.push(_rows([3, 4]), {'page': 2})
+    assert table.updates == 2
+    assert table.client.scripts == []
+
+
+def test_patch_not_applied_forces_full_update():
+    class AnsweringClient(DummyClient):
+        def run_javascript(self, code, respond=False):
+            super().run_javascript(code)
+
+            async def answer():
+                return False
+
+            return answer()
+
+    async def scenario():
+        table = DummyTable()
+        table.client = AnsweringClient()
+        sync = table_diff.TableSync(table, 'id')
+        sync.push(_rows(range(10)), {'page': 1})
+        sync.push(_rows([0, 2, 4]), {'page': 1})
+        await asyncio.sleep(0)
+        assert table.client.scripts
+        sync.push(_rows([0, 2]), {'page': 1})
+        return table.updates
+
+    assert asyncio.run(scenario()) == 2
@@ -0,0 +1,130 @@
+import asyncio
+import importlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+tracing = importlib.import_module('app.tracing')
+
+
+def test_spans_nest_below_the_action():
+    finished = []
+
+    @tracing.traced('print', on_finish=finished.append)
+    def action():
+        with tracing.span('render', format='png') as s:
+            with tracing.span('svg_convert'):
+                pass
+            s.set(bytes=42)
+        tracing.record('row_build', 0.5, rows=10)
+
+    action()
+    trace = finished[0]
+    assert tracing.latest_trace() is trace
+    spans = {s.name: s for s in trace.spans}
+    assert spans['svg_convert'].parent_id == spans['render'].span_id
+    assert spans['render'].parent_id == trace.root.span_id
+    assert spans['render'].attributes == {'format': 'png', 'bytes': 42}
+    assert round(spans['row_build'].duration, 3) == 0.5
+    lines = tracing.format_trace(trace)
+    assert lines[0].startswith('print ')
+    render = [i for i, line in enumerate(lines) if line.startswith('  render ')][0]
+    assert lines[render + 1].startswith('    svg_convert ')
+    assert any(line.startswith('  row_build 500 ms rows=10') for line in lines)
+
+
+def test_span_outside_trace_is_noop():
+    with tracing.span('orphan') as s:
+        s.set(ignored=True)
+    assert s is tracing.NO_SPAN
+    assert tracing.start_span('orphan') is tracing.NO_SPAN
+
+
+def test_errors_and_threads_are_recorded():
+    @tracing.traced('load')
+    async def action():
+        def work():
+            with tracing.span('fetch_calibration_data'):
+                raise RuntimeError('calServer down')
+
+        with pytest.raises(RuntimeError):
+            await asyncio.to_thread(work)
+        raise ValueError('no rows')
+
+    with pytest.raises(ValueError):
+        asyncio.run(action())
+    trace = tracing.latest_trace()
+    fetch = [s for s in trace.spans if s.name == 'fetch_calibration_data'][0]
+    assert fetch.status == 'error' and 'calServer down' in fetch.attributes['error']
+    assert trace.root.status == 'error'
+    assert 'FEHLER' in tracing.format_trace(trace)[0]
+
+
+def test_cancelled_actions_are_not_reported():
+    finished = []
+
+    @tracing.traced('select', on_finish=finished.append)
+    async def action():
+        await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.create_task(action())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert finished == []
+    trace = tracing.latest_trace()
+    assert trace.name == 'select' and trace.root.status == 'cancelled'
+    assert 'error' not in trace.root.attributes
+    assert 'ABGEBROCHEN' in tracing.format_trace(trace)[0]
+
+
+def test_jsonl_export_roundtrip(tmp_path, monkeypatch):
+    path = tmp_path / 'traces' / 'traces.jsonl'
+    monkeypatch.setattr(tracing, 'EXPORTERS', [])
+    tracing.configure(f'jsonl:{path}')
+    with tracing.trace('print', printer='Zebra'):
+        with tracing.span('print_label', printer='Zebra'):
+            pass
+    data = json.loads(path.read_text().splitlines()[-1])
+    assert data['name'] == 'print' and [s['name'] for s in data['spans']] == ['print', 'print_label']
+    loaded = tracing._load_latest(str(path))
+    assert tracing.format_trace(loaded)[1].startswith('  print_label ')
+
+
+def test_otlp_export_posts_to_collector(monkeypatch):
+    received = []
+
+    class Collector(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append((self.path, json.loads(self.rfile.read(int(self.headers['Content-Length'])))))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Collector)
+    threading.Thread(target=server.handle_request, daemon=True).start()
+    exporter = tracing.OtlpExporter(f'http://127.0.0.1:{server.server_address[1]}', service='test')
+    monkeypatch.setattr(tracing, 'EXPORTERS', [exporter])
+    with tracing.trace('select', cached=False, rows=3):
+        with tracing.span('qr_generate', size=200):
+            pass
+    exporter.flush()
+    exporter.close()
+    server.server_close()
+    path, body = received[0]
+    assert path == '/v1/traces'
+    resource = body['resourceSpans'][0]
+    assert resource['resource']['attributes'][0]['value'] == {'stringValue': 'test'}
+    root, child = resource['scopeSpans'][0]['spans']
+    assert len(root['traceId']) == 32 and len(root['spanId']) == 16
+    assert child['parentSpanId'] == root['spanId']
+    assert {'key': 'rows', 'value': {'intValue': '3'}} in root['attributes']
+    assert {'key': 'cached', 'value': {'boolValue': False}} in root['attributes']